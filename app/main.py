@@ -2,16 +2,82 @@
 API module for titanic survivor prediction
 """
 
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from src.config.settings import LOG_LEVEL, MODEL_RELOAD_INTERVAL
+from src.metrics import CONTENT_TYPE, metrics
+from src.predict import (
+    engine_name,
+    primary_loaded,
+    primary_model,
+    registry,
+    shadow,
+    store,
+)
+from .responses import FastJSONResponse
+from .middleware import MetricsMiddleware
+from .router.models import models
 from .router.predictions import predictions
 from .router.training import train
+from .router.training.train import training_jobs
+from .schema.titanic_data import input_schema
 
+logging.basicConfig(
+    level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger(__name__)
 
-app = FastAPI()
+
+async def watch_model():
+    """
+    Load the model off the event loop, then keep polling the artifact and
+    hot-swap it whenever it changes on disk. The model store's routing is
+    polled alongside, and the versions it routes to are loaded here too.
+    """
+    while True:
+        try:
+            await asyncio.to_thread(registry.refresh)
+        except FileNotFoundError:
+            logger.warning("No model at %s yet, train one via /train", registry.path)
+        except Exception:  # pylint: disable=broad-except
+            # unreadable or corrupt artifact: keep serving what is loaded
+            logger.exception("Could not load model from %s", registry.path)
+        try:
+            await asyncio.to_thread(store.refresh)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Could not load the routed model versions")
+
+        if MODEL_RELOAD_INTERVAL <= 0 and registry.loaded:
+            return
+        await asyncio.sleep(MODEL_RELOAD_INTERVAL if MODEL_RELOAD_INTERVAL > 0 else 1)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """
+    Start loading the model in the background so the worker accepts
+    connections immediately; it is verified against the request schema
+    and warmed up before it serves
+    """
+    registry.schema = store.schema = input_schema()
+    watcher = asyncio.create_task(watch_model())
+    yield
+    watcher.cancel()
+    shadow.close()
+    await predictions.predict_batcher.close()
+    training_jobs.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.title = "Titanic Survivor Predictor"
+app.add_middleware(MetricsMiddleware)
 app.include_router(predictions.router)
 app.include_router(train.router)
+app.include_router(models.router)
 
 
 @app.get("/")
@@ -20,3 +86,33 @@ def start():
     The default endpoint
     """
     return {"message": "Titanic Survivor Predictor is active"}
+
+
+@app.get("/ready")
+def readiness():
+    """
+    Whether the worker serves a verified, warmed-up model (503 until then),
+    with the seconds its loading, verification and warm-up took
+    """
+    if not primary_loaded():
+        return FastJSONResponse({"ready": False}, status_code=503)
+
+    model = primary_model()
+    return {
+        "ready": True,
+        "version": model.version,
+        "engine": engine_name(model),
+        "load_seconds": model.load_seconds,
+        "verify_seconds": model.verify_seconds,
+        "warmup_seconds": model.warmup_seconds,
+        "warmup_rows": registry.warmup_rows,
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """
+    Request counters, latency histograms, per-stage prediction timings and
+    training step timings in the Prometheus text format
+    """
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,44 @@
+"""
+ASGI middleware of the API
+"""
+
+import time
+from src.metrics import REQUEST_SECONDS, REQUESTS
+
+
+class MetricsMiddleware:
+    """
+    Counts every HTTP request and records its latency, labelled with the
+    matched route template (so ``/train/{job_id}`` stays one series).
+
+    A plain ASGI middleware rather than ``BaseHTTPMiddleware``, which
+    would add a task and a stream per request on the hot path.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            REQUESTS.inc(route=path, method=method, status=status)
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - start, route=path, method=method
+            )
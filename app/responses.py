@@ -0,0 +1,24 @@
+"""
+Response classes of the API
+"""
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded with orjson when it is installed, else with
+    pydantic-core's encoder; both are several times faster than the
+    standard library ``json`` that ``JSONResponse`` uses
+    """
+
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return to_json(content)
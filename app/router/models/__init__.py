@@ -0,0 +1 @@
+# package for the model versions routes
@@ -0,0 +1,63 @@
+"""
+Module to handle the model versions routes: publishing, routing and the
+shadow scoring stats
+"""
+
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from app.schema.model_routing import ModelRouting
+from src.model_store import Routing
+from src.predict import registry, shadow, store
+
+router = APIRouter()
+
+
+@router.get("/models")
+def model_versions():
+    """
+    Endpoint to list the published model versions, the routing between
+    them and the shadow scoring stats per version
+    """
+    return {
+        "routing": store.routing._asdict(),
+        "versions": store.versions(),
+        "shadow": shadow.stats(),
+    }
+
+
+@router.post("/models", status_code=201)
+def publish_model():
+    """
+    Endpoint to publish the artifact at MODEL_PATH to the model store.
+    Models trained through /train are published automatically.
+    """
+    try:
+        version = store.publish(registry.path)
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=404, detail=f"No model at {registry.path} to publish"
+        ) from e
+
+    return {"version": version}
+
+
+@router.put("/models/routing")
+async def route_models(routing: ModelRouting):
+    """
+    Endpoint to change which versions serve.
+
+    The primary and the candidate are loaded and verified before the
+    routing changes, so a version that fails verification is refused and
+    the current routing stays in place. The routing is saved in the model
+    store, and every other worker picks it up at its next poll.
+    """
+    try:
+        applied = await run_in_threadpool(
+            store.set_routing, Routing(**routing.model_dump())
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+
+    return {"routing": applied._asdict()}
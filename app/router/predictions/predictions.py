@@ -2,20 +2,317 @@
 Module to handle survivor prediction route, endpoint
 """
 
-from fastapi import APIRouter
-from app.schema.titanic_data import SurvivorInput
-from src.predict import predict
+import logging
+import math
+import random
+import re
+from typing import List
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
+from app.responses import FastJSONResponse
+from app.schema.titanic_data import (
+    POSITIONAL_FIELDS,
+    SurvivorInput,
+    SurvivorRecord,
+    SurvivorRow,
+    input_schema,
+)
+from src.batcher import MicroBatcher
+from src.columnar import (
+    ARROW_STREAM,
+    NUMPY_ARRAY,
+    ColumnarValidationError,
+    encode_results,
+    media_type,
+    read_columns,
+)
+from src.config.settings import (
+    PREDICT_EXECUTOR_WORKERS,
+    PREDICT_MICRO_BATCH_SIZE,
+    PREDICT_MICRO_BATCH_WAIT_MS,
+    PREDICTION_LOG_SAMPLE_RATE,
+)
+from src.metrics import stage
+from src.predict import (
+    Prediction,
+    drift_monitor,
+    predict_batch,
+    predict_coalesced,
+    predict_columns,
+    prediction_cache,
+    primary_loaded,
+    primary_model,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# request bodies are validated straight into dicts (named fields) or tuples
+# (positional arrays); no SurvivorInput instance is built and dumped
+record_adapter = TypeAdapter(SurvivorRecord)
+row_adapter = TypeAdapter(SurvivorRow)
+record_batch_adapter = TypeAdapter(List[SurvivorRecord])
+row_batch_adapter = TypeAdapter(List[SurvivorRow])
+
+# a batch whose items are JSON arrays rather than objects
+POSITIONAL_BATCH = re.compile(rb"\s*\[\s*\[")
+
+# OpenAPI schema of one passenger in either form
+PASSENGER_SCHEMA = {
+    "oneOf": [SurvivorInput.model_json_schema(), row_adapter.json_schema()]
+}
+
+# fields and allowed values a columnar batch is validated against
+COLUMN_SCHEMA = input_schema()
+
+# concurrent /predict requests are scored together, off the event loop
+predict_batcher = MicroBatcher(
+    predict_coalesced,
+    max_batch_size=PREDICT_MICRO_BATCH_SIZE,
+    max_wait_ms=PREDICT_MICRO_BATCH_WAIT_MS,
+    max_workers=PREDICT_EXECUTOR_WORKERS,
+)
+
+
+def require_model():
+    """
+    Load the served model, answering 503 while no model has been trained
+    """
+    try:
+        primary_model()
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=503, detail="No trained model available, train one via /train"
+        ) from e
+
+
+def format_prediction(result: Prediction, include_probability: bool = False) -> dict:
+    """
+    Turn a prediction into the response body of a single prediction,
+    optionally with the survival probability and the decision threshold
+    it was compared against
+    """
+    prediction = "yes" if result.label == 1 else "no"
+    body = {"Did the person most likely survive": prediction}
+    if include_probability:
+        body["probability"] = result.probability
+        body["threshold"] = result.threshold
+    return body
+
+
+def log_sampled(message: str, *args):
+    """
+    Log at DEBUG level for a PREDICTION_LOG_SAMPLE_RATE share of the calls,
+    so request logging stays off the hot path
+    """
+    if (
+        logger.isEnabledFor(logging.DEBUG)
+        and random.random() < PREDICTION_LOG_SAMPLE_RATE
+    ):
+        logger.debug(message, *args)
+
+
+def parse_record(body: bytes, loc=("body",)) -> dict:
+    """
+    Validate the JSON body of a single prediction request, a passenger
+    object or a positional array, into a record dict
+    """
+    try:
+        if body.lstrip()[:1] == b"[":
+            return dict(zip(POSITIONAL_FIELDS, row_adapter.validate_json(body)))
+        return record_adapter.validate_json(body)
+    except ValidationError as e:
+        raise _request_error(e, loc) from e
 
-@router.post("/predict")
-def make_prediction(data: SurvivorInput):
+
+def parse_batch(body: bytes, content_type: str):
+    """
+    Validate a batch request body, either a JSON array of passengers or
+    newline delimited JSON with one passenger per line. Returns the
+    records and whether they are positional (tuples in POSITIONAL_FIELDS
+    order) rather than dicts.
+    """
+    if "ndjson" in content_type:
+        return [
+            parse_record(line, loc=("body", line_number))
+            for line_number, line in enumerate(body.splitlines())
+            if line.strip()
+        ], False
+
+    positional = POSITIONAL_BATCH.match(body) is not None
+    adapter = row_batch_adapter if positional else record_batch_adapter
+    try:
+        return adapter.validate_json(body), positional
+    except ValidationError as e:
+        raise _request_error(e, ("body",)) from e
+
+
+@router.post(
+    "/predict",
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {"schema": PASSENGER_SCHEMA}
+            },
+            "required": True,
+        }
+    },
+)
+async def make_prediction(request: Request, include_probability: bool = False):
     """
     Endpoint to get the if a person survived the titanic
+
+    The request joins a micro-batch with other concurrent requests and is
+    scored in one vectorized call. The passenger is a JSON object or a
+    positional array in POSITIONAL_FIELDS order. With
+    ``include_probability=true`` the response also holds the survival
+    probability and the model's decision threshold.
+    """
+    body = await request.body()
+    # validated here rather than by FastAPI so that it can be timed
+    with stage("validation"):
+        data = parse_record(body)
+    if not primary_loaded():
+        await run_in_threadpool(require_model)
+    result = await predict_batcher.submit(data)
+    log_sampled("Predicted %s for %s", result, data)
+
+    with stage("serialization"):
+        return FastJSONResponse(format_prediction(result, include_probability))
+
+
+@router.post(
+    "/predict/batch",
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": PASSENGER_SCHEMA}
+                },
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+            "required": True,
+        }
+    },
+)
+async def make_batch_prediction(request: Request, include_probability: bool = False):
+    """
+    Endpoint to get survival predictions for many passengers in one call.
+
+    Accepts a JSON array of passengers (all objects or all positional
+    arrays) or an NDJSON body (``Content-Type: application/x-ndjson``),
+    and returns the predictions
+    in the same order as the input, with probabilities on request like
+    ``/predict``.
+    """
+    body = await request.body()
+    with stage("validation"):
+        records, positional = parse_batch(
+            body, request.headers.get("content-type", "")
+        )
+    await run_in_threadpool(require_model)
+
+    results = await run_in_threadpool(predict_batch, records, positional=positional)
+    log_sampled("Predicted a batch of %d records", len(results))
+
+    with stage("serialization"):
+        return FastJSONResponse(
+            [format_prediction(result, include_probability) for result in results]
+        )
+
+
+@router.post(
+    "/predict/columnar",
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                ARROW_STREAM: {"schema": {"type": "string", "format": "binary"}},
+                NUMPY_ARRAY: {"schema": {"type": "string", "format": "binary"}},
+            },
+            "required": True,
+        }
+    },
+)
+async def make_columnar_prediction(request: Request):
+    """
+    Endpoint to get survival predictions for a binary columnar batch.
+
+    Accepts an Arrow IPC stream (``Content-Type:
+    application/vnd.apache.arrow.stream``) or a ``.npy`` structured array
+    (``Content-Type: application/x-npy``) holding the feature columns. The
+    columns are validated with vectorized checks against the same schema
+    as ``/predict`` and scored without turning rows into Python objects.
+    The response, in the request's format, streams a ``prediction`` and a
+    ``probability`` column in input order.
+    """
+    kind = media_type(request.headers.get("content-type", ""))
+    if kind is None:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Send the batch as {ARROW_STREAM} or {NUMPY_ARRAY}",
+        )
+
+    body = await request.body()
+    with stage("validation"):
+        try:
+            columns = await run_in_threadpool(read_columns, body, kind, COLUMN_SCHEMA)
+        except ColumnarValidationError as e:
+            raise RequestValidationError(e.errors) from e
+        except RuntimeError as e:
+            raise HTTPException(status_code=415, detail=str(e)) from e
+    await run_in_threadpool(require_model)
+
+    rows = len(next(iter(columns.values())))
+    log_sampled("Predicting a columnar batch of %d records", rows)
+    return StreamingResponse(
+        encode_results(predict_columns(columns), rows, kind), media_type=kind
+    )
+
+
+@router.get("/predict/batcher")
+def prediction_batcher_stats():
+    """
+    Endpoint to get the micro-batching settings and the mean batch size
+    """
+    return predict_batcher.stats()
+
+
+@router.get("/predict/cache")
+def prediction_cache_stats():
+    """
+    Endpoint to get the hit/miss/eviction counters of the prediction cache
+    """
+    if prediction_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **prediction_cache.stats()}
+
+
+@router.get("/predict/drift")
+def prediction_drift():
+    """
+    Endpoint to get how far the served inputs and predictions have drifted
+    from the served model's training reference, per feature, for the
+    current and the last completed monitoring window
+    """
+    if drift_monitor is None:
+        return {"enabled": False}
+    require_model()
+    return {"enabled": True, **drift_monitor.report(primary_model())}
+
+
+def _request_error(e: ValidationError, loc: tuple) -> RequestValidationError:
+    """
+    The errors of ``e`` located under ``loc``; a non-finite input is
+    reported as a string, since JSON has no NaN
     """
-    print(f"This is the data {data}")
-    result = predict(data.dict())
-    print(f"This is the result though {result}")
-    prediction = "yes" if int(result) == 1 else "no"
-    return {"Did the person most likely survive": prediction}
+    errors = []
+    for error in e.errors():
+        value = error.get("input")
+        if isinstance(value, float) and not math.isfinite(value):
+            error["input"] = str(value)
+        errors.append({**error, "loc": (*loc, *error["loc"])})
+    return RequestValidationError(errors)
@@ -3,22 +3,68 @@ Module to handle training, preprocessing and building pipeline
 from the dataset
 """
 
-from fastapi import APIRouter
-from src.train import train
+import threading
+from typing import Literal
+from fastapi import APIRouter, HTTPException
+from src.config.settings import TRAIN_MAX_JOBS
+from src.jobs import JobLimitReached, TrainingJobs, move_artifact
+from src.predict import registry, store
 
 router = APIRouter()
 
+# jobs finishing together take turns replacing the served artifact
+_publish_lock = threading.Lock()
 
-@router.get("/train")
-def train_dataset():
+
+def publish_trained_model(model_path) -> str:
     """
-    Endpoint to train the dataset
+    Publish the artifact a job trained into ``model_path`` to the model
+    store, move it over the served artifact, then serve it right away
+    instead of waiting for the next poll. Returns its version.
     """
+    version = store.publish(model_path)
+    with _publish_lock:
+        move_artifact(model_path, registry.path)
+    registry.refresh()
+    return version
+
+
+training_jobs = TrainingJobs(
+    TRAIN_MAX_JOBS, on_success=publish_trained_model, model_path=registry.path
+)
 
-    print("=" * 60)
-    result = train()
 
-    if not result["success"]:
-        return {"message": f"Error building pipeline {result["error"]}"}
+@router.post("/train", status_code=202)
+def train_dataset(
+    mode: Literal["full", "streaming", "search", "incremental"] = "full",
+):
+    """
+    Endpoint to start training the dataset in the background.
+
+    ``mode=streaming`` trains out of core, reading the dataset in chunks.
+    ``mode=search`` cross-validates the candidate models of ``src.search``
+    on all cores and keeps the best one; its metrics hold the leaderboard.
+    ``mode=incremental`` updates the current model with the newly labeled
+    rows at INCREMENTAL_DATA_PATH, or refits it when a full refit is due.
+    Returns the job record immediately; poll ``GET /train/{job_id}`` for
+    its status, metrics and duration. A successful job publishes its model
+    to the model store, under the ``model_version`` of the job record.
+    """
+    try:
+        job = training_jobs.submit(mode)
+    except JobLimitReached as e:
+        raise HTTPException(status_code=429, detail=str(e)) from e
+
+    return {"message": "Training started", "job": job}
+
+
+@router.get("/train/{job_id}")
+def training_status(job_id: str):
+    """
+    Endpoint to get the status of a training job
+    """
+    job = training_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown training job {job_id}")
 
-    return {"message": f"Pipeline built successfully {result["pipeline"]} "}
+    return {"job": job}
@@ -0,0 +1,18 @@
+"""
+Module for handling the schema of the model routing
+"""
+
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class ModelRouting(BaseModel):
+    """
+    Which published model versions serve: the primary answers /predict
+    (None for the artifact at MODEL_PATH), the candidate also scores a
+    ``shadow_fraction`` of the calls (None for no shadow scoring)
+    """
+
+    primary: Optional[str] = None
+    candidate: Optional[str] = None
+    shadow_fraction: float = Field(default=0.0, ge=0.0, le=1.0)
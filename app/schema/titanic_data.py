@@ -2,8 +2,19 @@
 Module for handling the schema of the titanic-data
 """
 
-from typing import Literal
-from pydantic import BaseModel
+from typing import Annotated, Literal, Tuple, get_args
+from pydantic import BaseModel, Field
+from typing_extensions import TypedDict
+from src.config.features import FEATURE_COLUMNS
+
+SexLiteral = Literal["male", "female"]
+PclassLiteral = Literal[1, 2, 3]
+EmbarkedLiteral = Literal["Q", "C", "S"]
+
+# the features are scored as int64 and finite float64 columns: integers out
+# of int64 range and NaN or infinite floats are rejected at validation
+Int64 = Annotated[int, Field(ge=-(2**63), le=2**63 - 1)]
+FiniteFloat = Annotated[float, Field(allow_inf_nan=False)]
 
 
 class SurvivorInput(BaseModel):
@@ -11,10 +22,41 @@ class SurvivorInput(BaseModel):
     Input data validation model for the predictor
     """
 
-    Age: int
-    Fare: float
-    Sex: Literal["male", "female"]
-    Pclass: Literal[1, 2, 3]
-    Embarked: Literal["Q", "C", "S"]
-    SibSp: int
-    Parch: int
+    Age: Int64
+    Fare: FiniteFloat
+    Sex: SexLiteral
+    Pclass: PclassLiteral
+    Embarked: EmbarkedLiteral
+    SibSp: Int64
+    Parch: Int64
+
+
+# each SurvivorInput field with its constraints, to derive the payloads below
+_FIELD_TYPES = {
+    name: (
+        Annotated[(field.annotation, *field.metadata)]
+        if field.metadata
+        else field.annotation
+    )
+    for name, field in SurvivorInput.model_fields.items()
+}
+
+# SurvivorInput validated straight into a plain dict, without building a
+# model instance and dumping it again
+SurvivorRecord = TypedDict("SurvivorRecord", _FIELD_TYPES)
+
+# compact positional payload, e.g. [30, 75.5, "female", 1, "C", 1, 0]: the
+# SurvivorInput fields in FEATURE_COLUMNS order
+POSITIONAL_FIELDS = tuple(FEATURE_COLUMNS)
+SurvivorRow = Tuple[tuple(_FIELD_TYPES[name] for name in POSITIONAL_FIELDS)]
+
+
+def input_schema(model=SurvivorInput) -> dict:
+    """
+    The fields of an input model as loaded models are verified against
+    them: the allowed values of a Literal field, the type of any other
+    """
+    return {
+        name: get_args(field.annotation) or field.annotation
+        for name, field in model.model_fields.items()
+    }
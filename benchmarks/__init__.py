@@ -0,0 +1 @@
+# benchmark scripts, run as python -m benchmarks.<name>
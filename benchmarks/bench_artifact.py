@@ -0,0 +1,97 @@
+"""
+Benchmark of model loading: the joblib pickle versus the compact export,
+each measured in a fresh interpreter
+
+Reports the load time, peak RSS and whether sklearn got imported, for
+loading the artifact alone and for booting an API worker
+(``import app.main`` plus loading the served model). Uses the trained
+model at MODEL_PATH and its compact export:
+
+    python -m benchmarks.bench_artifact
+"""
+
+import json
+import os
+import subprocess
+import sys
+from src.compact import compact_path
+from src.config.settings import MODEL_PATH
+
+# loads one artifact with nothing else imported
+LOAD_SNIPPET = """
+import json, resource, sys, time
+start = time.perf_counter()
+if sys.argv[1] == "pickle":
+    import joblib
+    model = joblib.load(sys.argv[2])
+else:
+    from src.compact import read_compact
+    model = read_compact(sys.argv[2])
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "sklearn": "sklearn" in sys.modules,
+}))
+"""
+
+# boots the API and loads the served model, as a uvicorn worker does
+BOOT_SNIPPET = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app.main
+from src.predict import registry
+registry.get()
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "sklearn": "sklearn" in sys.modules,
+}))
+"""
+
+REPEAT = 5
+
+
+def run(snippet: str, args=(), env=None) -> dict:
+    """
+    Median-time result of ``REPEAT`` fresh interpreters running ``snippet``
+    """
+    results = []
+    for _ in range(REPEAT):
+        output = subprocess.run(
+            [sys.executable, "-c", snippet, *args],
+            capture_output=True,
+            text=True,
+            check=True,
+            env={**os.environ, **(env or {})},
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return sorted(results, key=lambda result: result["seconds"])[REPEAT // 2]
+
+
+def main():
+    """
+    Print load time, peak RSS and sklearn import per artifact format
+    """
+    compact = compact_path(MODEL_PATH)
+    if not compact.exists():
+        raise SystemExit(f"No compact export at {compact}, train a model first")
+
+    print(f"pickle  {os.path.getsize(MODEL_PATH):>8} bytes  {MODEL_PATH}")
+    print(f"compact {os.path.getsize(compact):>8} bytes  {compact}\n")
+
+    print(f"{'':<22} {'time':>9} {'peak RSS':>10} {'sklearn':>8}")
+    cases = {
+        "load pickle": run(LOAD_SNIPPET, ("pickle", str(MODEL_PATH))),
+        "load compact": run(LOAD_SNIPPET, ("compact", str(compact))),
+        "API boot, pickle": run(BOOT_SNIPPET, env={"MODEL_FORMAT": "pickle"}),
+        "API boot, compact": run(BOOT_SNIPPET, env={"MODEL_FORMAT": "compact"}),
+    }
+    for name, result in cases.items():
+        print(
+            f"{name:<22} {result['seconds'] * 1e3:>7.0f}ms "
+            f"{result['max_rss_kb'] / 1024:>8.0f}MB {str(result['sklearn']):>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark of bulk scoring throughput: the JSON /predict/batch path
+(pydantic validation of every record, scoring, JSON response) versus
+the binary /predict/columnar path (vectorized validation, scoring of
+NumPy column views, columnar response), in rows/sec at 10k and 1M rows
+
+Each path runs the steps its endpoint runs, in process and from the
+request body bytes to the response body bytes, so HTTP transfer is not
+included. The Arrow rows need pyarrow and are skipped without it. Uses
+the trained model at MODEL_PATH:
+
+    python -m benchmarks.bench_columnar
+"""
+
+import gc
+import io
+import json
+import time
+import numpy as np
+from app.responses import FastJSONResponse
+from app.router.predictions.predictions import (
+    COLUMN_SCHEMA,
+    format_prediction,
+    parse_batch,
+)
+from app.schema.titanic_data import POSITIONAL_FIELDS
+from benchmarks.synthetic import make_requests
+from src.columnar import ARROW_STREAM, NUMPY_ARRAY, encode_results, read_columns
+from src.predict import predict_batch, predict_columns, primary_model
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+ROW_COUNTS = (10_000, 1_000_000)
+
+
+def json_path(body: bytes) -> bytes:
+    """
+    What /predict/batch does with a JSON array body
+    """
+    records, positional = parse_batch(body, "application/json")
+    results = predict_batch(records, positional=positional)
+    return FastJSONResponse(
+        [format_prediction(result, include_probability=True) for result in results]
+    ).body
+
+
+def columnar_path(body: bytes, kind: str) -> bytes:
+    """
+    What /predict/columnar does with a binary body
+    """
+    columns = read_columns(body, kind, COLUMN_SCHEMA)
+    rows = len(next(iter(columns.values())))
+    return b"".join(encode_results(predict_columns(columns), rows, kind))
+
+
+def request_bodies(n_rows: int) -> dict:
+    """
+    The same ``n_rows`` passengers as each kind of request body
+    """
+    records = make_requests(n_rows)
+    columns = {
+        field: np.asarray([record[field] for record in records])
+        for field in POSITIONAL_FIELDS
+    }
+    bodies = {
+        "JSON objects": json.dumps(records).encode(),
+        "JSON positional arrays": json.dumps(
+            [[record[field] for field in POSITIONAL_FIELDS] for record in records]
+        ).encode(),
+    }
+    del records
+
+    array = np.empty(n_rows, dtype=[(f, v.dtype) for f, v in columns.items()])
+    for field, values in columns.items():
+        array[field] = values
+    buffer = io.BytesIO()
+    np.save(buffer, array)
+    bodies[".npy structured array"] = buffer.getvalue()
+
+    if pa is not None:
+        table = pa.table(columns)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=65_536)
+        bodies["Arrow IPC stream"] = sink.getvalue().to_pybytes()
+    return bodies
+
+
+def best_seconds(func, repeat: int) -> float:
+    """
+    Fastest of ``repeat`` calls, in seconds
+    """
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    """
+    Print the rows/sec of each path per row count, relative to JSON objects
+    """
+    model = primary_model()
+    print(f"model {model.version}, engine {type(model.engine).__name__}")
+    paths = {
+        "JSON objects": json_path,
+        "JSON positional arrays": json_path,
+        ".npy structured array": lambda body: columnar_path(body, NUMPY_ARRAY),
+        "Arrow IPC stream": lambda body: columnar_path(body, ARROW_STREAM),
+    }
+
+    for n_rows in ROW_COUNTS:
+        bodies = request_bodies(n_rows)
+        repeat = 5 if n_rows <= 10_000 else 2
+        print(f"{n_rows} rows")
+        baseline = None
+        for name, body in bodies.items():
+            seconds = best_seconds(lambda: paths[name](body), repeat)
+            baseline = baseline or seconds
+            print(
+                f"  {name:<24} {len(body) / 1e6:>8.1f}MB body {seconds:>8.3f}s "
+                f"{n_rows / seconds:>12,.0f} rows/s {baseline / seconds:>7.1f}x"
+            )
+        del bodies
+
+
+if __name__ == "__main__":
+    main()
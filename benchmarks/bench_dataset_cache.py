@@ -0,0 +1,67 @@
+"""
+Benchmark of dataset loading: full CSV parse versus column-selected typed
+CSV parse versus the warm columnar (Feather, read memory-mapped) cache, at 1x,
+100x and 1000x the Titanic row count
+
+    python -m benchmarks.bench_dataset_cache
+"""
+
+import tempfile
+import time
+from pathlib import Path
+import pandas as pd
+from benchmarks.synthetic import TITANIC_ROWS, make_passengers
+from src.config.features import DATASET_DTYPES, FEATURE_COLUMNS, TARGET_COLUMN
+from src.dataset_cache import read_csv_columns, read_dataset
+
+SCALES = (1, 100, 1000)
+
+
+def best_of(func, repeat: int = 3) -> float:
+    """
+    Fastest of ``repeat`` timed calls, in seconds
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    """
+    Print load times per scale
+    """
+    columns = [*FEATURE_COLUMNS, TARGET_COLUMN]
+    header = (
+        f"{'rows':>9} {'full csv':>10} {'typed csv':>10} "
+        f"{'first load':>11} {'warm cache':>11} {'speedup':>8}"
+    )
+    print(header)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in SCALES:
+            csv_path = Path(tmp) / f"titanic_{scale}x.csv"
+            cache_dir = Path(tmp) / f"cache_{scale}x"
+            make_passengers(TITANIC_ROWS * scale).to_csv(csv_path, index=False)
+
+            full = best_of(lambda: pd.read_csv(csv_path)[columns])
+            typed = best_of(lambda: read_csv_columns(csv_path, columns, DATASET_DTYPES))
+
+            start = time.perf_counter()
+            read_dataset(csv_path, columns, DATASET_DTYPES, cache_dir)
+            first = time.perf_counter() - start
+
+            warm = best_of(
+                lambda: read_dataset(csv_path, columns, DATASET_DTYPES, cache_dir)
+            )
+
+            print(
+                f"{TITANIC_ROWS * scale:>9} {full * 1e3:>8.1f}ms {typed * 1e3:>8.1f}ms "
+                f"{first * 1e3:>9.1f}ms {warm * 1e3:>9.1f}ms {full / warm:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
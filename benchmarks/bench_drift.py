@@ -0,0 +1,96 @@
+"""
+Benchmark of what drift monitoring costs the request path: the time per
+``predict`` call, per 64-row and per 10k-row ``predict_batch`` call
+without and with the drift monitor, and the monitor's own update per
+record and per batch
+
+The model at MODEL_PATH is given a reference profile of synthetic
+passengers, so the benchmark does not depend on how it was trained:
+
+    python -m benchmarks.bench_drift
+"""
+
+import timeit
+from benchmarks.synthetic import make_passengers, make_requests
+from src import predict as predict_module
+from src.drift import DriftMonitor, DriftProfile
+from src.predict import _columns, predict, predict_batch, registry
+
+BATCH_SIZES = (64, 10_000)
+
+
+def per_call(func, calls: int) -> float:
+    """
+    Best of five runs of ``calls`` calls, in seconds per call
+    """
+    return min(timeit.repeat(func, number=calls, repeat=5)) / calls
+
+
+def report(title: str, variants: dict, calls: int):
+    """
+    Print the time per call of each variant, relative to the first one
+    """
+    print(title)
+    baseline = None
+    for name, func in variants.items():
+        seconds = per_call(func, calls)
+        baseline = baseline or seconds
+        print(f"  {name:<28} {seconds * 1e6:>10.2f}us {seconds / baseline:>6.2f}x")
+
+
+def main():
+    """
+    Print the time per call without and with the monitor, and the
+    monitor's own cost
+    """
+    reference = DriftProfile.fit(make_passengers(100_000))
+    model = registry.get()
+    metadata = {**model.metadata, "reference": reference.to_dict()}
+    model = model._replace(metadata=metadata)
+    predict_module.primary_model = lambda: model
+    monitor = DriftMonitor(window_seconds=3600)
+    predict_module.drift_monitor = None
+
+    def with_monitor(func):
+        def run():
+            predict_module.drift_monitor = monitor
+            try:
+                func()
+            finally:
+                predict_module.drift_monitor = None
+
+        return run
+
+    record = make_requests(1)[0]
+    report(
+        "predict, one record",
+        {
+            "no monitor": lambda: predict(record),
+            "drift monitor": with_monitor(lambda: predict(record)),
+            "monitor update alone": lambda: monitor.observe(model, record, True),
+        },
+        calls=20_000,
+    )
+
+    for size in BATCH_SIZES:
+        records = make_requests(size)
+        columns = _columns(records, positional=False)
+        positive = [True] * size
+        calls = max(5, 20_000 // size)
+        report(
+            f"predict_batch, {size} records",
+            {
+                "no monitor": lambda: predict_batch(records),
+                "drift monitor": with_monitor(lambda: predict_batch(records)),
+                "monitor update alone": lambda: monitor.observe_batch(
+                    model, columns, positive
+                ),
+            },
+            calls=calls,
+        )
+
+    print(f"live rows profiled: {monitor.report(model)['current']['rows']}")
+
+
+if __name__ == "__main__":
+    main()
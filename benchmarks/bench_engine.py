@@ -0,0 +1,75 @@
+"""
+Benchmark of per-request and batch latency: sklearn pipeline versus the
+compiled and table engines from src/engine.py
+
+Uses the trained model at MODEL_PATH:
+
+    python -m benchmarks.bench_engine
+"""
+
+import time
+import pandas as pd
+from benchmarks.synthetic import make_requests
+from src.engine import compile_pipeline
+from src.predict import registry
+from src.registry import load_engine
+
+
+def time_per_call(func, items, repeat: int = 3) -> float:
+    """
+    Best-of-``repeat`` mean seconds per call of ``func`` over ``items``
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, (time.perf_counter() - start) / len(items))
+    return best
+
+
+def main():
+    """
+    Print per-request latency of each scoring path
+    """
+    pipeline = registry.get().pipeline
+    compiled = compile_pipeline(pipeline)
+    table = load_engine(pipeline, "table")
+    rows = make_requests(2000)
+    frames = [pd.DataFrame([row]) for row in rows[:500]]
+
+    single = {
+        "pipeline.predict (1-row DataFrame)": time_per_call(
+            lambda row: pipeline.predict(pd.DataFrame([row])), rows[:500]
+        ),
+        "pipeline.predict (prebuilt DataFrame)": time_per_call(
+            pipeline.predict, frames
+        ),
+        "compiled.predict (NumPy, 1 row)": time_per_call(
+            lambda row: compiled.predict({k: [v] for k, v in row.items()}), rows
+        ),
+        "compiled.predict_row (pure Python)": time_per_call(
+            compiled.predict_row, rows
+        ),
+        "table.predict_row (pure Python)": time_per_call(table.predict_row, rows),
+    }
+
+    print("Per-request latency")
+    for name, seconds in single.items():
+        print(f"  {name:<40} {seconds * 1e6:>10.1f} us")
+
+    columns = pd.DataFrame(make_requests(100_000))
+    arrays = {column: columns[column].to_numpy() for column in columns}
+    batch = {
+        "pipeline.predict (100k rows)": time_per_call(pipeline.predict, [columns]),
+        "compiled.predict (100k rows)": time_per_call(compiled.predict, [arrays]),
+        "table.predict (100k rows)": time_per_call(table.predict, [arrays]),
+    }
+
+    print("Batch latency")
+    for name, seconds in batch.items():
+        print(f"  {name:<40} {seconds * 1e3:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
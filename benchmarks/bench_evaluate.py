@@ -0,0 +1,77 @@
+"""
+Benchmark of the bootstrap behind ``src.evaluate``: one resample at a time
+(indexing copies of the labels and probabilities, then scikit-learn's
+metric functions) versus blocks of resamples as weight matrices
+(``resample_metrics``). Uses synthetic labels and probabilities, so no
+model is needed:
+
+    python -m benchmarks.bench_evaluate
+"""
+
+import time
+import numpy as np
+from sklearn.metrics import (
+    accuracy_score,
+    brier_score_loss,
+    f1_score,
+    precision_score,
+    recall_score,
+    roc_auc_score,
+)
+from src.evaluate import RESAMPLES_PER_BLOCK, resample_metrics
+
+ROWS = (1_000, 10_000)
+RESAMPLES = 200
+THRESHOLD = 0.5
+
+
+def per_resample(y_true, proba, resamples: int, rng) -> None:
+    """
+    Metrics of ``resamples`` resamples drawn and scored one at a time
+    """
+    rows = len(y_true)
+    for _ in range(resamples):
+        index = rng.integers(0, rows, rows)
+        y, p = y_true[index], proba[index]
+        predicted = p >= THRESHOLD
+        accuracy_score(y, predicted)
+        precision_score(y, predicted, zero_division=0)
+        recall_score(y, predicted, zero_division=0)
+        f1_score(y, predicted, zero_division=0)
+        roc_auc_score(y, p)
+        brier_score_loss(y, p)
+
+
+def weighted(y_true, proba, resamples: int, rng) -> None:
+    """
+    Metrics of ``resamples`` resamples drawn as multinomial weights, in
+    blocks of RESAMPLES_PER_BLOCK
+    """
+    rows = len(y_true)
+    uniform = np.full(rows, 1 / rows)
+    for start in range(0, resamples, RESAMPLES_PER_BLOCK):
+        size = min(RESAMPLES_PER_BLOCK, resamples - start)
+        weights = rng.multinomial(rows, uniform, size=size).astype(np.float64)
+        resample_metrics(weights, y_true, proba, THRESHOLD)
+
+
+def main():
+    """
+    Print the seconds per bootstrap of RESAMPLES resamples, both ways
+    """
+    rng = np.random.default_rng(0)
+    for rows in ROWS:
+        y_true = rng.integers(0, 2, rows).astype(np.float64)
+        proba = np.clip(0.6 * y_true + rng.normal(0.2, 0.25, rows), 0, 1)
+        print(f"{rows} rows, {RESAMPLES} resamples")
+        baseline = None
+        for name, func in (("per resample", per_resample), ("weighted", weighted)):
+            start = time.perf_counter()
+            func(y_true, proba, RESAMPLES, np.random.default_rng(1))
+            seconds = time.perf_counter() - start
+            baseline = baseline or seconds
+            print(f"  {name:<14} {seconds:>8.3f}s {baseline / seconds:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
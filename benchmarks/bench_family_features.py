@@ -0,0 +1,91 @@
+"""
+Benchmark of FamilyFeatures.transform: the previous DataFrame version
+(full input copy, new DataFrame out) versus the current NumPy version, on
+DataFrame and array input, at 1k, 100k and 10M rows
+
+    python -m benchmarks.bench_family_features
+"""
+
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from src.utils.transformer import FamilyFeatures
+
+SIZES = (1_000, 100_000, 10_000_000)
+
+
+def legacy_transform(X: pd.DataFrame, sibsp_col="SibSp", parch_col="Parch"):
+    """
+    FamilyFeatures.transform as it was before it worked on NumPy arrays
+    """
+    X_copy = X.copy()
+    family_size = X_copy[sibsp_col] + X_copy[parch_col] + 1
+    is_alone = (family_size == 1).astype(int)
+    return pd.DataFrame(
+        {"family_size": family_size, "isAlone": is_alone}, index=X_copy.index
+    )
+
+
+def best_of(func, repeat: int = 5) -> float:
+    """
+    Fastest of ``repeat`` timed calls, in seconds
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def peak_allocated(func) -> int:
+    """
+    Peak bytes allocated (as seen by tracemalloc) during one call
+    """
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    """
+    Print time and peak allocation per call of each variant and size
+    """
+    print(f"{'rows':>10} {'variant':<22} {'time':>10} {'peak alloc':>11}")
+
+    for n_rows in SIZES:
+        rng = np.random.default_rng(0)
+        frame = pd.DataFrame(
+            {
+                "SibSp": rng.integers(0, 9, n_rows),
+                "Parch": rng.integers(0, 7, n_rows),
+            }
+        )
+        array = frame.to_numpy()
+        on_frame = FamilyFeatures().fit(frame)
+        on_array = FamilyFeatures().fit(array)
+
+        expected = legacy_transform(frame).to_numpy()
+        if not np.array_equal(expected, on_array.transform(array)):
+            raise AssertionError("FamilyFeatures output differs from the legacy one")
+
+        variants = {
+            "legacy (DataFrame)": lambda: legacy_transform(frame),
+            "current (DataFrame)": lambda: on_frame.transform(frame),
+            "current (ndarray)": lambda: on_array.transform(array),
+        }
+        repeat = 3 if n_rows >= 10_000_000 else 20
+        for name, func in variants.items():
+            seconds = best_of(func, repeat)
+            peak = peak_allocated(func)
+            print(
+                f"{n_rows:>10} {name:<22} {seconds * 1e3:>8.2f}ms "
+                f"{peak / 2**20:>9.1f}MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
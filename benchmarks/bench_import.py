@@ -0,0 +1,100 @@
+"""
+Benchmark of API import (worker boot) time, proving that importing the
+API, training and evaluation modules reads neither the dataset nor the model
+
+Each measurement runs in a fresh interpreter, with the dataset and model
+paths pointing at files that do not exist:
+
+    python -m benchmarks.bench_import
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from benchmarks.synthetic import TITANIC_ROWS, make_passengers
+
+# imports app.main with pandas.read_csv and joblib.load instrumented
+IMPORT_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import joblib, pandas
+calls = []
+def spy(name, func):
+    def wrapper(*args, **kwargs):
+        calls.append(name)
+        return func(*args, **kwargs)
+    return wrapper
+pandas.read_csv = spy("pandas.read_csv", pandas.read_csv)
+joblib.load = spy("joblib.load", joblib.load)
+libraries = time.perf_counter()
+import app.main, src.train, src.evaluate
+done = time.perf_counter()
+print(json.dumps({
+    "library_seconds": libraries - start,
+    "app_seconds": done - libraries,
+    "calls": calls,
+}))
+"""
+
+# what an import-time load used to cost, for comparison
+LOAD_SNIPPET = """
+import json, sys, time
+from src.load import load_and_split_data
+start = time.perf_counter()
+load_and_split_data(sys.argv[1])
+print(json.dumps({"load_seconds": time.perf_counter() - start}))
+"""
+
+
+def run_snippet(snippet: str, env: dict, *args) -> dict:
+    """
+    Run ``snippet`` in a fresh interpreter and parse its JSON output
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", snippet, *args],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=Path(__file__).resolve().parent.parent,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(repeat: int = 3):
+    """
+    Print boot time of the API modules and the dataset load they avoid
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "PY_ENV": "development",
+            "LOCAL_DATASET_PATH": str(Path(tmp) / "missing.csv"),
+            "HF_DATASET_PATH": "hf://datasets/missing/missing.csv",
+            "MODEL_PATH": str(Path(tmp) / "missing.pkl"),
+        }
+
+        boots = [run_snippet(IMPORT_SNIPPET, env) for _ in range(repeat)]
+        best = min(boots, key=lambda boot: boot["app_seconds"])
+        print(f"sklearn/pandas import     {best['library_seconds'] * 1e3:>9.1f} ms")
+        print(f"app + train + evaluate    {best['app_seconds'] * 1e3:>9.1f} ms")
+        print(f"dataset/model reads       {best['calls'] or 'none'}")
+
+        for scale in (1, 100):
+            csv_path = Path(tmp) / f"titanic_{scale}x.csv"
+            make_passengers(TITANIC_ROWS * scale).to_csv(csv_path, index=False)
+            start = time.perf_counter()
+            load = run_snippet(LOAD_SNIPPET, env, str(csv_path))
+            wall = time.perf_counter() - start
+            print(
+                f"avoided dataset load {scale:>4}x {load['load_seconds'] * 1e3:>9.1f} ms"
+                f" ({wall * 1e3:.0f} ms with interpreter start)"
+            )
+
+
+if __name__ == "__main__":
+    main()
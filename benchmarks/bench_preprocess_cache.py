@@ -0,0 +1,63 @@
+"""
+Benchmark of the preprocessor cache: fitting the ColumnTransformer without
+a cache, on a cold cache (fit and write) and on a warm cache (hash the
+rows, load the fitted preprocessor and memory-map the matrix), at 1x, 100x
+and 1000x the Titanic row count
+
+    python -m benchmarks.bench_preprocess_cache
+"""
+
+import tempfile
+import time
+from benchmarks.synthetic import TITANIC_ROWS, make_passengers
+from src.config.features import DATASET_DTYPES, FEATURE_COLUMNS
+from src.preprocess_cache import PreprocessorCache
+from src.train import build_preprocessor
+
+SCALES = (1, 100, 1000)
+
+
+def timed(func) -> float:
+    """
+    Seconds taken by one call
+    """
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    """
+    Print preprocessing time per scale with and without the cache
+    """
+    print(
+        f"{'rows':>9} {'no cache':>10} {'cold cache':>11} "
+        f"{'warm cache':>11} {'speedup':>8}"
+    )
+
+    for scale in SCALES:
+        X = make_passengers(TITANIC_ROWS * scale)[FEATURE_COLUMNS]
+        X = X.astype({column: DATASET_DTYPES[column] for column in FEATURE_COLUMNS})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            uncached = PreprocessorCache("", 0)
+            cache = PreprocessorCache(tmp, 2**40)
+
+            plain = min(
+                timed(lambda: uncached.fit_transform(build_preprocessor(), X))
+                for _ in range(3)
+            )
+            cold = timed(lambda: cache.fit_transform(build_preprocessor(), X))
+            warm = min(
+                timed(lambda: cache.fit_transform(build_preprocessor(), X))
+                for _ in range(3)
+            )
+
+        print(
+            f"{len(X):>9} {plain * 1e3:>8.1f}ms {cold * 1e3:>9.1f}ms "
+            f"{warm * 1e3:>9.1f}ms {plain / warm:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark of the per-request overhead around scoring: request validation,
+assembling a batch into columns and response serialization, the previous
+way (SurvivorInput instance plus ``model_dump``, lists of Python values,
+``JSONResponse``) versus the current one (validation straight into a dict
+or tuple, preallocated NumPy columns, ``FastJSONResponse``)
+
+Batch assembly is timed together with the engine's vectorized call, which
+converts the columns it receives. Uses the trained model at MODEL_PATH:
+
+    python -m benchmarks.bench_request_overhead
+"""
+
+import json
+import timeit
+from fastapi.responses import JSONResponse
+from app.responses import FastJSONResponse
+from app.router.predictions.predictions import format_prediction, parse_record
+from app.schema.titanic_data import POSITIONAL_FIELDS, SurvivorInput
+from benchmarks.synthetic import make_requests
+from src.config.features import FEATURE_COLUMNS
+from src.predict import _columns, predict, registry
+
+BATCH_SIZES = (64, 10_000)
+
+# rows in the serialized batch response
+RESPONSE_ROWS = 1000
+
+
+def per_call(func, calls: int) -> float:
+    """
+    Best of five runs of ``calls`` calls, in seconds per call
+    """
+    return min(timeit.repeat(func, number=calls, repeat=5)) / calls
+
+
+def legacy_columns(chunk: list) -> dict:
+    """
+    Batch columns as they were assembled before: lists of Python values
+    """
+    return {column: [record[column] for record in chunk] for column in FEATURE_COLUMNS}
+
+
+def report(title: str, variants: dict, calls: int):
+    """
+    Print the time per call of each variant, relative to the first one
+    """
+    print(title)
+    baseline = None
+    for name, func in variants.items():
+        seconds = per_call(func, calls)
+        baseline = baseline or seconds
+        print(f"  {name:<34} {seconds * 1e6:>10.1f}us {baseline / seconds:>6.1f}x")
+
+
+def main():
+    """
+    Print the time per call of each step, previous versus current
+    """
+    engine = registry.get().engine
+    if engine is None:
+        raise SystemExit("Batch assembly needs the compiled or table engine")
+
+    record = make_requests(1)[0]
+    body = json.dumps(record).encode()
+    array_body = json.dumps([record[field] for field in POSITIONAL_FIELDS]).encode()
+    if parse_record(body) != SurvivorInput.model_validate_json(body).model_dump():
+        raise AssertionError("Validated record differs from the SurvivorInput one")
+    if parse_record(array_body) != parse_record(body):
+        raise AssertionError("Positional payload validates to another record")
+
+    report(
+        f"validation ({len(body)} byte object, {len(array_body)} byte array)",
+        {
+            "SurvivorInput + model_dump": lambda: SurvivorInput.model_validate_json(
+                body
+            ).model_dump(),
+            "record dict (object body)": lambda: parse_record(body),
+            "record dict (positional body)": lambda: parse_record(array_body),
+        },
+        calls=20_000,
+    )
+
+    for size in BATCH_SIZES:
+        records = make_requests(size)
+        rows = [tuple(r[field] for field in POSITIONAL_FIELDS) for r in records]
+        report(
+            f"batch assembly + vectorized scoring, {size} rows",
+            {
+                "lists of values": lambda: engine.predict_proba(
+                    legacy_columns(records)
+                ),
+                "NumPy columns (dicts)": lambda: engine.predict_proba(
+                    _columns(records, positional=False)
+                ),
+                "NumPy columns (positional rows)": lambda: engine.predict_proba(
+                    _columns(rows, positional=True)
+                ),
+            },
+            calls=max(1, 20_000 // size),
+        )
+
+    single = format_prediction(predict(record), include_probability=True)
+    batch = [single] * RESPONSE_ROWS
+    report(
+        "serialization, one prediction",
+        {
+            "JSONResponse": lambda: JSONResponse(single),
+            "FastJSONResponse": lambda: FastJSONResponse(single),
+        },
+        calls=20_000,
+    )
+    report(
+        f"serialization, {RESPONSE_ROWS} predictions",
+        {
+            "JSONResponse": lambda: JSONResponse(batch),
+            "FastJSONResponse": lambda: FastJSONResponse(batch),
+        },
+        calls=50,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Load test of /predict under concurrent requests at several micro-batching
+settings
+
+For every setting the API is started with uvicorn on localhost, warmed up
+and then sent ``--requests`` single predictions from ``--concurrency``
+concurrent clients. Reports throughput, p50/p99 latency and the mean batch
+size the server formed. ``--in-process`` drives the micro-batcher directly
+instead, without HTTP, to separate its effect from the server's per-request
+overhead. Uses the trained model at MODEL_PATH:
+
+    python -m benchmarks.bench_serving --requests 2000 --concurrency 64
+    python -m benchmarks.bench_serving --in-process --engine pipeline
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import httpx
+import numpy as np
+from benchmarks.synthetic import make_requests
+from src.batcher import MicroBatcher
+from src.predict import predict_coalesced, registry
+
+# (max batch size, max wait in ms); batch size 1 scores each request alone
+SETTINGS = ((1, 0), (8, 1), (32, 2), (64, 2), (64, 5))
+
+WARMUP_REQUESTS = 200
+
+
+def free_port() -> int:
+    """
+    A localhost TCP port nothing listens on
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, batch_size: int, wait_ms: float, engine: str):
+    """
+    Start uvicorn serving the API with the given micro-batching settings
+    """
+    env = {
+        **os.environ,
+        "PREDICT_MICRO_BATCH_SIZE": str(batch_size),
+        "PREDICT_MICRO_BATCH_WAIT_MS": str(wait_ms),
+        "INFERENCE_ENGINE": engine,
+        # measure the scoring path, not the cache
+        "PREDICTION_CACHE_SIZE": "0",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app"]
+        + ["--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+        # keep idle connections open across the phases of a run
+        + ["--timeout-keep-alive", "60"],
+        env=env,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, row: dict, timeout: float = 60):
+    """
+    Wait until the server answers /predict with a loaded model
+    """
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if (await client.post("/predict", json=row)).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("The API did not become ready, is a model trained?")
+
+
+async def run_load(send, rows: list, concurrency: int):
+    """
+    Await ``send(row)`` for every row from ``concurrency`` concurrent
+    clients; returns (latencies in seconds, wall seconds)
+    """
+    latencies = []
+    pending = iter(rows)
+
+    async def user():
+        for row in pending:
+            start = time.perf_counter()
+            await send(row)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+
+async def measure(args, batch_size: int, wait_ms: float) -> dict:
+    """
+    Load-test one micro-batching setting on a fresh server
+    """
+    port = free_port()
+    server = start_server(port, batch_size, wait_ms, args.engine)
+    rows = make_requests(args.requests)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60
+        ) as client:
+
+            async def send(row):
+                (await client.post("/predict", json=row)).raise_for_status()
+
+            await wait_ready(client, rows[0])
+            await run_load(send, rows[:WARMUP_REQUESTS], args.concurrency)
+            before = (await client.get("/predict/batcher")).json()
+            latencies, seconds = await run_load(send, rows, args.concurrency)
+            after = (await client.get("/predict/batcher")).json()
+    finally:
+        server.terminate()
+        server.wait()
+
+    return summarize(latencies, seconds, before, after)
+
+
+async def measure_in_process(args, batch_size: int, wait_ms: float) -> dict:
+    """
+    Load-test one micro-batching setting on the batcher alone
+    """
+    registry.engine = args.engine
+    registry.get()
+    rows = make_requests(args.requests)
+    batcher = MicroBatcher(predict_coalesced, batch_size, wait_ms)
+    try:
+        await run_load(batcher.submit, rows[:WARMUP_REQUESTS], args.concurrency)
+        before = batcher.stats()
+        latencies, seconds = await run_load(batcher.submit, rows, args.concurrency)
+        after = batcher.stats()
+    finally:
+        await batcher.close()
+
+    return summarize(latencies, seconds, before, after)
+
+
+def summarize(latencies: list, seconds: float, before: dict, after: dict) -> dict:
+    """
+    Throughput, latency percentiles and the mean batch size of one run,
+    from the batcher counters before and after it
+    """
+    batches = after["batches"] - before["batches"]
+    return {
+        "requests_per_second": len(latencies) / seconds,
+        "p50_ms": float(np.percentile(latencies, 50)) * 1e3,
+        "p99_ms": float(np.percentile(latencies, 99)) * 1e3,
+        "mean_batch_size": (after["items"] - before["items"]) / batches,
+    }
+
+
+def main():
+    """
+    Print throughput and latency percentiles per micro-batching setting
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument(
+        "--engine", default="compiled", choices=("compiled", "table", "pipeline")
+    )
+    parser.add_argument(
+        "--in-process", action="store_true", help="skip HTTP, drive the batcher"
+    )
+    args = parser.parse_args()
+    run = measure_in_process if args.in_process else measure
+
+    print(
+        f"{args.requests} requests, {args.concurrency} concurrent, "
+        f"{args.engine} engine, {'in process' if args.in_process else 'HTTP'}"
+    )
+    print(
+        f"{'batch':>6} {'wait':>7} {'req/s':>8} {'p50':>9} {'p99':>9} "
+        f"{'mean batch':>11}"
+    )
+    for batch_size, wait_ms in SETTINGS:
+        result = asyncio.run(run(args, batch_size, wait_ms))
+        print(
+            f"{batch_size:>6} {wait_ms:>5}ms {result['requests_per_second']:>8.0f} "
+            f"{result['p50_ms']:>7.1f}ms {result['p99_ms']:>7.1f}ms "
+            f"{result['mean_batch_size']:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
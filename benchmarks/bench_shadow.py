@@ -0,0 +1,81 @@
+"""
+Benchmark of what shadow scoring costs the request path: the time per
+``predict`` call and per 64-row ``predict_batch`` call with no candidate,
+and with a candidate shadow scoring 10% and 100% of the calls
+
+The candidate is the model at MODEL_PATH itself, published to a temporary
+store, so both versions score at the same speed. The candidate scores on
+a background thread, which still competes with the request thread for
+the GIL, and so for CPU time:
+
+    python -m benchmarks.bench_shadow
+"""
+
+import tempfile
+import time
+import timeit
+from pathlib import Path
+from benchmarks.synthetic import make_requests
+from src.model_store import Routing
+from src.predict import predict, predict_batch, registry, shadow, store
+
+FRACTIONS = (0.0, 0.1, 1.0)
+
+BATCH_ROWS = 64
+
+
+def per_call(func, calls: int) -> float:
+    """
+    Best of five runs of ``calls`` calls, in seconds per call
+    """
+    return min(timeit.repeat(func, number=calls, repeat=5)) / calls
+
+
+def drain():
+    """
+    Wait until the shadow thread has scored every sample handed over
+    """
+    while shadow.stats()["pending_rows"]:
+        time.sleep(0.01)
+
+
+def main():
+    """
+    Print the time per call with each shadow fraction, relative to none
+    """
+    records = make_requests(BATCH_ROWS)
+    registry.get()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store.directory = Path(directory)
+        candidate = store.publish(registry.path)
+        store.get(candidate)
+
+        baseline = {}
+        for fraction in FRACTIONS:
+            store.routing = Routing(candidate=candidate, shadow_fraction=fraction)
+            timings = {
+                "predict": per_call(lambda: predict(records[0]), 5000),
+                f"predict_batch({BATCH_ROWS})": per_call(
+                    lambda: predict_batch(records), 500
+                ),
+            }
+            drain()
+            print(f"shadow fraction {fraction:.0%}")
+            for name, seconds in timings.items():
+                baseline.setdefault(name, seconds)
+                print(
+                    f"  {name:<20} {seconds * 1e6:>9.1f}us "
+                    f"{seconds / baseline[name]:>6.2f}x"
+                )
+
+        stats = shadow.stats()["versions"].get(candidate, {})
+        print(
+            f"agreement {stats.get('agreement')}, "
+            f"dropped rows {stats.get('dropped_rows', 0)}"
+        )
+        shadow.close()
+
+
+if __name__ == "__main__":
+    main()
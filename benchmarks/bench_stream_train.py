@@ -0,0 +1,90 @@
+"""
+Benchmark of streaming (out-of-core) training versus in-memory training:
+rows/sec and peak RSS at growing dataset sizes
+
+Every run happens in a fresh interpreter so its peak RSS is its own
+(Linux only, read from /proc):
+
+    python -m benchmarks.bench_stream_train
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from benchmarks.synthetic import TITANIC_ROWS, make_passengers
+
+SCALES = (10, 100, 1000)
+CHUNK_SIZE = 50_000
+
+TRAIN_SNIPPET = """
+import json, sys, time
+mode, dataset, model, chunk_size = sys.argv[1:]
+start = time.perf_counter()
+if mode == "streaming":
+    from src.stream_train import train_streaming
+    result = train_streaming(dataset, model, chunk_size=int(chunk_size), epochs=1)
+else:
+    from src.train import train
+    result = train(dataset, model)
+seconds = time.perf_counter() - start
+if not result["success"]:
+    raise SystemExit(result["error"])
+# VmHWM, unlike ru_maxrss, is not inherited from the parent across exec
+with open("/proc/self/status") as status:
+    peak_kb = next(int(l.split()[1]) for l in status if l.startswith("VmHWM"))
+print(json.dumps({
+    "seconds": seconds,
+    "peak_rss_mb": peak_kb / 1024,
+}))
+"""
+
+
+def run(mode: str, dataset: Path, model: Path, env: dict) -> dict:
+    """
+    Train once in a fresh interpreter and return its timing and peak RSS
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", TRAIN_SNIPPET, mode, dataset, model, str(CHUNK_SIZE)],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=Path(__file__).resolve().parent.parent,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    """
+    Print rows/sec and peak RSS of both training modes per scale
+    """
+    print(f"{'rows':>9} {'mode':>10} {'seconds':>8} {'rows/sec':>10} {'peak RSS':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "PY_ENV": "development",
+            "LOCAL_DATASET_PATH": str(Path(tmp) / "unused.csv"),
+            "HF_DATASET_PATH": "hf://datasets/unused/unused.csv",
+            "MODEL_PATH": str(Path(tmp) / "unused.pkl"),
+            "DATASET_CACHE_DIR": "",
+        }
+
+        for scale in SCALES:
+            rows = TITANIC_ROWS * scale
+            dataset = Path(tmp) / f"titanic_{scale}x.csv"
+            make_passengers(rows).to_csv(dataset, index=False)
+
+            for mode in ("full", "streaming"):
+                result = run(mode, dataset, Path(tmp) / f"{mode}.pkl", env)
+                print(
+                    f"{rows:>9} {mode:>10} {result['seconds']:>8.2f} "
+                    f"{rows / result['seconds']:>10.0f} {result['peak_rss_mb']:>8.0f}MB"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Benchmark suite: dataset loading, training, single and batch prediction
+and in-process API calls, on synthetic data at several scales
+
+Every case is timed ``--repeat`` times and its median (and fastest) time
+is written to a JSON file, together with the commit and library versions.
+``--baseline`` compares the run against an earlier results file and exits
+with status 1 when any case got slower by more than ``--threshold``:
+
+    python -m benchmarks.suite --output main.json
+    python -m benchmarks.suite --output branch.json --baseline main.json
+
+Runs offline: the dataset is generated, the model is trained into a
+temporary directory and the API is called through the FastAPI test
+client. The dataset and preprocessor caches are turned off so that every
+repeat does the full work.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from benchmarks.synthetic import TITANIC_ROWS, make_passengers, make_requests
+
+SCALES = (1, 10, 100)
+
+# rows sent one by one in the single-prediction cases
+SINGLE_REQUESTS = 1000
+API_REQUESTS = 300
+API_BATCH_RECORDS = 1000
+
+# relative slowdown of a case's median time reported as a regression
+DEFAULT_THRESHOLD = 0.2
+
+
+def time_runs(func, repeat: int) -> list:
+    """
+    Seconds taken by each of ``repeat`` calls of ``func``
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def record(timings: list, rows: int, calls: int = 1) -> dict:
+    """
+    Result entry of one case; times are per call when a run makes
+    ``calls`` calls
+    """
+    per_call = [seconds / calls for seconds in timings]
+    return {
+        "seconds": statistics.median(per_call),
+        "min_seconds": min(per_call),
+        "repeat": len(timings),
+        "rows": rows,
+        "calls_per_run": calls,
+    }
+
+
+def run_suite(workdir: Path, scales, repeat: int) -> dict:
+    """
+    Run every case and return ``{case name: result entry}``
+    """
+    # imported after main() has pointed the settings at the work directory
+    # pylint: disable=import-outside-toplevel
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from src.load import load_and_split_data
+    from src.predict import predict, predict_batch, registry
+    from src.train import train
+
+    results = {}
+    datasets = {}
+    for scale in scales:
+        rows = TITANIC_ROWS * scale
+        datasets[scale] = workdir / f"titanic_{scale}x.csv"
+        make_passengers(rows).to_csv(datasets[scale], index=False)
+
+        results[f"load@{scale}x"] = record(
+            time_runs(lambda: load_and_split_data(datasets[scale], ""), repeat), rows
+        )
+        # each scale trains into its own file so the served model stays at 1x
+        model_path = workdir / f"model_{scale}x.pkl"
+        results[f"train@{scale}x"] = record(
+            time_runs(lambda: _check(train(datasets[scale], model_path)), repeat),
+            rows,
+        )
+
+    # the served model, trained on the smallest scale
+    _check(train(datasets[min(scales)], registry.path))
+    registry.get()
+
+    single = make_requests(SINGLE_REQUESTS)
+    results["predict_single"] = record(
+        time_runs(lambda: [predict(row) for row in single], repeat),
+        rows=1,
+        calls=len(single),
+    )
+    for scale in scales:
+        records = make_requests(TITANIC_ROWS * scale)
+        results[f"predict_batch@{scale}x"] = record(
+            time_runs(lambda: predict_batch(records), repeat), len(records)
+        )
+
+    client = TestClient(app)
+    requests = make_requests(API_REQUESTS)
+
+    def call_predict():
+        for row in requests:
+            client.post("/predict", json=row).raise_for_status()
+
+    results["api_predict"] = record(
+        time_runs(call_predict, repeat), rows=1, calls=len(requests)
+    )
+
+    batch = make_requests(API_BATCH_RECORDS)
+    results["api_predict_batch"] = record(
+        time_runs(
+            lambda: client.post("/predict/batch", json=batch).raise_for_status(),
+            repeat,
+        ),
+        len(batch),
+    )
+    return results
+
+
+def environment() -> dict:
+    """
+    Commit and library versions the results were measured with
+    """
+    # pylint: disable=import-outside-toplevel
+    import numpy
+    import pandas
+    import sklearn
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Print each case's change against the baseline and return the names
+    of the cases slower by more than ``threshold``
+    """
+    regressions = []
+    print(f"\n{'case':<24} {'baseline':>11} {'current':>11} {'change':>8}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<24} {'-':>11} {_ms(result['seconds']):>11} {'new':>8}")
+            continue
+        change = result["seconds"] / before["seconds"] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(
+            f"{name:<24} {_ms(before['seconds']):>11} {_ms(result['seconds']):>11} "
+            f"{change:>+7.1%}{flag}"
+        )
+    return regressions
+
+
+def _check(result: dict) -> dict:
+    """
+    Fail the suite on a training error instead of timing it
+    """
+    if not result["success"]:
+        raise RuntimeError(f"Training failed: {result['error']}")
+    return result
+
+
+def _ms(seconds: float) -> str:
+    """
+    Seconds formatted as milliseconds
+    """
+    return f"{seconds * 1e3:.3f}ms"
+
+
+def main():
+    """
+    Run the suite, write the results and compare them with a baseline
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="earlier results file to compare with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--scales", type=int, nargs="+", default=list(SCALES))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        # settings are read at import time, so they are set before any import
+        os.environ.update(
+            {
+                "MODEL_PATH": str(workdir / "titanic_pipeline.pkl"),
+                "DATASET_CACHE_DIR": "",
+                "PREPROCESS_CACHE_DIR": "",
+                "LOG_LEVEL": "WARNING",
+            }
+        )
+        results = run_suite(workdir, args.scales, args.repeat)
+
+    print(f"{'case':<24} {'median':>11} {'fastest':>11}")
+    for name, result in results.items():
+        print(
+            f"{name:<24} {_ms(result['seconds']):>11} {_ms(result['min_seconds']):>11}"
+        )
+
+    Path(args.output).write_text(
+        json.dumps({"environment": environment(), "results": results}, indent=2),
+        encoding="utf-8",
+    )
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(
+                f"\n{len(regressions)} case(s) slower by more than "
+                f"{args.threshold:.0%}: {', '.join(regressions)}"
+            )
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Synthetic Titanic-shaped data for the benchmarks
+
+The generated frames have the columns, dtypes, category sets and rough
+missing-value rates of the real dataset, so every benchmark can run offline
+at any scale without the original CSV.
+"""
+
+import numpy as np
+import pandas as pd
+
+# row count of the original Titanic training CSV
+TITANIC_ROWS = 891
+
+
+def make_passengers(n_rows: int = TITANIC_ROWS, seed: int = 42) -> pd.DataFrame:
+    """
+    Build a raw-dataset-shaped frame (all CSV columns, including the
+    Survived label) of ``n_rows`` synthetic passengers
+    """
+    rng = np.random.default_rng(seed)
+
+    sex = rng.choice(["male", "female"], n_rows, p=[0.65, 0.35])
+    pclass = rng.choice([1, 2, 3], n_rows, p=[0.24, 0.21, 0.55])
+    age = np.round(rng.normal(29.7, 14.5, n_rows).clip(0.42, 80.0), 1)
+    age[rng.random(n_rows) < 0.2] = np.nan
+    sibsp = rng.choice(
+        [0, 1, 2, 3, 4, 5, 8], n_rows, p=[0.68, 0.23, 0.03, 0.02, 0.02, 0.01, 0.01]
+    )
+    parch = rng.choice(
+        [0, 1, 2, 3, 4, 5, 6], n_rows, p=[0.76, 0.13, 0.09, 0.005, 0.005, 0.005, 0.005]
+    )
+    fare = np.round(rng.gamma(1.5, 20.0, n_rows) * (4 - pclass), 4)
+    embarked = rng.choice(["S", "C", "Q"], n_rows, p=[0.72, 0.19, 0.09])
+    embarked = embarked.astype(object)
+    embarked[rng.random(n_rows) < 0.003] = np.nan
+
+    logit = (
+        -0.5
+        + 2.5 * (sex == "female")
+        - 0.9 * (pclass - 2)
+        - 0.03 * (np.nan_to_num(age, nan=29.7) - 29.7)
+        - 0.2 * (sibsp + parch > 3)
+    )
+    survived = (rng.random(n_rows) < 1.0 / (1.0 + np.exp(-logit))).astype(int)
+
+    return pd.DataFrame(
+        {
+            "PassengerId": np.arange(1, n_rows + 1),
+            "Survived": survived,
+            "Pclass": pclass,
+            "Name": "Passenger",
+            "Sex": sex,
+            "Age": age,
+            "SibSp": sibsp,
+            "Parch": parch,
+            "Ticket": "TICKET",
+            "Fare": fare,
+            "Cabin": np.nan,
+            "Embarked": embarked,
+        }
+    )
+
+
+def make_requests(n_rows: int, seed: int = 7) -> list:
+    """
+    Build ``n_rows`` valid /predict request bodies (SurvivorInput shaped
+    dicts, no missing values)
+    """
+    df = make_passengers(n_rows, seed=seed)
+    df["Age"] = df["Age"].fillna(28).round().astype(int)
+    df["Embarked"] = df["Embarked"].fillna("S")
+    columns = ["Age", "Fare", "Sex", "Pclass", "Embarked", "SibSp", "Parch"]
+    return df[columns].to_dict("records")
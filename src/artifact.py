@@ -0,0 +1,130 @@
+"""
+Module for writing model artifacts safely
+
+Serving workers poll and reload MODEL_PATH while training may be writing
+it, so artifacts are never written in place: they go to a temporary file in
+the same directory which is then renamed over the target. The rename is
+atomic, so readers only ever see the old or the new complete file.
+
+Metadata about a model (e.g. its tuned decision threshold) lives in a JSON
+sidecar next to the artifact. The sidecar records the SHA-256 of the
+artifact it describes and is written before the artifact is renamed into
+place, so a reader never pairs a model with another model's metadata.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import uuid
+from pathlib import Path
+import joblib
+
+logger = logging.getLogger(__name__)
+
+
+def atomic_write(path: Path, write):
+    """
+    Call ``write(tmp_path)`` to produce the file, then atomically move the
+    result to ``path``. The temporary file is removed if writing fails.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # created by the writer itself so the file gets the usual permissions
+    tmp_name = str(path.parent / f".{path.name}.{uuid.uuid4().hex}.tmp")
+
+    try:
+        write(tmp_name)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+
+
+def file_sha256(path) -> str:
+    """
+    Hex digest of a file's content, read in blocks
+    """
+    with open(path, "rb") as f:
+        return stream_sha256(f)
+
+
+def stream_sha256(f) -> str:
+    """
+    Hex digest of the rest of an open binary file, read in blocks
+    """
+    digest = hashlib.sha256()
+    for block in iter(lambda: f.read(1 << 20), b""):
+        digest.update(block)
+    return digest.hexdigest()
+
+
+def metadata_path(path: Path) -> Path:
+    """
+    Location of the metadata sidecar of an artifact
+    """
+    path = Path(path)
+    return path.with_name(f"{path.stem}.meta.json")
+
+
+def save_pipeline(pipeline, path: Path, metadata=None):
+    """
+    Atomically dump a fitted pipeline with joblib, together with its
+    ``metadata`` (a JSON-serialisable dict) when given
+    """
+
+    def write(tmp_path):
+        joblib.dump(pipeline, tmp_path)
+        if metadata is not None:
+            # bound to this exact artifact, and in place before it is
+            sidecar = {**metadata, "sha256": file_sha256(tmp_path)}
+            atomic_write(
+                metadata_path(path),
+                lambda tmp_meta: Path(tmp_meta).write_text(
+                    json.dumps(sidecar, indent=2), encoding="utf-8"
+                ),
+            )
+
+    atomic_write(path, write)
+
+
+def load_metadata(path: Path, sha256: str) -> dict:
+    """
+    Metadata saved with the artifact whose content hash is ``sha256``, or
+    an empty dict when there is none (or it belongs to another artifact)
+    """
+    try:
+        sidecar = json.loads(metadata_path(path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable model metadata for %s: %s", path, e)
+        return {}
+
+    if sidecar.pop("sha256", None) != sha256:
+        return {}
+    return sidecar
+
+
+def verify_sha256(path: Path, sha256: str):
+    """
+    Raise ValueError if the metadata sidecar of the artifact at ``path``
+    records a content hash other than ``sha256``. Artifacts without a
+    (readable) sidecar pass, since there is nothing to check them against.
+
+    While an artifact is being saved, its new sidecar is in place before
+    the artifact is, so a load in that window fails and the next one
+    succeeds.
+    """
+    try:
+        sidecar = json.loads(metadata_path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return
+    recorded = sidecar.get("sha256")
+    if recorded is not None and recorded != sha256:
+        raise ValueError(
+            f"Checksum mismatch: {path} is {sha256[:12]}, its metadata "
+            f"describes {recorded[:12]}"
+        )
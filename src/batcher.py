@@ -0,0 +1,198 @@
+"""
+Micro-batching of concurrent single-row predictions
+
+A ``MicroBatcher`` lets async request handlers await single predictions
+while the scoring itself happens in batches. Submitted items wait in a
+queue until a batch is full or the oldest item has waited ``max_wait_ms``.
+The batch is then scored in one call on a dedicated thread pool, and each
+caller's future is resolved with its own result. When scoring a batch
+fails, its items are scored again one at a time, so that one bad item
+fails only its own caller. While every scoring thread is busy, the queue
+keeps filling, so batches grow with the load.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent ``submit`` calls into batches for ``score_batch``.
+
+    Parameters
+    ----------
+    score_batch : callable
+        Scores a list of items and returns one result per item, in order.
+        Runs on the batcher's own threads, never on the event loop.
+    max_batch_size : int
+        Largest batch passed to ``score_batch``. 1 scores every item on
+        its own, without waiting.
+    max_wait_ms : float
+        Longest time the first item of a batch waits for more items.
+    max_workers : int
+        Threads scoring batches concurrently; also the number of batches
+        in flight.
+    """
+
+    def __init__(
+        self,
+        score_batch,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+        max_workers: int = 1,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be a positive integer")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must not be negative")
+        if max_workers < 1:
+            raise ValueError("max_workers must be a positive integer")
+
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_workers = max_workers
+        self.batches = 0
+        self.items = 0
+
+        self._executor = None
+        self._loop = None
+        self._queue = None
+        self._slots = None
+        self._collector = None
+        # running batch tasks, referenced so they are not garbage collected
+        self._scoring = set()
+
+    async def submit(self, item):
+        """
+        Queue one item and wait for its result
+        """
+        self._start()
+        future = self._loop.create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    def stats(self) -> dict:
+        """
+        Settings and counters: batches scored, items scored, mean batch size
+        """
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_workers": self.max_workers,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else None,
+        }
+
+    async def close(self):
+        """
+        Stop collecting batches and release the scoring threads
+        """
+        if self._collector is not None:
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+            self._collector = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._loop = None
+
+    def _start(self):
+        """
+        Start the collector on the running event loop, once per loop
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+
+        # a new event loop (e.g. a restarted app): queue and task are per loop
+        if self._collector is not None:
+            self._collector.cancel()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="predict"
+            )
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._collector = loop.create_task(self._collect())
+
+    async def _collect(self):
+        """
+        Form batches from the queue and hand each to a free scoring thread
+        """
+        while True:
+            # waiting for a free thread first lets the queue fill meanwhile
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            task = self._loop.create_task(self._score(batch))
+            self._scoring.add(task)
+            task.add_done_callback(self._scoring.discard)
+
+    async def _score(self, batch: list):
+        """
+        Score one batch off the event loop and resolve its futures
+        """
+        try:
+            # callers that went away (e.g. a dropped connection) are skipped
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                return
+            items = [item for item, _ in batch]
+            try:
+                results = await self._loop.run_in_executor(
+                    self._executor, self.score_batch, items
+                )
+                outcomes = [(result, None) for result in results]
+            except Exception as e:  # pylint: disable=broad-except
+                if len(items) == 1:
+                    outcomes = [(None, e)]
+                else:
+                    outcomes = await self._loop.run_in_executor(
+                        self._executor, self._score_each, items
+                    )
+
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), (result, error) in zip(batch, outcomes):
+                if future.done():
+                    continue
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+        finally:
+            self._slots.release()
+
+    def _score_each(self, items: list) -> list:
+        """
+        Score the items of a failed batch one at a time: a (result, error)
+        pair per item, so that only the items that fail on their own fail
+        """
+        outcomes = []
+        for item in items:
+            try:
+                outcomes.append((self.score_batch([item])[0], None))
+            except Exception as e:  # pylint: disable=broad-except
+                outcomes.append((None, e))
+        return outcomes
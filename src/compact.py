@@ -0,0 +1,105 @@
+"""
+Compact model artifact: the compiled weight vector behind a small header
+
+The joblib pickle holds the whole sklearn object graph, so loading it
+imports sklearn and rebuilds every estimator. Serving the compiled engine
+only needs its flat weight vector and JSON layout (see ``src/engine.py``),
+so training also exports those to ``<model>.compact``:
+
+    8 bytes    magic, ``TTNCMPCT``
+    4 bytes    header length, little-endian uint32
+    header     UTF-8 JSON: format version, layout, dtype, count, metadata
+    padding    zeros up to a 64-byte boundary
+    weights    ``count`` little-endian float64 values
+
+Reading it needs NumPy only. The weights are memory-mapped read-only, so
+every worker process on a host shares the same pages.
+"""
+
+import json
+import struct
+from pathlib import Path
+import numpy as np
+from src.artifact import atomic_write
+from src.engine import CompiledModel
+
+MAGIC = b"TTNCMPCT"
+
+# bump when the layout of the file or of the weight vector changes
+FORMAT_VERSION = 1
+
+# the weights start on a cache-line (and page-offset friendly) boundary
+ALIGNMENT = 64
+
+_LENGTH = struct.Struct("<I")
+
+
+def compact_path(path: Path) -> Path:
+    """
+    Location of the compact export of a pickled artifact
+    """
+    return Path(path).with_suffix(".compact")
+
+
+def write_compact(path: Path, compiled: CompiledModel, metadata=None):
+    """
+    Atomically write a compiled model, with ``metadata`` (a
+    JSON-serialisable dict) stored in its header
+    """
+    weights = np.ascontiguousarray(compiled.weights, dtype="<f8")
+    header = json.dumps(
+        {
+            "format_version": FORMAT_VERSION,
+            "layout": compiled.layout,
+            "dtype": "<f8",
+            "count": len(weights),
+            "metadata": metadata or {},
+        }
+    ).encode("utf-8")
+    padding = _weights_offset(len(header)) - len(MAGIC) - _LENGTH.size - len(header)
+
+    def write(tmp_path):
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(_LENGTH.pack(len(header)))
+            f.write(header)
+            f.write(b"\0" * padding)
+            f.write(weights.tobytes())
+
+    atomic_write(path, write)
+
+
+def read_compact(path: Path):
+    """
+    Load a compact artifact: (CompiledModel over the memory-mapped
+    weights, metadata). Raises ValueError for a file of another format or
+    version.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a compact model artifact")
+        (length,) = _LENGTH.unpack(f.read(_LENGTH.size))
+        header = json.loads(f.read(length).decode("utf-8"))
+
+    if header.get("format_version") != FORMAT_VERSION:
+        raise ValueError(
+            f"{path} has compact format version {header.get('format_version')}, "
+            f"expected {FORMAT_VERSION}"
+        )
+
+    weights = np.memmap(
+        path,
+        dtype=np.dtype(header["dtype"]),
+        mode="r",
+        offset=_weights_offset(length),
+        shape=(header["count"],),
+    )
+    return CompiledModel(weights, header["layout"]), header["metadata"]
+
+
+def _weights_offset(header_length: int) -> int:
+    """
+    File offset of the weights after a header of ``header_length`` bytes
+    """
+    end = len(MAGIC) + _LENGTH.size + header_length
+    return -(-end // ALIGNMENT) * ALIGNMENT
@@ -0,0 +1,35 @@
+"""
+Feature layout shared by the loading, training and prediction modules
+"""
+
+# input columns the pipeline is trained on, in the order they are read
+FEATURE_COLUMNS = ["Age", "Fare", "Sex", "Pclass", "Embarked", "SibSp", "Parch"]
+
+# the label column in the raw dataset
+TARGET_COLUMN = "Survived"
+
+# dtypes used when parsing the raw dataset, the strings as compact categoricals
+DATASET_DTYPES = {
+    "Age": "float64",
+    "Fare": "float64",
+    "Sex": "category",
+    "Pclass": "int64",
+    "Embarked": "category",
+    "SibSp": "int64",
+    "Parch": "int64",
+    "Survived": "int64",
+}
+
+# dtypes of the columns a prediction batch is assembled into
+PREDICTION_DTYPES = {
+    "Age": "float64",
+    "Fare": "float64",
+    "Sex": "object",
+    "Pclass": "int64",
+    "Embarked": "object",
+    "SibSp": "int64",
+    "Parch": "int64",
+}
+
+# numeric columns with a small closed domain, tabulated by the table engine
+ENUMERATED_DOMAINS = {"Pclass": (1, 2, 3)}
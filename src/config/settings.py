@@ -30,3 +30,94 @@ else:
     DATASET_PATH = Path(str(LOCAL_DATASET_PATH_FROM_ENV))
 
 MODEL_PATH = Path(str(MODEL_PATH_FROM_ENV))
+
+# directory of the columnar dataset cache, an empty value disables caching
+DATASET_CACHE_DIR = os.getenv("DATASET_CACHE_DIR", ".cache/datasets")
+
+# directory of the fitted-preprocessor cache, an empty value disables caching,
+# and its size limit in megabytes (least recently used entries are evicted)
+PREPROCESS_CACHE_DIR = os.getenv("PREPROCESS_CACHE_DIR", ".cache/preprocessed")
+PREPROCESS_CACHE_MAX_MB = float(os.getenv("PREPROCESS_CACHE_MAX_MB") or "1024")
+
+# number of records scored per vectorized call in batch prediction
+PREDICT_BATCH_CHUNK_SIZE = int(os.getenv("PREDICT_BATCH_CHUNK_SIZE") or "10000")
+
+# "pickle" serves the joblib artifact at MODEL_PATH, "compact" its compiled
+# export next to it (memory-mapped, without importing sklearn) when present
+MODEL_FORMAT = os.getenv("MODEL_FORMAT") or "pickle"
+
+if MODEL_FORMAT not in ("pickle", "compact"):
+    raise ValueError(f"Unknown MODEL_FORMAT '{MODEL_FORMAT}'")
+
+# level of the service's logs, and the share of predictions logged (at DEBUG)
+LOG_LEVEL = (os.getenv("LOG_LEVEL") or "INFO").upper()
+PREDICTION_LOG_SAMPLE_RATE = float(os.getenv("PREDICTION_LOG_SAMPLE_RATE") or "0.01")
+
+# micro-batching of /predict: concurrent requests are scored together in
+# batches of up to PREDICT_MICRO_BATCH_SIZE rows, the first request waiting at
+# most PREDICT_MICRO_BATCH_WAIT_MS for the batch to fill (a size of 1 scores
+# every request on its own), on PREDICT_EXECUTOR_WORKERS dedicated threads
+PREDICT_MICRO_BATCH_SIZE = int(os.getenv("PREDICT_MICRO_BATCH_SIZE") or "64")
+PREDICT_MICRO_BATCH_WAIT_MS = float(os.getenv("PREDICT_MICRO_BATCH_WAIT_MS") or "2")
+PREDICT_EXECUTOR_WORKERS = int(os.getenv("PREDICT_EXECUTOR_WORKERS") or "1")
+
+# "compiled" scores with the NumPy engine from src/engine.py, "table" with its
+# precomputed lookup tables, "pipeline" with sklearn
+INFERENCE_ENGINE = os.getenv("INFERENCE_ENGINE") or "compiled"
+
+if INFERENCE_ENGINE not in ("compiled", "table", "pipeline"):
+    raise ValueError(f"Unknown INFERENCE_ENGINE '{INFERENCE_ENGINE}'")
+
+# metric the decision threshold is tuned for at training time:
+# "accuracy", "balanced_accuracy" or "f1"
+DECISION_THRESHOLD_METRIC = os.getenv("DECISION_THRESHOLD_METRIC") or "accuracy"
+
+if DECISION_THRESHOLD_METRIC not in ("accuracy", "balanced_accuracy", "f1"):
+    raise ValueError(
+        f"Unknown DECISION_THRESHOLD_METRIC '{DECISION_THRESHOLD_METRIC}'"
+    )
+
+# seconds between checks of MODEL_PATH for a retrained artifact, 0 disables reloading
+MODEL_RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL") or "5")
+
+# rows of the synthetic batch every loaded model scores before it is served,
+# 0 disables the warm-up
+WARMUP_ROWS = int(os.getenv("WARMUP_ROWS") or "64")
+
+# versioned model store every trained model is published to; the version
+# /predict routes to ("" for the artifact at MODEL_PATH), the candidate version
+# shadow scoring a fraction of the calls ("" for none) and that fraction, until
+# the routing is changed through /models/routing; versions kept loaded besides
+# these two, and rows queued for shadow scoring before samples are dropped
+MODEL_STORE_DIR = os.getenv("MODEL_STORE_DIR") or "models/versions"
+PRIMARY_MODEL_VERSION = os.getenv("PRIMARY_MODEL_VERSION", "")
+CANDIDATE_MODEL_VERSION = os.getenv("CANDIDATE_MODEL_VERSION", "")
+SHADOW_FRACTION = float(os.getenv("SHADOW_FRACTION") or "0.1")
+MAX_LOADED_MODELS = int(os.getenv("MAX_LOADED_MODELS") or "3")
+SHADOW_MAX_PENDING_ROWS = int(os.getenv("SHADOW_MAX_PENDING_ROWS") or "10000")
+
+# drift monitoring of the served inputs and predictions against the model's
+# training reference: seconds per monitoring window (0 disables monitoring),
+# PSI from which a feature counts as drifted, and rows a window needs first
+DRIFT_WINDOW_SECONDS = float(os.getenv("DRIFT_WINDOW_SECONDS") or "300")
+DRIFT_PSI_THRESHOLD = float(os.getenv("DRIFT_PSI_THRESHOLD") or "0.2")
+DRIFT_MIN_ROWS = int(os.getenv("DRIFT_MIN_ROWS") or "100")
+
+# prediction cache in front of the sklearn pipeline path: entries (0 disables),
+# lifetime in seconds (0 never expires) and, to share one cache between all
+# workers on the host, a shared memory segment name
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE") or "10000")
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL") or "0")
+PREDICTION_CACHE_SHARED_NAME = os.getenv("PREDICTION_CACHE_SHARED_NAME", "")
+
+# training jobs allowed to run at once, each in its own process
+TRAIN_MAX_JOBS = int(os.getenv("TRAIN_MAX_JOBS") or "1")
+
+# rows per chunk read by the streaming (out-of-core) trainer
+TRAIN_CHUNK_SIZE = int(os.getenv("TRAIN_CHUNK_SIZE") or "100000")
+
+# CSV of newly labeled rows consumed by incremental updates (mode=incremental),
+# and the number of updates after which the next one is a full refit instead
+# (0 never refits automatically)
+INCREMENTAL_DATA_PATH = os.getenv("INCREMENTAL_DATA_PATH", "")
+FULL_REFIT_EVERY = int(os.getenv("FULL_REFIT_EVERY") or "10")
@@ -0,0 +1,105 @@
+"""
+Columnar cache of the training dataset
+
+The first load of a local CSV parses only the needed columns with explicit
+dtypes and writes them to an uncompressed Feather (Arrow IPC) file named
+after the source file's content hash. Later loads read the needed columns
+of that file through a memory map and convert them to pandas in one copy,
+without parsing the CSV again. Remote sources (e.g. hf:// paths) and
+environments without pyarrow fall back to reading the CSV directly.
+"""
+
+import hashlib
+import logging
+import os
+from pathlib import Path
+import pandas as pd
+from src.artifact import atomic_write, file_sha256
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - optional dependency
+    feather = None
+
+logger = logging.getLogger(__name__)
+
+# bump when the cached layout changes so old cache files are not reused
+CACHE_FORMAT_VERSION = 1
+
+# source hashes memoised per (path, mtime, size) so unchanged files are hashed once
+_source_hashes = {}
+
+
+def source_hash(path) -> str:
+    """
+    SHA-256 of a local file's content, memoised on its mtime and size
+    """
+    stat = os.stat(path)
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    if key not in _source_hashes:
+        _source_hashes[key] = file_sha256(path)
+    return _source_hashes[key]
+
+
+def cache_path_for(path, columns, dtypes: dict, cache_dir) -> Path:
+    """
+    Location of the cache file for a source file, the selected columns
+    and their dtypes
+    """
+    layout = repr((CACHE_FORMAT_VERSION, list(columns), sorted(dtypes.items())))
+    layout_hash = hashlib.sha256(layout.encode()).hexdigest()[:8]
+    return Path(cache_dir) / (
+        f"{Path(path).stem}-{source_hash(path)[:16]}-{layout_hash}.feather"
+    )
+
+
+def read_csv_columns(path, columns, dtypes: dict) -> pd.DataFrame:
+    """
+    Parse only ``columns`` of a CSV, with explicit dtypes
+    """
+    return pd.read_csv(path, usecols=list(columns), dtype=dtypes)[list(columns)]
+
+
+def read_dataset(path, columns, dtypes: dict, cache_dir=None) -> pd.DataFrame:
+    """
+    Read ``columns`` of the dataset at ``path``, going through the columnar
+    cache in ``cache_dir`` when the source is a local file.
+
+    Pass ``cache_dir=None`` (or an empty string) to always parse the CSV.
+    """
+    cacheable = (
+        cache_dir
+        and feather is not None
+        and isinstance(path, (str, Path))
+        and os.path.isfile(path)
+    )
+    if not cacheable:
+        return read_csv_columns(path, columns, dtypes)
+
+    cache_path = cache_path_for(path, columns, dtypes, cache_dir)
+
+    if cache_path.exists():
+        try:
+            # columns selected in Arrow, so only they are copied to pandas
+            table = feather.read_table(
+                cache_path, columns=list(columns), memory_map=True
+            )
+            return table.to_pandas()
+        except Exception:  # pylint: disable=broad-except
+            # unreadable cache file: fall through and rebuild it
+            logger.warning("Rebuilding unreadable dataset cache %s", cache_path)
+
+    df = read_csv_columns(path, columns, dtypes)
+
+    try:
+        atomic_write(
+            cache_path,
+            lambda tmp_path: feather.write_feather(
+                df, tmp_path, compression="uncompressed"
+            ),
+        )
+    except OSError as e:
+        # a read-only cache dir must not break loading
+        logger.warning("Could not write dataset cache %s: %s", cache_path, e)
+
+    return df
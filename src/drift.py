@@ -0,0 +1,471 @@
+"""
+Feature drift and prediction monitoring with bounded-memory sketches
+
+A DriftProfile summarizes a stream of passengers in constant memory:
+
+-   Age and Fare: counts per bin between fixed edges, the deciles of the
+    training values, plus the smallest and largest value. The bins give
+    approximate quantiles (interpolated within a bin) as well as the
+    distribution that is compared.
+-   Sex, Pclass, Embarked, SibSp and Parch: counts per value, for the
+    values seen in training (at most MAX_VALUES per feature). Any other
+    value is counted in one shared bucket.
+-   predictions: the rows labeled, and how many were labeled positive.
+
+Missing values are counted separately and left out of the distributions,
+since the training data has some while the API never receives any.
+
+Training saves the profile of its training rows in the artifact's
+metadata (``reference``). While serving, a DriftMonitor folds every
+scored row into a live profile with the same bins: a single row with a
+bisect or dict lookup per feature, a batch with one vectorized pass per
+column. The live profile is compared with the reference at the end of
+every window, and on request. Each feature (and the predicted labels) is
+scored with the population stability index (PSI) of its distribution
+against the reference's.
+"""
+
+import bisect
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_FEATURES = ("Age", "Fare")
+COUNTED_FEATURES = ("Sex", "Pclass", "Embarked", "SibSp", "Parch")
+
+# bins of a numeric feature, of equal mass in the training data
+QUANTILE_BINS = 10
+
+# values tracked per counted feature, the most frequent in training
+MAX_VALUES = 16
+
+# quantiles of the numeric features reported next to their PSI
+QUANTILES = (0.1, 0.5, 0.9)
+
+# share a bucket empty on one side is given, so that the PSI stays finite
+PSI_EPSILON = 1e-4
+
+# integer values below this are counted with one bincount of the column
+TALLY_LIMIT = 1024
+
+# model versions tracked at once, the served one and the one it replaced
+MAX_VERSIONS = 2
+
+
+class DriftProfile:
+    """
+    Constant-memory summary of feature rows and their predicted labels.
+
+    Parameters
+    ----------
+    edges : dict
+        Sorted bin edges of each numeric feature.
+    values : dict
+        Tracked values of each counted feature.
+    """
+
+    def __init__(self, edges: dict, values: dict):
+        self.edges = {feature: list(edges[feature]) for feature in NUMERIC_FEATURES}
+        self.values = {feature: list(values[feature]) for feature in COUNTED_FEATURES}
+        self._index = {
+            feature: {value: i for i, value in enumerate(known)}
+            for feature, known in self.values.items()
+        }
+        # features whose tracked values are all small non-negative integers
+        self._tallied = {
+            feature
+            for feature, known in self.values.items()
+            if all(type(value) is int and 0 <= value < TALLY_LIMIT for value in known)
+        }
+        # a bin per gap between edges, or a bucket per value plus "other"; plain
+        # lists, which a single row updates faster than NumPy arrays
+        self.counts = {
+            feature: [0] * (len(known) + 1)
+            for feature, known in (*self.edges.items(), *self.values.items())
+        }
+        self.missing = dict.fromkeys(self.counts, 0)
+        self.low = dict.fromkeys(NUMERIC_FEATURES, math.inf)
+        self.high = dict.fromkeys(NUMERIC_FEATURES, -math.inf)
+        self.rows = 0
+        self.labeled = 0
+        self.positives = 0
+
+    @classmethod
+    def fit(cls, frame: pd.DataFrame, positive=None) -> "DriftProfile":
+        """
+        Reference profile of training rows: the bins are the deciles of the
+        numeric features and the tracked values the most frequent ones.
+        ``positive`` flags the rows the model labels positive, if known.
+        """
+        levels = np.linspace(0, 1, QUANTILE_BINS + 1)[1:-1]
+        edges = {}
+        for feature in NUMERIC_FEATURES:
+            values = frame[feature].dropna().to_numpy(dtype=np.float64)
+            cuts = np.quantile(values, levels) if len(values) else []
+            edges[feature] = np.unique(cuts).tolist()
+        values = {
+            feature: sorted(frame[feature].value_counts().index[:MAX_VALUES].tolist())
+            for feature in COUNTED_FEATURES
+        }
+        profile = cls(edges, values)
+        profile.update(frame, positive)
+        return profile
+
+    def empty(self) -> "DriftProfile":
+        """
+        A profile with the same bins and values and no rows
+        """
+        return DriftProfile(self.edges, self.values)
+
+    def update(self, columns, positive=None):
+        """
+        Fold a batch in: ``columns`` maps every feature to an array-like
+        (a DataFrame or a dict of NumPy columns), ``positive`` flags the
+        rows labeled positive
+        """
+        rows = len(columns[NUMERIC_FEATURES[0]])
+        for feature, edges in self.edges.items():
+            values = np.asarray(columns[feature], dtype=np.float64)
+            if not len(values):
+                continue
+            low = values.min()
+            if np.isnan(low):
+                present = values[~np.isnan(values)]
+                self.missing[feature] += rows - len(present)
+                if not len(present):
+                    continue
+                values, low = present, present.min()
+            self.low[feature] = min(self.low[feature], float(low))
+            self.high[feature] = max(self.high[feature], float(values.max()))
+            bins = np.bincount(
+                np.searchsorted(edges, values, side="right"),
+                minlength=len(edges) + 1,
+            )
+            _add(self.counts[feature], bins.tolist())
+
+        for feature, known in self.values.items():
+            values = np.asarray(columns[feature])
+            matched = self._matched(feature, known, values)
+            rest = rows - sum(matched)
+            if rest and values.dtype.kind in "Of":
+                missing = int(np.count_nonzero(pd.isna(values)))
+                self.missing[feature] += missing
+                rest -= missing
+            _add(self.counts[feature], [*matched, rest])
+
+        self.rows += rows
+        if positive is not None:
+            self.labeled += len(positive)
+            self.positives += int(np.count_nonzero(positive))
+
+    def observe(self, record, positive: bool):
+        """
+        Fold one record (a mapping of the features) and its label in
+        """
+        for feature, edges in self.edges.items():
+            value = record[feature]
+            if value is None or value != value:
+                self.missing[feature] += 1
+                continue
+            self.counts[feature][bisect.bisect_right(edges, value)] += 1
+            if value < self.low[feature]:
+                self.low[feature] = float(value)
+            if value > self.high[feature]:
+                self.high[feature] = float(value)
+
+        for feature, index in self._index.items():
+            value = record[feature]
+            if value is None:
+                self.missing[feature] += 1
+            else:
+                self.counts[feature][index.get(value, len(index))] += 1
+
+        self.rows += 1
+        self.labeled += 1
+        self.positives += bool(positive)
+
+    def quantile(self, feature: str, q: float):
+        """
+        Approximate ``q`` quantile of a numeric feature, interpolated
+        within its bin, or None without values
+        """
+        counts = self.counts[feature]
+        total = sum(counts)
+        if not total:
+            return None
+        low, high = self.low[feature], self.high[feature]
+        bounds = np.clip([low, *self.edges[feature], high], low, high)
+        cumulative = np.concatenate([[0], np.cumsum(counts)]) / total
+        return float(np.interp(q, cumulative, bounds))
+
+    def to_dict(self) -> dict:
+        """
+        JSON-serialisable form of the profile, stored in the metadata of
+        the artifact
+        """
+        return {
+            "rows": self.rows,
+            "edges": self.edges,
+            "values": self.values,
+            "counts": {feature: list(c) for feature, c in self.counts.items()},
+            "missing": self.missing,
+            "low": {f: _finite_or_none(v) for f, v in self.low.items()},
+            "high": {f: _finite_or_none(v) for f, v in self.high.items()},
+            "labeled": self.labeled,
+            "positives": self.positives,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "DriftProfile":
+        """
+        Profile restored from the output of ``to_dict``
+        """
+        profile = cls(state["edges"], state["values"])
+        for feature, counts in state["counts"].items():
+            if len(counts) != len(profile.counts[feature]):
+                raise ValueError(f"Drift profile counts of {feature} do not fit")
+            profile.counts[feature] = [int(count) for count in counts]
+        profile.missing.update(state["missing"])
+        for feature in NUMERIC_FEATURES:
+            low, high = state["low"][feature], state["high"][feature]
+            profile.low[feature] = math.inf if low is None else low
+            profile.high[feature] = -math.inf if high is None else high
+        profile.rows = state["rows"]
+        profile.labeled = state["labeled"]
+        profile.positives = state["positives"]
+        return profile
+
+    def _matched(self, feature: str, known: list, values: np.ndarray) -> list:
+        """
+        Rows of a column equal to each tracked value: one bincount for small
+        integers, else one comparison per value, which is cheaper than
+        sorting or hashing a column of Python strings
+        """
+        if feature in self._tallied and values.dtype.kind in "iu" and len(values):
+            if values.min() >= 0 and values.max() < TALLY_LIMIT:
+                tally = np.bincount(values).tolist()
+                return [tally[value] if value < len(tally) else 0 for value in known]
+        return [int(np.count_nonzero(values == value)) for value in known]
+
+
+def population_stability_index(expected, actual):
+    """
+    PSI of the ``actual`` counts per bucket against the ``expected`` ones:
+    about 0 for the same distribution, above 0.2 for a marked shift.
+    None when either side is empty.
+    """
+    expected = np.asarray(expected, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    if not expected.sum() or not actual.sum():
+        return None
+    p = np.maximum(expected / expected.sum(), PSI_EPSILON)
+    q = np.maximum(actual / actual.sum(), PSI_EPSILON)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def compare(
+    reference: DriftProfile, live: DriftProfile, threshold: float, min_rows: int
+) -> dict:
+    """
+    Drift of a live profile against the reference: the PSI per feature
+    and of the predicted labels, with the quantiles of the numeric
+    features and the share of untracked values of the counted ones. A
+    score of at least ``threshold`` over at least ``min_rows`` rows counts
+    as drift.
+    """
+    features = {}
+    for feature, counts in live.counts.items():
+        rows = sum(counts)
+        score = population_stability_index(reference.counts[feature], counts)
+        entry = {"rows": rows, "psi": score}
+        if feature in live.edges:
+            entry["quantiles"] = {
+                str(q): {
+                    "reference": reference.quantile(feature, q),
+                    "live": live.quantile(feature, q),
+                }
+                for q in QUANTILES
+            }
+        else:
+            entry["other_share"] = counts[-1] / rows if rows else None
+        entry["drifted"] = score is not None and rows >= min_rows and score >= threshold
+        features[feature] = entry
+
+    labeled = [reference.labeled - reference.positives, reference.positives]
+    live_labeled = [live.labeled - live.positives, live.positives]
+    score = population_stability_index(labeled, live_labeled)
+    enough_rows = live.labeled >= min_rows
+    predictions = {
+        "rows": live.labeled,
+        "psi": score,
+        "positive_rate": live.positives / live.labeled if live.labeled else None,
+        "reference_positive_rate": (
+            reference.positives / reference.labeled if reference.labeled else None
+        ),
+        "drifted": score is not None and enough_rows and score >= threshold,
+    }
+
+    drifted = [feature for feature, entry in features.items() if entry["drifted"]]
+    if predictions["drifted"]:
+        drifted.append("predictions")
+    return {
+        "rows": live.rows,
+        "drifted": drifted,
+        "features": features,
+        "predictions": predictions,
+    }
+
+
+class DriftMonitor:
+    """
+    Live drift profiles of the served models, in tumbling windows.
+
+    Parameters
+    ----------
+    window_seconds : float, default=300
+        Length of a window. A completed window is compared with the
+        reference once and kept until the next one completes.
+    psi_threshold : float, default=0.2
+        PSI from which a feature counts as drifted.
+    min_rows : int, default=100
+        Rows a window needs before any of its features counts as drifted.
+    """
+
+    def __init__(
+        self, window_seconds: float = 300, psi_threshold: float = 0.2, min_rows=100
+    ):
+        self.window_seconds = window_seconds
+        self.psi_threshold = psi_threshold
+        self.min_rows = min_rows
+        self._versions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def observe(self, model, record, positive: bool):
+        """
+        Fold one record scored by ``model`` (a LoadedModel) in
+        """
+        with self._lock:
+            live = self._live(model)
+            if live is not None:
+                live.observe(record, positive)
+
+    def observe_batch(self, model, columns, positive):
+        """
+        Fold a batch of columns scored by ``model`` in, ``positive``
+        flagging the rows labeled positive
+        """
+        with self._lock:
+            live = self._live(model)
+            if live is not None:
+                live.update(columns, positive)
+
+    def report(self, model) -> dict:
+        """
+        Drift of the current window (so far) and of the last completed
+        window of ``model``'s version against its training reference
+        """
+        with self._lock:
+            state = self._versions.get(model.version) or self._track(model)
+            version = model.version
+            if state["reference"] is None:
+                return {
+                    "version": version,
+                    "reference": False,
+                    "window_seconds": self.window_seconds,
+                    "current": None,
+                    "previous": None,
+                }
+            self._roll(state, time.monotonic())
+            current = compare(
+                state["reference"], state["live"], self.psi_threshold, self.min_rows
+            )
+            return {
+                "version": version,
+                "reference": True,
+                "window_seconds": self.window_seconds,
+                "psi_threshold": self.psi_threshold,
+                "min_rows": self.min_rows,
+                "reference_rows": state["reference"].rows,
+                "current": {"started_at": state["started_at"], **current},
+                "previous": state["previous"],
+            }
+
+    def _live(self, model):
+        """
+        The live profile of the current window of ``model``'s version,
+        rolling the window over when it has ended; None when the model has
+        no reference. The caller holds the lock.
+        """
+        state = self._versions.get(model.version)
+        if state is None:
+            state = self._track(model)
+        if state["reference"] is None:
+            return None
+        now = time.monotonic()
+        if now >= state["ends"]:
+            self._roll(state, now)
+        return state["live"]
+
+    def _track(self, model) -> dict:
+        """
+        Start tracking a model version, forgetting the oldest one beyond
+        MAX_VERSIONS
+        """
+        reference = None
+        if model.metadata.get("reference"):
+            try:
+                reference = DriftProfile.from_dict(model.metadata["reference"])
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(
+                    "Ignoring the drift reference of model version %s: %s",
+                    model.version,
+                    e,
+                )
+        state = self._versions[model.version] = {
+            "reference": reference,
+            "live": reference.empty() if reference is not None else None,
+            "started_at": time.time(),
+            "ends": time.monotonic() + self.window_seconds,
+            "previous": None,
+        }
+        while len(self._versions) > MAX_VERSIONS:
+            self._versions.popitem(last=False)
+        return state
+
+    def _roll(self, state: dict, now: float):
+        """
+        Close the window of a version if it has ended: compare it with the
+        reference, log the drifted features and start a new window
+        """
+        if now < state["ends"]:
+            return
+        result = compare(
+            state["reference"], state["live"], self.psi_threshold, self.min_rows
+        )
+        if result["drifted"]:
+            logger.warning("Drift detected in %s", ", ".join(result["drifted"]))
+        state["previous"] = {"started_at": state["started_at"], **result}
+        state["live"] = state["reference"].empty()
+        state["started_at"] = time.time()
+        state["ends"] = now + self.window_seconds
+
+
+def _add(counts: list, increments: list):
+    """
+    Add ``increments`` to ``counts`` in place, bucket by bucket
+    """
+    for i, increment in enumerate(increments):
+        counts[i] += increment
+
+
+def _finite_or_none(value: float):
+    """
+    ``value``, or None for an infinite one, which JSON cannot hold
+    """
+    return value if math.isfinite(value) else None
@@ -0,0 +1,851 @@
+"""
+Compiled fast-path inference engine for the fitted titanic pipeline
+
+The fitted pipeline is a linear model over a ColumnTransformer, so every
+learned parameter (imputer fill values, scaler statistics, one-hot category
+maps, the family features and the classifier coefficients) can be folded
+into one flat NumPy weight vector. Scoring then needs no pandas and no
+sklearn: a few array operations for a batch, or plain Python arithmetic for
+a single row.
+
+This module deliberately imports neither pandas nor sklearn.
+"""
+
+import itertools
+import math
+import operator
+import numpy as np
+
+# classifiers whose predict_proba is the logistic function of coef_ @ x + b
+SUPPORTED_MODELS = ("LogisticRegression", "SGDClassifier")
+
+
+class CompiledModel:
+    """
+    Pipeline compiled into a flat weight vector plus a small layout.
+
+    The weight vector is laid out as::
+
+        [intercept,
+         numeric coefficients..., numeric fill values...,
+         family_size coefficient, isAlone coefficient,
+         category weights...]
+
+    Numeric coefficients already have the scaler folded in, so a numeric
+    column contributes ``coef * x`` (missing values are replaced by the
+    fill value first, ``nan`` meaning the column had no imputer). Every
+    categorical column contributes the weight of the matching category, or
+    nothing for a dropped or unknown category.
+
+    Parameters
+    ----------
+    weights : ndarray of shape (n_weights,)
+        The flat float64 weight vector.
+    layout : dict
+        JSON-serialisable description of the weight vector with the keys
+        ``classes``, ``numeric`` (column names), ``categorical`` (list of
+        ``{"column": ..., "categories": [...]}``, ``None`` standing for a
+        missing category) and ``family`` (``None`` or
+        ``{"sibsp": ..., "parch": ...}``).
+    """
+
+    def __init__(self, weights, layout):
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.layout = layout
+        self.classes = list(layout["classes"])
+
+        numeric = list(layout["numeric"])
+        n_numeric = len(numeric)
+        offset = 1
+
+        self.intercept = float(self.weights[0])
+        self.numeric_coef = self.weights[offset : offset + n_numeric]
+        offset += n_numeric
+        self.numeric_fill = self.weights[offset : offset + n_numeric]
+        offset += n_numeric
+        self.family_coef = self.weights[offset : offset + 2]
+        offset += 2
+
+        self.category_weights = []
+        for term in layout["categorical"]:
+            n_categories = len(term["categories"])
+            self.category_weights.append(self.weights[offset : offset + n_categories])
+            offset += n_categories
+
+        if offset != len(self.weights):
+            raise ValueError(
+                f"Weight vector has {len(self.weights)} entries, layout expects {offset}"
+            )
+
+        # plain Python copies of the parameters for single-row scoring
+        self._row_numeric = [
+            (column, float(coef), None if math.isnan(fill) else float(fill))
+            for column, coef, fill in zip(
+                numeric, self.numeric_coef, self.numeric_fill
+            )
+        ]
+        self._row_categorical = [
+            (
+                term["column"],
+                {
+                    category: float(weight)
+                    for category, weight in zip(term["categories"], weights)
+                    if weight != 0.0
+                },
+            )
+            for term, weights in zip(layout["categorical"], self.category_weights)
+        ]
+        family = layout["family"]
+        self._row_family = (
+            None
+            if family is None
+            else (
+                family["sibsp"],
+                family["parch"],
+                float(self.family_coef[0]),
+                float(self.family_coef[1]),
+            )
+        )
+
+    @property
+    def n_features_in(self) -> int:
+        """
+        Number of raw input columns the model reads
+        """
+        return len(self.input_columns)
+
+    @property
+    def input_columns(self) -> list:
+        """
+        Names of the raw input columns the model reads
+        """
+        columns = list(self.layout["numeric"])
+        columns += [term["column"] for term in self.layout["categorical"]]
+        if self.layout["family"] is not None:
+            columns += [self.layout["family"]["sibsp"], self.layout["family"]["parch"]]
+        return columns
+
+    def decision_function(self, X) -> np.ndarray:
+        """
+        Logit of the positive class for a batch.
+
+        ``X`` is anything indexable by column name that yields a sequence
+        per column: a DataFrame, a dict of lists or a dict of arrays.
+        """
+        z = None
+
+        for column, coef, fill in zip(
+            self.layout["numeric"], self.numeric_coef, self.numeric_fill
+        ):
+            values = np.asarray(X[column], dtype=np.float64)
+            missing = np.isnan(values)
+            if missing.any():
+                if math.isnan(fill):
+                    raise ValueError(f"Input contains NaN in column '{column}'")
+                values = np.where(missing, fill, values)
+            z = values * coef if z is None else z + values * coef
+
+        if z is None:
+            raise ValueError("Compiled model has no numeric input columns")
+        z = z + self.intercept
+
+        for term, weights in zip(self.layout["categorical"], self.category_weights):
+            values = np.asarray(X[term["column"]])
+            for category, weight in zip(term["categories"], weights):
+                if weight == 0.0:
+                    continue
+                if category is None:
+                    z = z + weight * _is_missing(values)
+                else:
+                    z = z + weight * (values == category)
+
+        family = self.layout["family"]
+        if family is not None:
+            family_size = (
+                np.asarray(X[family["sibsp"]]) + np.asarray(X[family["parch"]]) + 1
+            )
+            z = z + self.family_coef[0] * family_size
+            z = z + self.family_coef[1] * (family_size == 1)
+
+        return z
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Class probabilities for a batch, shaped like sklearn's predict_proba
+        """
+        positive = _sigmoid(self.decision_function(X))
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Predicted class labels for a batch
+        """
+        decision = self.decision_function(X)
+        return np.asarray(self.classes)[(decision > 0).astype(int)]
+
+    def decision_row(self, row) -> float:
+        """
+        Logit of the positive class for one mapping, in pure Python
+        """
+        z = self.intercept
+
+        for column, coef, fill in self._row_numeric:
+            value = row[column]
+            if value is None or value != value:
+                if fill is None:
+                    raise ValueError(f"Input contains NaN in column '{column}'")
+                value = fill
+            z += coef * value
+
+        for column, weights in self._row_categorical:
+            value = row[column]
+            if value is not None and value != value:
+                value = None
+            z += weights.get(value, 0.0)
+
+        if self._row_family is not None:
+            sibsp, parch, size_coef, alone_coef = self._row_family
+            family_size = row[sibsp] + row[parch] + 1
+            z += size_coef * family_size
+            if family_size == 1:
+                z += alone_coef
+
+        return z
+
+    def predict_proba_row(self, row) -> float:
+        """
+        Probability of the positive class for one mapping, in pure Python
+        """
+        z = self.decision_row(row)
+        if z >= 0:
+            return 1.0 / (1.0 + math.exp(-z))
+        e = math.exp(z)
+        return e / (1.0 + e)
+
+    def predict_row(self, row):
+        """
+        Predicted class label for one mapping, in pure Python
+        """
+        return self.classes[1] if self.decision_row(row) > 0 else self.classes[0]
+
+
+class TableModel:
+    """
+    CompiledModel re-expressed as one precomputed contribution table.
+
+    The logit is a sum of independent per-group terms, and most inputs take
+    only a few values: the categorical columns (Sex, Embarked, the missing
+    category included), enumerated numeric columns (Pclass) and the family
+    size. At load time the sum of their contributions is tabulated over the
+    cross product of those values (a few hundred cells for this model), so
+    scoring a row is one table lookup plus arithmetic for the remaining
+    numeric columns (Age and Fare).
+
+    Rows outside the tabulated domain, e.g. an unknown category, a Pclass
+    of 4 or a family size beyond ``max_family_size``, are scored by
+    ``fallback`` instead.
+
+    Parameters
+    ----------
+    compiled : CompiledModel
+        The model to tabulate.
+    domains : dict
+        Numeric columns to tabulate, mapped to the sequence of their values.
+    fallback : callable
+        Takes a dict of column arrays and returns the positive-class
+        probability of every row, typically through the sklearn pipeline.
+    max_family_size : int, default=20
+        Largest SibSp + Parch + 1 held in the table.
+    """
+
+    def __init__(
+        self,
+        compiled: CompiledModel,
+        domains: dict,
+        fallback,
+        max_family_size: int = 20,
+    ):
+        self.compiled = compiled
+        self.classes = compiled.classes
+        self.fallback = fallback
+        self.max_family_size = max_family_size
+        self.intercept = compiled.intercept
+
+        # table axes: categorical columns, enumerated numeric columns, family
+        self.categorical = [
+            (term["column"], list(term["categories"]))
+            for term in compiled.layout["categorical"]
+        ]
+        axis_weights = list(compiled.category_weights)
+
+        self.arithmetic = []
+        self.enumerated = []
+        for column, coef, fill in zip(
+            compiled.layout["numeric"], compiled.numeric_coef, compiled.numeric_fill
+        ):
+            if column in domains:
+                values = list(domains[column])
+                self.enumerated.append((column, values))
+                axis_weights.append(coef * np.asarray(values, dtype=np.float64))
+            else:
+                self.arithmetic.append((column, float(coef), float(fill)))
+
+        family = compiled.layout["family"]
+        self.family = None if family is None else (family["sibsp"], family["parch"])
+        if self.family is not None:
+            # sizes 1..max_family_size along the last axis
+            sizes = np.arange(1, max_family_size + 1, dtype=np.float64)
+            size_coef, alone_coef = compiled.family_coef
+            axis_weights.append(size_coef * sizes + alone_coef * (sizes == 1))
+
+        self.table = np.zeros(())
+        for weights in axis_weights:
+            self.table = np.add.outer(self.table, weights)
+        self._flat_table = self.table.ravel()
+
+        # plain Python copies for single-row scoring, keyed on the raw values
+        self._row_arithmetic = [
+            (column, coef, None if math.isnan(fill) else fill)
+            for column, coef, fill in self.arithmetic
+        ]
+        key_columns = [column for column, _ in self.categorical]
+        key_columns += [column for column, _ in self.enumerated]
+        if len(key_columns) > 1:
+            self._row_key = operator.itemgetter(*key_columns)
+        else:
+            # itemgetter of one column returns the bare value, not a 1-tuple
+            self._row_key = lambda row: tuple(row[column] for column in key_columns)
+        self._row_family = (
+            None if self.family is None else operator.itemgetter(*self.family)
+        )
+        self._n_categorical = len(self.categorical)
+        axes = [categories for _, categories in self.categorical]
+        axes += [values for _, values in self.enumerated]
+        if self.family is not None:
+            axes.append(range(1, max_family_size + 1))
+        self._row_table = {
+            key: float(weight)
+            for key, weight in zip(itertools.product(*axes), self._flat_table)
+        }
+
+    @property
+    def input_columns(self) -> list:
+        """
+        Names of the raw input columns the model reads
+        """
+        return self.compiled.input_columns
+
+    @property
+    def n_features_in(self) -> int:
+        """
+        Number of raw input columns the model reads
+        """
+        return self.compiled.n_features_in
+
+    def decision_function(self, X):
+        """
+        Logit of the positive class for a batch, and the mask of rows
+        outside the tabulated domain (their logit is meaningless).
+        """
+        z = None
+        for column, coef, fill in self.arithmetic:
+            values = np.asarray(X[column], dtype=np.float64)
+            missing = np.isnan(values)
+            if missing.any():
+                if math.isnan(fill):
+                    raise ValueError(f"Input contains NaN in column '{column}'")
+                values = np.where(missing, fill, values)
+            z = values * coef if z is None else z + values * coef
+
+        if z is None:
+            raise ValueError("Table model has no arithmetic input columns")
+
+        codes = [
+            _codes(np.asarray(X[column]), categories)
+            for column, categories in self.categorical
+        ]
+        codes += [
+            _codes(np.asarray(X[column]), values) for column, values in self.enumerated
+        ]
+        if self.family is not None:
+            sibsp, parch = self.family
+            size = np.asarray(X[sibsp]) + np.asarray(X[parch]) + 1
+            valid = (size >= 1) & (size <= self.max_family_size)
+            valid &= size == np.floor(size)
+            codes.append(np.where(valid, size - 1, -1).astype(np.intp))
+
+        outside = np.zeros(len(z), dtype=bool)
+        for axis_codes in codes:
+            outside |= axis_codes < 0
+        if codes:
+            cells = np.ravel_multi_index(
+                [np.maximum(axis_codes, 0) for axis_codes in codes], self.table.shape
+            )
+            z = z + self._flat_table[cells]
+
+        return z + self.intercept, outside
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Class probabilities for a batch, shaped like sklearn's predict_proba
+        """
+        positive = self._positive_proba(X)
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Predicted class labels for a batch
+        """
+        positive = self._positive_proba(X)
+        return np.asarray(self.classes)[(positive > 0.5).astype(int)]
+
+    def predict_proba_row(self, row) -> float:
+        """
+        Probability of the positive class for one mapping, in pure Python
+        """
+        z = self._decision_row(row)
+        if z is None:
+            return float(self.fallback({c: [row[c]] for c in self.input_columns})[0])
+        if z >= 0:
+            return 1.0 / (1.0 + math.exp(-z))
+        e = math.exp(z)
+        return e / (1.0 + e)
+
+    def predict_row(self, row):
+        """
+        Predicted class label for one mapping, in pure Python
+        """
+        z = self._decision_row(row)
+        if z is None:
+            positive = self.predict_proba_row(row) > 0.5
+        else:
+            positive = z > 0
+        return self.classes[1] if positive else self.classes[0]
+
+    def _positive_proba(self, X) -> np.ndarray:
+        """
+        Positive-class probability for a batch, out-of-domain rows scored by
+        the fallback
+        """
+        z, outside = self.decision_function(X)
+        positive = _sigmoid(z)
+        if outside.any():
+            rows = {
+                column: np.asarray(X[column])[outside] for column in self.input_columns
+            }
+            positive[outside] = self.fallback(rows)
+        return positive
+
+    def _decision_row(self, row):
+        """
+        Logit of the positive class for one mapping, or None when the row
+        falls outside the tabulated domain
+        """
+        z = self.intercept
+
+        for column, coef, fill in self._row_arithmetic:
+            value = row[column]
+            if value is None or value != value:
+                if fill is None:
+                    raise ValueError(f"Input contains NaN in column '{column}'")
+                value = fill
+            z += coef * value
+
+        key = self._row_key(row)
+        if self._row_family is not None:
+            sibsp, parch = self._row_family(row)
+            key += (sibsp + parch + 1,)
+
+        contribution = self._row_table.get(key)
+        if contribution is None:
+            # NaN never matches the None (missing) category: normalise, retry
+            key = tuple(
+                None if index < self._n_categorical and value != value else value
+                for index, value in enumerate(key)
+            )
+            contribution = self._row_table.get(key)
+            if contribution is None:
+                return None
+
+        return z + contribution
+
+
+def compile_pipeline(pipeline) -> CompiledModel:
+    """
+    Extract the learned parameters of a fitted titanic pipeline into a
+    CompiledModel.
+
+    Raises ValueError if the pipeline contains anything the engine cannot
+    reproduce exactly, so callers can fall back to the sklearn pipeline.
+    """
+    if len(pipeline.steps) != 2:
+        raise ValueError("Expected a pipeline of a preprocessor and a model")
+
+    (_, preprocessor), (_, model) = pipeline.steps
+    coef = _linear_model_coef(model)
+
+    if type(preprocessor).__name__ != "ColumnTransformer":
+        raise ValueError("Expected a ColumnTransformer as the first pipeline step")
+
+    intercept = float(np.ravel(model.intercept_)[0])
+    numeric, numeric_coef, numeric_fill = [], [], []
+    categorical, category_weights = [], []
+    family = None
+    family_coef = [0.0, 0.0]
+    n_covered = 0
+
+    for name, transformer, columns in preprocessor.transformers_:
+        if isinstance(transformer, str) and transformer == "drop":
+            continue
+
+        out = preprocessor.output_indices_[name]
+        branch_coef = coef[out]
+        n_covered += len(branch_coef)
+        steps = _branch_steps(transformer)
+        kinds = [type(step).__name__ for step in steps]
+        columns = list(columns)
+
+        if kinds == ["FamilyFeatures"]:
+            if family is not None:
+                raise ValueError("Pipeline has more than one FamilyFeatures branch")
+            (step,) = steps
+            family = {"sibsp": step.sibsp_col, "parch": step.parch_col}
+            family_coef = [float(branch_coef[0]), float(branch_coef[1])]
+
+        elif kinds == ["OneHotEncoder"]:
+            (encoder,) = steps
+            _check_encoder(encoder)
+            position = 0
+            for index, column in enumerate(columns):
+                categories = [_category_key(c) for c in encoder.categories_[index]]
+                dropped = None if encoder.drop_idx_ is None else encoder.drop_idx_[index]
+                weights = []
+                for category_index in range(len(categories)):
+                    if dropped is not None and category_index == dropped:
+                        weights.append(0.0)
+                    else:
+                        weights.append(float(branch_coef[position]))
+                        position += 1
+                categorical.append({"column": column, "categories": categories})
+                category_weights.extend(weights)
+
+        elif kinds in (
+            [],
+            ["SimpleImputer"],
+            ["StandardScaler"],
+            ["SimpleImputer", "StandardScaler"],
+        ):
+            fill = np.full(len(columns), np.nan)
+            mean = np.zeros(len(columns))
+            scale = np.ones(len(columns))
+            for step in steps:
+                if type(step).__name__ == "SimpleImputer":
+                    _check_imputer(step)
+                    fill = np.asarray(step.statistics_, dtype=np.float64)
+                else:
+                    if step.mean_ is not None:
+                        mean = np.asarray(step.mean_, dtype=np.float64)
+                    if step.scale_ is not None:
+                        scale = np.asarray(step.scale_, dtype=np.float64)
+            folded = branch_coef / scale
+            intercept -= float(np.dot(folded, mean))
+            numeric.extend(columns)
+            numeric_coef.extend(folded.tolist())
+            numeric_fill.extend(fill.tolist())
+
+        else:
+            raise ValueError(f"Unsupported preprocessing branch '{name}': {kinds}")
+
+    if n_covered != len(coef):
+        raise ValueError(
+            f"Preprocessor emits {n_covered} features, model expects {len(coef)}"
+        )
+
+    layout = {
+        "classes": np.asarray(model.classes_).tolist(),
+        "numeric": numeric,
+        "categorical": categorical,
+        "family": family,
+    }
+    weights = np.array(
+        [intercept, *numeric_coef, *numeric_fill, *family_coef, *category_weights],
+        dtype=np.float64,
+    )
+    return CompiledModel(weights, layout)
+
+
+def expand_weights(compiled: CompiledModel, preprocessor):
+    """
+    Coefficients and intercept of a linear model over the output of
+    ``preprocessor`` (a fitted ColumnTransformer of the shape
+    compile_pipeline accepts) that reproduce the logit of ``compiled``:
+    the inverse of compile_pipeline, for a refitted preprocessor.
+
+    Used to warm-start a classifier after the preprocessing statistics
+    changed. Scaler changes and a different dropped category are folded
+    into the coefficients, and categories or columns ``compiled`` does not
+    know get a zero weight. Only rows whose missing values are imputed
+    with a changed fill value get another logit.
+    """
+    n_features = max(
+        (indices.stop for indices in preprocessor.output_indices_.values()),
+        default=0,
+    )
+    coef = np.zeros(n_features)
+    intercept = compiled.intercept
+    numeric = dict(zip(compiled.layout["numeric"], compiled.numeric_coef.tolist()))
+    categorical = {
+        term["column"]: dict(zip(term["categories"], weights.tolist()))
+        for term, weights in zip(
+            compiled.layout["categorical"], compiled.category_weights
+        )
+    }
+
+    for name, transformer, columns in preprocessor.transformers_:
+        if isinstance(transformer, str) and transformer == "drop":
+            continue
+
+        out = preprocessor.output_indices_[name]
+        steps = _branch_steps(transformer)
+        kinds = [type(step).__name__ for step in steps]
+        columns = list(columns)
+
+        if kinds == ["FamilyFeatures"]:
+            if compiled.layout["family"] is not None:
+                coef[out] = compiled.family_coef
+
+        elif kinds == ["OneHotEncoder"]:
+            (encoder,) = steps
+            position = out.start
+            for index, column in enumerate(columns):
+                weights = categorical.get(column, {})
+                categories = [_category_key(c) for c in encoder.categories_[index]]
+                dropped = None if encoder.drop_idx_ is None else encoder.drop_idx_[index]
+                # the dropped category is the new baseline, in the intercept
+                baseline = 0.0
+                if dropped is not None:
+                    baseline = weights.get(categories[dropped], 0.0)
+                intercept += baseline
+                for category_index, category in enumerate(categories):
+                    if category_index != dropped:
+                        coef[position] = weights.get(category, 0.0) - baseline
+                        position += 1
+
+        else:
+            mean = np.zeros(len(columns))
+            scale = np.ones(len(columns))
+            for step in steps:
+                if type(step).__name__ == "StandardScaler":
+                    if step.mean_ is not None:
+                        mean = np.asarray(step.mean_, dtype=np.float64)
+                    if step.scale_ is not None:
+                        scale = np.asarray(step.scale_, dtype=np.float64)
+            raw = np.array([numeric.get(column, 0.0) for column in columns])
+            coef[out] = raw * scale
+            intercept += float(np.dot(raw, mean))
+
+    return coef, intercept
+
+
+def probe_columns(compiled: CompiledModel, n_rows: int = 256, seed: int = 0) -> dict:
+    """
+    Deterministic synthetic inputs covering every known category (and a
+    few unknown ones), missing values where the model imputes them and a
+    spread of numeric values. Used to check a compiled model against the
+    pipeline it came from.
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+
+    for column, fill in zip(compiled.layout["numeric"], compiled.numeric_fill):
+        values = rng.normal(30.0, 20.0, n_rows).round(2)
+        if not math.isnan(fill):
+            values[rng.random(n_rows) < 0.1] = np.nan
+        columns[column] = values
+
+    for term in compiled.layout["categorical"]:
+        choices = [c if c is not None else np.nan for c in term["categories"]]
+        choices.append("__unknown__")
+        values = np.empty(n_rows, dtype=object)
+        values[:] = [choices[i] for i in rng.integers(0, len(choices), n_rows)]
+        columns[term["column"]] = values
+
+    family = compiled.layout["family"]
+    if family is not None:
+        columns[family["sibsp"]] = rng.integers(0, 6, n_rows)
+        columns[family["parch"]] = rng.integers(0, 4, n_rows)
+
+    return columns
+
+
+def domain_columns(table: TableModel) -> dict:
+    """
+    Every combination of the tabulated inputs: each category combination
+    (missing included), each enumerated numeric value and each SibSp/Parch
+    pair within the family sizes of the table. The arithmetic columns cycle
+    through a few values (and missing ones where the model imputes them),
+    which is enough since their contribution is independent of the
+    tabulated ones.
+    """
+    axes = [categories for _, categories in table.categorical]
+    axes += [values for _, values in table.enumerated]
+    if table.family is not None:
+        axes.append(
+            [
+                (sibsp, parch)
+                for sibsp in range(table.max_family_size)
+                for parch in range(table.max_family_size - sibsp)
+            ]
+        )
+
+    combos = list(itertools.product(*axes))
+    n_rows = len(combos)
+    columns = {}
+    position = 0
+
+    for column, _ in table.categorical:
+        values = np.empty(n_rows, dtype=object)
+        values[:] = [np.nan if c[position] is None else c[position] for c in combos]
+        columns[column] = values
+        position += 1
+
+    for column, _ in table.enumerated:
+        columns[column] = np.array([c[position] for c in combos])
+        position += 1
+
+    if table.family is not None:
+        sibsp, parch = table.family
+        columns[sibsp] = np.array([c[position][0] for c in combos])
+        columns[parch] = np.array([c[position][1] for c in combos])
+
+    for column, _, fill in table.arithmetic:
+        samples = [0.0, 0.42, 29.5, 80.0, 512.33]
+        if not math.isnan(fill):
+            samples.append(np.nan)
+        columns[column] = np.resize(np.array(samples), n_rows)
+
+    return columns
+
+
+def parity_error(pipeline, compiled, X) -> float:
+    """
+    Largest absolute difference between the pipeline's and a compiled
+    (CompiledModel or TableModel) model's positive-class probability on X
+    (a DataFrame). Label disagreements are reported as 1.0.
+    """
+    expected = pipeline.predict_proba(X)[:, 1]
+    actual = compiled.predict_proba(X)[:, 1]
+    if not np.array_equal(pipeline.predict(X), compiled.predict(X)):
+        return 1.0
+    return float(np.max(np.abs(expected - actual), initial=0.0))
+
+
+def _linear_model_coef(model) -> np.ndarray:
+    """
+    Coefficient vector of a supported binary logistic classifier
+    """
+    kind = type(model).__name__
+    if kind not in SUPPORTED_MODELS:
+        raise ValueError(f"Unsupported model type '{kind}'")
+    if kind == "SGDClassifier" and model.loss != "log_loss":
+        raise ValueError("SGDClassifier must use loss='log_loss'")
+    if len(model.classes_) != 2 or np.shape(model.coef_)[0] != 1:
+        raise ValueError("Only binary classifiers can be compiled")
+    return np.asarray(model.coef_[0], dtype=np.float64)
+
+
+def _branch_steps(transformer) -> list:
+    """
+    Flatten a ColumnTransformer branch into its list of steps
+    """
+    if isinstance(transformer, str) and transformer == "passthrough":
+        return []
+    if hasattr(transformer, "steps"):
+        return [
+            step
+            for _, step in transformer.steps
+            if step is not None and not isinstance(step, str)
+        ]
+    return [transformer]
+
+
+def _check_imputer(imputer):
+    """
+    Only NaN-imputation without indicator columns is reproduced
+    """
+    missing = imputer.missing_values
+    if not (isinstance(missing, float) and math.isnan(missing)):
+        raise ValueError("SimpleImputer must impute NaN values")
+    if imputer.add_indicator:
+        raise ValueError("SimpleImputer with add_indicator is not supported")
+
+
+def _check_encoder(encoder):
+    """
+    Only plain one-hot encoding that ignores unknown categories is reproduced
+    """
+    if encoder.handle_unknown != "ignore":
+        raise ValueError("OneHotEncoder must use handle_unknown='ignore'")
+    if encoder.min_frequency is not None or encoder.max_categories is not None:
+        raise ValueError("OneHotEncoder with infrequent categories is not supported")
+
+
+def _category_key(category):
+    """
+    Map the encoder's missing-value category to None, keep the rest as is
+    """
+    if category is None or (isinstance(category, float) and math.isnan(category)):
+        return None
+    if isinstance(category, np.generic):
+        return category.item()
+    return category
+
+
+def _is_missing(values: np.ndarray) -> np.ndarray:
+    """
+    Elementwise None/NaN mask that also works on object arrays
+    """
+    if values.dtype.kind == "f":
+        return np.isnan(values)
+    if values.dtype.kind != "O":
+        return np.zeros(values.shape, dtype=bool)
+    return np.fromiter(
+        (value is None or value != value for value in values),
+        dtype=bool,
+        count=len(values),
+    )
+
+
+def _codes(values: np.ndarray, domain: list) -> np.ndarray:
+    """
+    Position of every value in ``domain`` (None matching missing values),
+    -1 for values outside it
+    """
+    if values.dtype.kind == "O":
+        # one dict lookup per value, then only the unmatched ones are
+        # checked for NaN (which never equals the None key)
+        lookup = {member: index for index, member in enumerate(domain)}
+        codes = np.fromiter(
+            map(lookup.get, values, itertools.repeat(-1)),
+            dtype=np.intp,
+            count=len(values),
+        )
+        if None in lookup:
+            unmatched = np.flatnonzero(codes < 0)
+            codes[unmatched[_is_missing(values[unmatched])]] = lookup[None]
+        return codes
+
+    codes = np.full(len(values), -1, dtype=np.intp)
+    for index, member in enumerate(domain):
+        if member is None:
+            codes[_is_missing(values)] = index
+        else:
+            codes[values == member] = index
+    return codes
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    """
+    Numerically stable logistic function
+    """
+    return np.exp(-np.logaddexp(0.0, -z))
@@ -1,18 +1,465 @@
 """
 Module for evaluating the accuracy and metrics of the trained model
+
+``evaluate`` scores the model saved at MODEL_PATH on the held-out test
+split and returns a JSON-friendly report with:
+
+- accuracy, precision, recall, F1, ROC-AUC, Brier score and expected
+  calibration error at the model's decision threshold, plus a reliability
+  table;
+- bootstrap confidence intervals for each of them. A resample is drawn as
+  the number of times every test row is picked, so a block of resamples
+  is one (resamples, rows) weight matrix and every metric is a matrix
+  product over it; no resampled frame is ever built;
+- k-fold cross-validation of the model's configuration: an unfitted clone
+  of the pipeline is fitted on each fold of the training split;
+- the latency of batch inference on the test split, with the sklearn
+  pipeline and with the configured inference engine.
+
+Bootstrap blocks and folds run in one process pool across all cores. The
+report is written next to the artifact (``titanic_pipeline.eval.json``)
+together with the artifact's SHA-256, so every model version keeps its
+own numbers:
+
+    python -m src.evaluate --folds 5 --bootstrap 1000
 """
 
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 import joblib
-from sklearn.metrics import classification_report
-from src.load import load_and_split_data
-from src.config.settings import DATASET_PATH, MODEL_PATH
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import StratifiedKFold
+from threadpoolctl import threadpool_limits
+from src.artifact import atomic_write, file_sha256, load_metadata
+from src.config.features import FEATURE_COLUMNS
+from src.config.settings import DATASET_PATH, INFERENCE_ENGINE, MODEL_PATH
+from src.load import load_and_split_cached
+from src.preprocess_cache import preprocess_cache
+from src.registry import load_engine
+from src.threshold import DEFAULT_THRESHOLD
+
+METRICS = ("accuracy", "precision", "recall", "f1", "roc_auc", "brier", "ece")
+
+# equal-width probability bins of the calibration error and reliability table
+CALIBRATION_BINS = 10
+
+# bootstrap resamples per task, fewer when their weight matrix would
+# exceed BLOCK_ENTRIES float64 entries (64MB)
+RESAMPLES_PER_BLOCK = 100
+BLOCK_ENTRIES = 1 << 23
+
+# timed batch predictions per scoring path
+LATENCY_REPEAT = 20
+
+# per worker process: what the bootstrap and fold tasks work on
+_worker_data = {}
+
+
+def evaluation_path(path) -> Path:
+    """
+    Location of the evaluation report of an artifact
+    """
+    path = Path(path)
+    return path.with_name(f"{path.stem}.eval.json")
+
+
+def resample_metrics(weights, y_true, positive_proba, threshold: float) -> dict:
+    """
+    Every metric of METRICS for each row of ``weights`` (how many times each
+    sample is counted in that resample), as arrays of length
+    ``len(weights)``. ``y_true`` holds 1 for the positive class.
+    """
+    weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    y = np.asarray(y_true, dtype=np.float64)
+    proba = np.asarray(positive_proba, dtype=np.float64)
+    predicted = (proba > threshold).astype(np.float64)
+
+    total = weights.sum(axis=1)
+    positives = weights @ y
+    predicted_positives = weights @ predicted
+    true_positives = weights @ (y * predicted)
+
+    # per calibration bin: counted rows, positives and summed probabilities
+    bins = np.minimum((proba * CALIBRATION_BINS).astype(np.intp), CALIBRATION_BINS - 1)
+    one_hot = np.zeros((len(proba), CALIBRATION_BINS))
+    one_hot[np.arange(len(proba)), bins] = 1.0
+    bin_rows = weights @ one_hot
+    bin_positives = weights @ (one_hot * y[:, np.newaxis])
+    bin_proba = weights @ (one_hot * proba[:, np.newaxis])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "accuracy": (weights @ (y == predicted).astype(np.float64)) / total,
+            "precision": true_positives / predicted_positives,
+            "recall": true_positives / positives,
+            "f1": 2 * true_positives / (positives + predicted_positives),
+            "roc_auc": _weighted_auc(weights, y, proba),
+            "brier": (weights @ (proba - y) ** 2) / total,
+            "ece": np.abs(bin_positives - bin_proba).sum(axis=1) / total,
+            "calibration": (bin_rows, bin_positives, bin_proba),
+        }
+
+
+def evaluate(
+    model_path=MODEL_PATH,
+    dataset_path=DATASET_PATH,
+    folds: int = 5,
+    bootstrap: int = 1000,
+    confidence: float = 0.95,
+    max_workers=None,
+    seed: int = 42,
+    engine: str = INFERENCE_ENGINE,
+) -> dict:
+    """
+    Evaluate the model at ``model_path`` on the dataset, write the report
+    next to the artifact and return it.
+
+    ``folds=0`` skips the cross-validation and ``bootstrap=0`` the
+    confidence intervals. Metrics are taken at the decision threshold
+    stored with the model.
+    """
+    start = time.perf_counter()
+    sha256 = file_sha256(model_path)
+    pipeline = joblib.load(model_path)
+    tuning = load_metadata(model_path, sha256).get("threshold") or {}
+    threshold = float(tuning.get("threshold", DEFAULT_THRESHOLD))
+
+    X_train, X_test, y_train, y_test = load_and_split_cached(dataset_path)
+    negative_class, positive_class = pipeline.classes_
+
+    # the test split's preprocessed matrix is cached on disk per model
+    X_transformed = preprocess_cache.transform(pipeline[:-1], X_test)
+    positive = pipeline[-1].predict_proba(X_transformed)[:, 1]
+    is_positive = (y_test.to_numpy() == positive_class).astype(np.float64)
+
+    point = resample_metrics(np.ones(len(positive)), is_positive, positive, threshold)
+    report = {
+        "model_path": str(model_path),
+        "sha256": sha256,
+        "version": sha256[:12],
+        "created_at": time.time(),
+        "threshold": threshold,
+        "classes": [negative_class.item(), positive_class.item()],
+        "train_rows": int(len(X_train)),
+        "test_rows": int(len(X_test)),
+        "metrics": {name: _number(point[name][0]) for name in METRICS},
+        "calibration": _calibration_table(point["calibration"]),
+    }
+
+    # bootstrap blocks and folds share one pool
+    max_workers = max_workers or os.cpu_count() or 1
+    tasks = [
+        ("bootstrap", block_seed, size)
+        for block_seed, size in _bootstrap_blocks(bootstrap, len(positive), seed)
+    ]
+    if folds:
+        splits = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+        tasks += [
+            ("fold", train_index, test_index)
+            for train_index, test_index in splits.split(X_train, y_train)
+        ]
+    data = {
+        "pipeline": pipeline,
+        "threshold": threshold,
+        "is_positive": is_positive,
+        "positive": positive,
+        "X_train": X_train,
+        "y_train": y_train,
+    }
+    outcomes = _run_tasks(tasks, data, max_workers)
+
+    resamples = [values for kind, values in outcomes if kind == "bootstrap"]
+    if resamples:
+        report["bootstrap"] = _intervals(resamples, confidence)
+    fold_scores = [values for kind, values in outcomes if kind == "fold"]
+    if fold_scores:
+        report["cross_validation"] = {
+            "folds": folds,
+            **{
+                name: {
+                    "mean": _number(np.nanmean([s[name] for s in fold_scores])),
+                    "std": _number(np.nanstd([s[name] for s in fold_scores])),
+                }
+                for name in METRICS
+            },
+        }
+
+    report["latency"] = _batch_latency(pipeline, X_test, engine)
+    report["settings"] = {
+        "folds": folds,
+        "bootstrap": bootstrap,
+        "confidence": confidence,
+        "seed": seed,
+        "workers": min(max_workers, len(tasks)) if tasks else 0,
+    }
+    report["seconds"] = time.perf_counter() - start
+
+    atomic_write(
+        evaluation_path(model_path),
+        lambda tmp_path: Path(tmp_path).write_text(
+            json.dumps(report, indent=2), encoding="utf-8"
+        ),
+    )
+    return report
+
+
+def load_evaluation(model_path=MODEL_PATH):
+    """
+    The evaluation report of the artifact currently at ``model_path``, or
+    None when it has not been evaluated since it was written
+    """
+    try:
+        report = json.loads(evaluation_path(model_path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return report if report.get("sha256") == file_sha256(model_path) else None
+
+
+def format_report(report: dict) -> str:
+    """
+    Plain-text summary of an evaluation report
+    """
+    bootstrap = report.get("bootstrap", {})
+    cross_validation = report.get("cross_validation", {})
+    lines = [
+        f"Model {report['version']} at threshold {report['threshold']:.4f}, "
+        f"{report['test_rows']} test rows",
+        f"{'metric':<10} {'value':>8} {'interval':>19} {'cross-validated':>19}",
+    ]
+    for name in METRICS:
+        interval = bootstrap.get(name)
+        folds = cross_validation.get(name)
+        lines.append(
+            f"{name:<10} {_fixed(report['metrics'][name]):>8} "
+            f"{_fixed_range(interval and (interval['low'], interval['high'])):>19} "
+            f"{_fixed_range(folds and (folds['mean'], folds['std']), '±'):>19}"
+        )
+    latency = report["latency"]
+    lines.append(
+        f"batch inference: pipeline {latency['pipeline_seconds'] * 1e3:.2f}ms, "
+        f"{latency['engine']} {latency['engine_seconds'] * 1e3:.2f}ms "
+        f"for {latency['rows']} rows"
+    )
+    return "\n".join(lines)
+
+
+def _bootstrap_blocks(resamples: int, rows: int, seed: int):
+    """
+    (seed, resamples) of the blocks the bootstrap is split into. Blocks
+    depend only on the sizes and ``seed``, so the intervals do not change
+    with the number of workers.
+    """
+    size = max(1, min(RESAMPLES_PER_BLOCK, BLOCK_ENTRIES // max(rows, 1)))
+    n_blocks = math.ceil(max(resamples, 0) / size)
+    seeds = np.random.SeedSequence(seed).spawn(n_blocks)
+    return [
+        (block_seed, min(size, resamples - index * size))
+        for index, block_seed in enumerate(seeds)
+    ]
+
+
+def _run_tasks(tasks: list, data: dict, max_workers: int) -> list:
+    """
+    Run the bootstrap and fold tasks, in a process pool when there is more
+    than one worker
+    """
+    if max_workers <= 1 or len(tasks) <= 1:
+        _worker_data.update(data)
+        try:
+            return [_run_task(task) for task in tasks]
+        finally:
+            _worker_data.clear()
+
+    # spawn instead of fork: the API process that may run this has threads
+    with ProcessPoolExecutor(
+        max_workers=min(max_workers, len(tasks)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(data,),
+    ) as executor:
+        return list(executor.map(_run_task, tasks))
+
+
+def _init_worker(data: dict):
+    """
+    Pool initializer: receive the data once per worker and keep the
+    estimators single-threaded, the pool already uses every core
+    """
+    _worker_data.update(data)
+    threadpool_limits(1)
+
+
+def _run_task(task: tuple) -> tuple:
+    """
+    One bootstrap block (metric arrays of its resamples) or one fold
+    (metrics of the clone fitted on the other folds)
+    """
+    kind = task[0]
+    threshold = _worker_data["threshold"]
+
+    if kind == "bootstrap":
+        _, block_seed, size = task
+        is_positive, positive = _worker_data["is_positive"], _worker_data["positive"]
+        rows = len(positive)
+        weights = np.random.default_rng(block_seed).multinomial(
+            rows, np.full(rows, 1.0 / rows), size=size
+        )
+        metrics = resample_metrics(weights, is_positive, positive, threshold)
+        return kind, {name: metrics[name] for name in METRICS}
+
+    _, train_index, test_index = task
+    X, y = _worker_data["X_train"], _worker_data["y_train"]
+    model = clone(_worker_data["pipeline"])
+    model.fit(X.iloc[train_index], y.iloc[train_index])
+    positive = model.predict_proba(X.iloc[test_index])[:, 1]
+    is_positive = y.iloc[test_index].to_numpy() == model.classes_[1]
+    metrics = resample_metrics(np.ones(len(positive)), is_positive, positive, threshold)
+    return kind, {name: float(metrics[name][0]) for name in METRICS}
+
+
+def _intervals(blocks: list, confidence: float) -> dict:
+    """
+    Percentile confidence interval, mean and standard error of every
+    metric over the bootstrap resamples
+    """
+    tail = (1.0 - confidence) / 2 * 100
+    intervals = {}
+    for name in METRICS:
+        values = np.concatenate([block[name] for block in blocks])
+        low, high = np.nanpercentile(values, [tail, 100 - tail])
+        intervals[name] = {
+            "low": _number(low),
+            "high": _number(high),
+            "mean": _number(np.nanmean(values)),
+            "std": _number(np.nanstd(values)),
+        }
+    intervals["resamples"] = int(sum(len(block["accuracy"]) for block in blocks))
+    intervals["confidence"] = confidence
+    return intervals
+
+
+def _batch_latency(pipeline, X_test, engine: str) -> dict:
+    """
+    Median seconds of one batch prediction over the test split, through
+    the sklearn pipeline and the configured inference engine
+    """
+    columns = {column: X_test[column].to_numpy() for column in FEATURE_COLUMNS}
+    compiled = None if engine == "pipeline" else load_engine(pipeline, engine)
+    paths = {"pipeline": lambda: pipeline.predict_proba(X_test)}
+    if compiled is not None:
+        paths["engine"] = lambda: compiled.predict_proba(columns)
+
+    seconds = {}
+    for name, predict in paths.items():
+        predict()
+        timings = []
+        for _ in range(LATENCY_REPEAT):
+            batch_start = time.perf_counter()
+            predict()
+            timings.append(time.perf_counter() - batch_start)
+        seconds[name] = float(np.median(timings))
+
+    return {
+        "rows": int(len(X_test)),
+        "pipeline_seconds": seconds["pipeline"],
+        "engine": "pipeline" if compiled is None else engine,
+        "engine_seconds": seconds.get("engine", seconds["pipeline"]),
+    }
+
+
+def _calibration_table(calibration: tuple) -> list:
+    """
+    Reliability table of the test split: per probability bin, the rows,
+    their mean predicted probability and observed positive rate
+    """
+    bin_rows, bin_positives, bin_proba = (values[0] for values in calibration)
+    table = []
+    for index in range(CALIBRATION_BINS):
+        rows = bin_rows[index]
+        table.append(
+            {
+                "bin": [index / CALIBRATION_BINS, (index + 1) / CALIBRATION_BINS],
+                "rows": int(rows),
+                "mean_probability": _number(bin_proba[index] / rows) if rows else None,
+                "positive_rate": _number(bin_positives[index] / rows) if rows else None,
+            }
+        )
+    return table
+
+
+def _number(value):
+    """
+    A metric as a JSON number, or None when it is undefined (NaN)
+    """
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def _fixed(value) -> str:
+    """
+    A metric with four decimals, or "-" when undefined
+    """
+    return "-" if value is None else f"{value:.4f}"
+
+
+def _fixed_range(pair, separator: str = "-") -> str:
+    """
+    Two metrics joined by ``separator``, or "-" when missing
+    """
+    if not pair or None in pair:
+        return "-"
+    return f"{pair[0]:.4f} {separator} {pair[1]:.4f}"
+
+
+def _weighted_auc(weights: np.ndarray, y: np.ndarray, proba: np.ndarray):
+    """
+    ROC-AUC of each row of ``weights``: the weighted Mann-Whitney
+    statistic, with the samples sorted once and tied probabilities counted
+    as half
+    """
+    order = np.argsort(proba, kind="stable")
+    sorted_proba, sorted_y = proba[order], y[order]
+    groups = np.flatnonzero(np.r_[True, np.diff(sorted_proba) != 0])
+    sorted_weights = weights[:, order]
+    group_positives = np.add.reduceat(sorted_weights * sorted_y, groups, axis=1)
+    group_negatives = np.add.reduceat(sorted_weights * (1 - sorted_y), groups, axis=1)
+    negatives_below = np.cumsum(group_negatives, axis=1) - group_negatives
+    pairs = group_positives.sum(axis=1) * group_negatives.sum(axis=1)
+    wins = (group_positives * (negatives_below + 0.5 * group_negatives)).sum(axis=1)
+    return wins / pairs
 
-pipeline = joblib.load(MODEL_PATH)
 
-X_train, X_test, y_train, y_test = load_and_split_data(DATASET_PATH)
+def main():
+    """
+    Evaluate the model and print the summary
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--model", default=MODEL_PATH, help="model artifact")
+    parser.add_argument("--folds", type=int, default=5, help="0 skips k-fold")
+    parser.add_argument("--bootstrap", type=int, default=1000, help="resamples")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--workers", type=int, help="processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
 
-predictions = pipeline.predict(X_test)
+    report = evaluate(
+        args.model,
+        folds=args.folds,
+        bootstrap=args.bootstrap,
+        confidence=args.confidence,
+        max_workers=args.workers,
+        seed=args.seed,
+    )
+    print(format_report(report))
+    print(f"\nReport written to {evaluation_path(args.model)}")
 
-model_metrics = classification_report(y_test, predictions)
 
-print(f"Classification Report: {model_metrics}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Background training jobs
+
+Training runs in a separate process so it never shares the GIL with the
+serving threads. Jobs are tracked in memory by id so clients can poll for
+their status, metrics and duration.
+"""
+
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from src.artifact import metadata_path
+from src.compact import compact_path
+from src.config.settings import MODEL_PATH
+from src.metrics import TRAINING_RUNS, TRAINING_STEP_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# finished jobs kept around for polling before the oldest are forgotten
+MAX_FINISHED_JOBS = 100
+
+
+class JobLimitReached(Exception):
+    """
+    Raised when a job is submitted while the concurrency cap is reached
+    """
+
+
+def run_training(mode: str = "full", model_path=MODEL_PATH) -> dict:
+    """
+    Entry point executed in the worker process: train the model and save it
+    to ``model_path``, returning only picklable, JSON friendly results.
+
+    ``mode`` is "full" (in-memory ``src.train``), "streaming"
+    (out-of-core ``src.stream_train``), "search" (cross-validated model
+    search in ``src.search``, which keeps the best candidate) or
+    "incremental" (an update of the current model with the rows at
+    INCREMENTAL_DATA_PATH, ``src.incremental``). An update starts from a
+    copy of the model at MODEL_PATH when ``model_path`` is another path.
+    """
+    # imported here so the API process does not load training code for it
+    # pylint: disable=import-outside-toplevel
+    if mode == "streaming":
+        from src.stream_train import train_streaming as train
+    elif mode == "search":
+        from src.search import train_search as train
+    elif mode == "incremental":
+        from src.incremental import update_incremental as train
+
+        if Path(model_path) != Path(MODEL_PATH):
+            copy_artifact(MODEL_PATH, model_path)
+    else:
+        from src.train import train
+
+    result = train(model_path=model_path)
+    return {
+        "success": result["success"],
+        "metrics": result["metrics"],
+        "error": result["error"],
+    }
+
+
+class TrainingJobs:
+    """
+    In-memory queue of training jobs executed by a process pool.
+
+    Parameters
+    ----------
+    max_concurrent : int
+        Number of worker processes, and the number of jobs allowed to run
+        at once. Submitting beyond it raises JobLimitReached.
+    on_success : callable, optional
+        Called with the path the job saved its model to, after a job has
+        succeeded. What it returns is recorded as the job's ``model_version``.
+    model_path : Path, optional
+        When given, every job trains into a path of its own next to it (see
+        ``job_model_path``), passed to the target as ``model_path``, so
+        concurrent jobs never overwrite each other's artifact. The artifact
+        of a failed job is removed.
+    """
+
+    def __init__(self, max_concurrent: int, on_success=None, model_path=None):
+        self.max_concurrent = max_concurrent
+        self.on_success = on_success
+        self.model_path = model_path
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def submit(self, *args, target=run_training) -> dict:
+        """
+        Start a training job, ``target(*args)`` in a worker process, and
+        return its status record
+        """
+        with self._lock:
+            running = sum(
+                1 for job in self._jobs.values() if job["status"] == "running"
+            )
+            if running >= self.max_concurrent:
+                raise JobLimitReached(
+                    f"{running} training jobs already running "
+                    f"(limit {self.max_concurrent})"
+                )
+
+            if self._executor is None:
+                # spawn instead of fork: the API process runs threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_concurrent,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+
+            job_id = uuid.uuid4().hex
+            kwargs = {}
+            if self.model_path is not None:
+                kwargs["model_path"] = str(job_model_path(self.model_path, job_id))
+            job = {
+                "id": job_id,
+                "args": list(args),
+                "model_path": kwargs.get("model_path"),
+                "status": "running",
+                "submitted_at": time.time(),
+                "finished_at": None,
+                "duration_seconds": None,
+                "metrics": None,
+                "error": None,
+                "model_version": None,
+            }
+            future = self._executor.submit(target, *args, **kwargs)
+            self._jobs[job["id"]] = job
+
+        future.add_done_callback(lambda done: self._finish(job["id"], done))
+        return dict(job)
+
+    def get(self, job_id: str):
+        """
+        Status record of a job, or None for an unknown id
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return None if job is None else dict(job)
+
+    def shutdown(self):
+        """
+        Stop the worker processes without waiting for running jobs
+        """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _finish(self, job_id: str, future):
+        """
+        Record the outcome of a finished job
+        """
+        broken = False
+        try:
+            result = future.result()
+        except Exception as e:  # pylint: disable=broad-except
+            # the worker process died or the job could not be pickled
+            broken = isinstance(e, BrokenProcessPool)
+            result = {"success": False, "metrics": None, "error": repr(e)}
+
+        with self._lock:
+            if broken and self._executor is not None:
+                # a dead worker poisons the pool, start a fresh one next time
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            job = self._jobs[job_id]
+            job["finished_at"] = time.time()
+            job["duration_seconds"] = job["finished_at"] - job["submitted_at"]
+            job["status"] = "succeeded" if result["success"] else "failed"
+            job["metrics"] = result["metrics"]
+            job["error"] = result["error"]
+            self._forget_old_jobs()
+
+        _record_job_metrics(job)
+
+        if not result["success"]:
+            if job["model_path"] is not None:
+                remove_artifact(job["model_path"])
+        elif self.on_success is not None:
+            try:
+                version = self.on_success(job["model_path"])
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Post-training hook failed for job %s", job_id)
+            else:
+                with self._lock:
+                    job["model_version"] = version
+
+    def _forget_old_jobs(self):
+        """
+        Drop the oldest finished jobs beyond MAX_FINISHED_JOBS
+        """
+        finished = [
+            job_id for job_id, job in self._jobs.items() if job["status"] != "running"
+        ]
+        for job_id in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+
+def job_model_path(model_path, job_id: str) -> Path:
+    """
+    Path a job trains into: ``model_path`` with the job id before its
+    suffix, in the same directory so it can be renamed over ``model_path``
+    """
+    model_path = Path(model_path)
+    return model_path.with_name(f"{model_path.stem}.{job_id}{model_path.suffix}")
+
+
+def artifact_files(path) -> list:
+    """
+    The files of the artifact at ``path``: its metadata sidecar and its
+    compact export, then the pickle itself, in the order they are saved
+    """
+    return [metadata_path(path), compact_path(path), Path(path)]
+
+
+def copy_artifact(source, target):
+    """
+    Copy the existing files of the artifact at ``source`` to ``target``
+    """
+    for source_file, target_file in zip(artifact_files(source), artifact_files(target)):
+        if source_file.exists():
+            shutil.copyfile(source_file, target_file)
+
+
+def move_artifact(source, target):
+    """
+    Rename the artifact at ``source`` over ``target``. The companions go
+    first and the pickle last, the order they are saved in; a companion
+    ``source`` lacks is removed from ``target`` rather than left describing
+    the replaced pickle.
+    """
+    *companions, pickle = zip(artifact_files(source), artifact_files(target))
+    for source_file, target_file in companions:
+        if source_file.exists():
+            os.replace(source_file, target_file)
+        else:
+            target_file.unlink(missing_ok=True)
+    os.replace(*pickle)
+
+
+def remove_artifact(path):
+    """
+    Remove the files of the artifact at ``path`` that exist
+    """
+    for file in artifact_files(path):
+        file.unlink(missing_ok=True)
+
+
+def _record_job_metrics(job: dict):
+    """
+    Count a finished job and record its duration and the step timings
+    (every ``*_seconds`` entry of its metrics) by training mode
+    """
+    mode = job["args"][0] if job["args"] else "full"
+    TRAINING_RUNS.inc(mode=mode, status=job["status"])
+    TRAINING_STEP_SECONDS.observe(job["duration_seconds"], mode=mode, step="total")
+    for key, value in (job["metrics"] or {}).items():
+        if key.endswith("_seconds") and isinstance(value, (int, float)):
+            step = key[: -len("_seconds")]
+            TRAINING_STEP_SECONDS.observe(value, mode=mode, step=step)
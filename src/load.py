@@ -4,26 +4,79 @@ set's up the features, and separate the data into
 training and testing features
 """
 
+import os
+from functools import lru_cache
 from pathlib import Path
-from sklearn.model_selection import train_test_split
 import pandas as pd
+from sklearn.model_selection import train_test_split
+from src.config.features import DATASET_DTYPES, FEATURE_COLUMNS, TARGET_COLUMN
+from src.config.settings import DATASET_CACHE_DIR
+from src.dataset_cache import read_dataset
 
 
-def load_and_split_data(path: Path):
+def load_and_split_data(path: Path, cache_dir=DATASET_CACHE_DIR):
     """
     Function that takes in a path to the dataset as a param
     separates the features into classes, as well as the target,
     and then splits the data into its training and testing sections
+
+    Only the feature and target columns are read, with explicit dtypes, and
+    local files go through the columnar cache in ``cache_dir``.
     """
 
-    df = pd.read_csv(path)
+    columns = [*FEATURE_COLUMNS, TARGET_COLUMN]
+    df = read_dataset(path, columns, DATASET_DTYPES, cache_dir)
 
     # define X related values
-    feature_columns = ["Age", "Fare", "Sex", "Pclass", "Embarked", "SibSp", "Parch"]
-    x = df[feature_columns]
+    x = df[FEATURE_COLUMNS]
 
     # define the target y
-    y = df["Survived"]
+    y = df[TARGET_COLUMN]
 
     # split the data into its testing and training sections
     return train_test_split(x, y, test_size=0.2, random_state=42)
+
+
+def iter_dataset_chunks(path, chunk_size: int):
+    """
+    Stream the feature and target columns of the dataset as DataFrames of
+    at most ``chunk_size`` rows, with the same dtypes as load_and_split_data
+    """
+    columns = [*FEATURE_COLUMNS, TARGET_COLUMN]
+    with pd.read_csv(
+        path, usecols=columns, dtype=DATASET_DTYPES, chunksize=chunk_size
+    ) as reader:
+        for chunk in reader:
+            yield chunk[columns]
+
+
+def source_version(path) -> tuple:
+    """
+    Identify the current content of a dataset source: local files by their
+    modification time and size, remote paths (e.g. hf://) by path alone
+    """
+    try:
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        return (str(path), None, None)
+    return (str(path), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=4)
+def _load_and_split_version(version: tuple):
+    """
+    Cached worker of load_and_split_cached, keyed on source_version()
+    """
+    return load_and_split_data(version[0])
+
+
+def load_and_split_cached(path):
+    """
+    Load and split the dataset once per process and source version.
+
+    This is the explicit loading step for training and evaluation; nothing
+    reads the dataset at import time. Repeated runs in the same process
+    (e.g. several /train jobs in one worker) reuse the split until the file
+    changes. The returned frames are shared and must not be modified.
+    """
+    return _load_and_split_version(source_version(path))
@@ -0,0 +1,320 @@
+"""
+Versioned model store: several artifacts served side by side
+
+Publishing copies an artifact, with its metadata sidecar and compact
+export, into its own directory of the store. The directory is named after
+the artifact's version, the first 12 hex digits of its SHA-256, as in the
+registry. A published version never changes, so each one is loaded once,
+on first use, by its own ModelRegistry.
+
+The routing lives in ``routing.json`` in the store. It names the version
+that answers /predict (the primary) and the candidate version that
+shadow-scores a fraction of the traffic (``src/shadow.py``). Without a
+primary, the artifact at MODEL_PATH answers, hot-reloaded as before.
+Every API worker polls the routing file along with the artifact, so a
+routing change made through one worker reaches all of them.
+
+Loaded versions are kept in LRU order. Beyond ``max_loaded``, the least
+recently used version that is neither primary nor candidate is dropped,
+and its memory is reclaimed once the requests still using it finish.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple, Optional
+from src.artifact import atomic_write, file_sha256, metadata_path
+from src.compact import compact_path, read_compact
+from src.registry import LoadedModel, ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+ROUTING_FILE = "routing.json"
+
+VERSION_PATTERN = re.compile(r"[0-9a-f]{12}")
+
+
+class Routing(NamedTuple):
+    """
+    Which versions serve: ``primary`` answers /predict (None for the
+    artifact at MODEL_PATH), ``candidate`` also scores a
+    ``shadow_fraction`` of the calls
+    """
+
+    primary: Optional[str] = None
+    candidate: Optional[str] = None
+    shadow_fraction: float = 0.0
+
+
+class ModelStore:
+    """
+    Published model versions under one directory, loaded on demand.
+
+    Parameters
+    ----------
+    directory : Path
+        Root of the store, created on the first publish.
+    engine, artifact_format, schema, warmup_rows
+        Passed on to the ModelRegistry of every version.
+    max_loaded : int, default=3
+        Versions kept loaded at once, not counting the primary and the
+        candidate, which are never dropped.
+    default_routing : Routing, optional
+        Routing used until the store holds a routing file.
+    """
+
+    def __init__(
+        self,
+        directory,
+        engine: str = "compiled",
+        artifact_format="pickle",
+        max_loaded: int = 3,
+        schema=None,
+        warmup_rows: int = 0,
+        default_routing: Routing = Routing(),
+    ):
+        self.directory = Path(directory)
+        self.engine = engine
+        self.artifact_format = artifact_format
+        self.max_loaded = max_loaded
+        self.schema = schema
+        self.warmup_rows = warmup_rows
+        self.routing = default_routing
+        self._routing_mtime = None
+        self._loaded = OrderedDict()
+        # versions of a routing being switched to, pinned like the routed ones
+        self._incoming = set()
+        self._lock = threading.Lock()
+
+    def publish(self, model_path) -> str:
+        """
+        Copy the artifact at ``model_path`` into the store and return its
+        version. Publishing an artifact that is already stored does nothing.
+
+        The files are copied into a temporary directory, and that copy is
+        hashed and renamed into place. So a version always holds the bytes
+        it is named after, even if ``model_path`` is replaced meanwhile.
+        The sidecar and the compact export are kept only if they describe
+        the copied artifact.
+        """
+        model_path = Path(model_path)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        staging = self.directory / f".publish.{uuid.uuid4().hex}"
+        staging.mkdir()
+        try:
+            artifact = staging / model_path.name
+            shutil.copyfile(model_path, artifact)
+            sha256 = file_sha256(artifact)
+            for source, target in (
+                (metadata_path(model_path), metadata_path(artifact)),
+                (compact_path(model_path), compact_path(artifact)),
+            ):
+                if source.exists():
+                    shutil.copyfile(source, target)
+            _drop_stale_companions(artifact, sha256)
+
+            version = sha256[:12]
+            target = self.directory / version
+            try:
+                os.replace(staging, target)
+            except OSError:
+                # already published, possibly by a concurrent publish
+                if not target.is_dir():
+                    raise
+                return version
+            logger.info("Published model version %s from %s", version, model_path)
+            return version
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def versions(self) -> list:
+        """
+        The published versions, oldest first, with when they were
+        published, whether they are loaded and their training lineage
+        """
+        if not self.directory.exists():
+            return []
+
+        with self._lock:
+            loaded = set(self._loaded)
+        published = []
+        for entry in self.directory.iterdir():
+            if not VERSION_PATTERN.fullmatch(entry.name):
+                continue
+            metadata = _read_json(metadata_path(self._artifact(entry.name)))
+            published.append(
+                {
+                    "version": entry.name,
+                    "published_at": entry.stat().st_mtime,
+                    "loaded": entry.name in loaded,
+                    "lineage": metadata.get("lineage"),
+                }
+            )
+        return sorted(published, key=lambda item: item["published_at"])
+
+    def exists(self, version: str) -> bool:
+        """
+        Whether ``version`` has been published
+        """
+        return bool(VERSION_PATTERN.fullmatch(version or "")) and (
+            self.directory / version
+        ).is_dir()
+
+    def is_loaded(self, version: str) -> bool:
+        """
+        Whether ``version`` is loaded and ready to score
+        """
+        with self._lock:
+            registry = self._loaded.get(version)
+        return registry is not None and registry.loaded
+
+    def get(self, version: str) -> LoadedModel:
+        """
+        The loaded model of a published version, loading (and verifying)
+        it first if needed. Raises FileNotFoundError for an unknown version.
+        """
+        with self._lock:
+            registry = self._loaded.get(version)
+            if registry is None:
+                if not self.exists(version):
+                    raise FileNotFoundError(f"No published model version {version}")
+                registry = ModelRegistry(
+                    self._artifact(version),
+                    engine=self.engine,
+                    artifact_format=self.artifact_format,
+                    schema=self.schema,
+                    warmup_rows=self.warmup_rows,
+                )
+                self._loaded[version] = registry
+            self._loaded.move_to_end(version)
+            self._evict()
+
+        # loaded outside the store's lock: other versions keep serving
+        return registry.get()
+
+    def set_routing(self, routing: Routing) -> Routing:
+        """
+        Route to other versions: load and verify them, write the routing
+        file for every worker and apply it here right away. Raises
+        FileNotFoundError for an unknown version and ValueError for one
+        that fails verification, leaving the routing as it was.
+        """
+        if not 0.0 <= routing.shadow_fraction <= 1.0:
+            raise ValueError("shadow_fraction must be between 0 and 1")
+        self._load_routed(routing)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        atomic_write(
+            self.directory / ROUTING_FILE,
+            lambda tmp_path: Path(tmp_path).write_text(
+                json.dumps(routing._asdict(), indent=2), encoding="utf-8"
+            ),
+        )
+        self.routing = routing
+        return routing
+
+    def refresh(self) -> bool:
+        """
+        Re-read the routing file if it changed, loading the versions it
+        routes to before switching to them, so requests never wait for a
+        load. If loading fails, the routing stays as it was and the next
+        refresh tries again. Returns True if the routing changed.
+        """
+        path = self.directory / ROUTING_FILE
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            mtime = None
+
+        routing = self.routing
+        if mtime is not None and mtime != self._routing_mtime:
+            routing = _parse_routing(_read_json(path))
+        self._load_routed(routing)
+
+        changed = routing != self.routing
+        if changed:
+            logger.info("Model routing changed to %s", routing)
+        self.routing = routing
+        self._routing_mtime = mtime
+        return changed
+
+    def _load_routed(self, routing: Routing):
+        """
+        Load the versions ``routing`` names, keeping them from eviction
+        while the current routing is still in place
+        """
+        versions = {routing.primary, routing.candidate} - {None}
+        with self._lock:
+            self._incoming = versions
+        try:
+            for version in versions:
+                self.get(version)
+        finally:
+            with self._lock:
+                self._incoming = set()
+
+    def _artifact(self, version: str) -> Path:
+        """
+        The artifact of a published version, the one pickle in its directory
+        """
+        return next((self.directory / version).glob("*.pkl"))
+
+    def _evict(self):
+        """
+        Drop the least recently used versions beyond ``max_loaded``, never
+        the primary or the candidate
+        """
+        pinned = {self.routing.primary, self.routing.candidate} | self._incoming
+        evictable = [version for version in self._loaded if version not in pinned]
+        for version in evictable[: max(0, len(evictable) - self.max_loaded)]:
+            del self._loaded[version]
+            logger.info("Unloaded model version %s", version)
+
+
+def _drop_stale_companions(artifact: Path, sha256: str):
+    """
+    Remove a copied sidecar or compact export that describes another
+    artifact, since the registry would refuse to load the version with it
+    """
+    sidecar = metadata_path(artifact)
+    if sidecar.exists() and _read_json(sidecar).get("sha256") != sha256:
+        sidecar.unlink()
+
+    compact = compact_path(artifact)
+    if compact.exists():
+        try:
+            source = read_compact(compact)[1].get("source_sha256")
+        except ValueError:
+            source = None
+        if source != sha256:
+            compact.unlink()
+
+
+def _parse_routing(content: dict) -> Routing:
+    """
+    The routing described by the content of a routing file
+    """
+    try:
+        return Routing(
+            primary=content.get("primary"),
+            candidate=content.get("candidate"),
+            shadow_fraction=float(content.get("shadow_fraction", 0.0)),
+        )
+    except (AttributeError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid model routing file: {e}") from e
+
+
+def _read_json(path: Path) -> dict:
+    """
+    A JSON file's content, or an empty dict when it is missing or unreadable
+    """
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
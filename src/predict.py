@@ -2,20 +2,350 @@
 Prediction module for titanic survivors
 """
 
-import joblib
+import time
+from itertools import islice
+from typing import NamedTuple
+import numpy as np
 import pandas as pd
-from src.config.settings import MODEL_PATH
+from src.config.features import FEATURE_COLUMNS, PREDICTION_DTYPES
+from src.config.settings import (
+    CANDIDATE_MODEL_VERSION,
+    DRIFT_MIN_ROWS,
+    DRIFT_PSI_THRESHOLD,
+    DRIFT_WINDOW_SECONDS,
+    INFERENCE_ENGINE,
+    MAX_LOADED_MODELS,
+    MODEL_FORMAT,
+    MODEL_PATH,
+    MODEL_STORE_DIR,
+    PREDICT_BATCH_CHUNK_SIZE,
+    PREDICTION_CACHE_SHARED_NAME,
+    PREDICTION_CACHE_SIZE,
+    PREDICTION_CACHE_TTL,
+    PRIMARY_MODEL_VERSION,
+    SHADOW_FRACTION,
+    SHADOW_MAX_PENDING_ROWS,
+    WARMUP_ROWS,
+)
+from src.drift import DriftMonitor
+from src.engine import TableModel
+from src.metrics import BATCH_ROWS, PREDICTIONS, stage
+from src.model_store import ModelStore, Routing
+from src.prediction_cache import canonical_key, make_prediction_cache
+from src.registry import ModelRegistry
+from src.shadow import ShadowScorer
 
-pipeline = joblib.load(MODEL_PATH)
+# the served model, loaded on first use instead of at import; the API sets
+# the schema models are verified and warmed up against
+registry = ModelRegistry(
+    MODEL_PATH,
+    engine=INFERENCE_ENGINE,
+    artifact_format=MODEL_FORMAT,
+    warmup_rows=WARMUP_ROWS,
+)
 
+# published model versions and the routing between them
+store = ModelStore(
+    MODEL_STORE_DIR,
+    engine=INFERENCE_ENGINE,
+    artifact_format=MODEL_FORMAT,
+    max_loaded=MAX_LOADED_MODELS,
+    warmup_rows=WARMUP_ROWS,
+    default_routing=Routing(
+        primary=PRIMARY_MODEL_VERSION or None,
+        candidate=CANDIDATE_MODEL_VERSION or None,
+        shadow_fraction=SHADOW_FRACTION,
+    ),
+)
 
-def predict(data):
+# results of the sklearn pipeline path; the compiled and table engines score
+# a row faster than a cache lookup, so they bypass the cache
+prediction_cache = make_prediction_cache(
+    PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL, PREDICTION_CACHE_SHARED_NAME
+)
+
+
+# every scored row, compared with the served model's training reference;
+# None when drift monitoring is off
+drift_monitor = (
+    DriftMonitor(DRIFT_WINDOW_SECONDS, DRIFT_PSI_THRESHOLD, DRIFT_MIN_ROWS)
+    if DRIFT_WINDOW_SECONDS > 0
+    else None
+)
+
+
+class Prediction(NamedTuple):
+    """
+    Outcome of scoring one passenger: the label at the model's decision
+    threshold and the probability it was derived from
+    """
+
+    label: int
+    probability: float
+    threshold: float
+
+
+def predict(data) -> Prediction:
     """
     Predict if a person survived on the titanic
     given the input data
     """
 
-    df = pd.DataFrame([data])
-    prediction = pipeline.predict(df)
+    model = primary_model()
+    PREDICTIONS.inc(engine=engine_name(model))
+    candidate = shadow.sample()
+    start = time.perf_counter()
+
+    probability = _predict_proba_row(model, data)
+
+    if candidate is not None:
+        scored = ([probability], time.perf_counter() - start)
+        shadow.submit(candidate, model, ([data], False), scored)
+    if drift_monitor is not None:
+        drift_monitor.observe(model, data, probability > model.threshold)
+    return _thresholded(model, probability)
+
+
+def predict_batch(
+    records, chunk_size: int = PREDICT_BATCH_CHUNK_SIZE, positional: bool = False
+) -> list:
+    """
+    Predict survival for many passengers at once.
+
+    The records (any iterable of mappings holding the feature columns, or
+    with ``positional`` of sequences holding them in FEATURE_COLUMNS order)
+    are consumed ``chunk_size`` at a time; each chunk is written into
+    preallocated NumPy columns and scored with one vectorized call, so
+    memory stays bounded by the chunk size. Results are returned in input
+    order, all scored by the same model version.
+    """
+
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer")
+
+    model = primary_model()
+    engine = engine_name(model)
+    results = []
+    records = iter(records)
+
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+
+        PREDICTIONS.inc(len(chunk), engine=engine)
+        BATCH_ROWS.observe(len(chunk))
+        candidate = shadow.sample()
+        start = time.perf_counter()
+        with stage("dataframe"):
+            columns = _columns(chunk, positional)
+            if model.engine is None:
+                columns = pd.DataFrame(columns)
+        if model.engine is not None:
+            with stage("inference"):
+                probabilities = model.engine.predict_proba(columns)[:, 1]
+        else:
+            probabilities = pipeline_predict_proba(model.pipeline, columns)[:, 1]
+        if candidate is not None:
+            scored = (probabilities, time.perf_counter() - start)
+            shadow.submit(candidate, model, (chunk, positional), scored)
+        if drift_monitor is not None:
+            drift_monitor.observe_batch(
+                model, columns, probabilities > model.threshold
+            )
+        results.extend(_thresholded(model, p) for p in probabilities.tolist())
+
+    return results
+
+
+def predict_columns(columns: dict, chunk_size: int = PREDICT_BATCH_CHUNK_SIZE):
+    """
+    Predict survival for a batch already held as validated NumPy columns
+    (see ``src/columnar.py``), yielding a (labels, probabilities) pair of
+    arrays per ``chunk_size`` rows, in input order.
+
+    Each chunk is a view of the columns, so the engines score it without
+    a copy or a Python object per row; only a model without an engine
+    (the sklearn pipeline) builds a DataFrame per chunk. All chunks are
+    scored by the same model version.
+    """
+
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer")
+
+    model = primary_model()
+    engine = engine_name(model)
+    if model.engine is not None:
+        classes = np.asarray(model.engine.classes)
+    else:
+        classes = np.asarray(model.pipeline.classes_)
+    rows = len(next(iter(columns.values()), ()))
+
+    for start in range(0, rows, chunk_size):
+        chunk = {
+            column: values[start : start + chunk_size]
+            for column, values in columns.items()
+        }
+        size = min(chunk_size, rows - start)
+        PREDICTIONS.inc(size, engine=engine)
+        BATCH_ROWS.observe(size)
+        candidate = shadow.sample()
+        begin = time.perf_counter()
+        if model.engine is not None:
+            with stage("inference"):
+                probabilities = model.engine.predict_proba(chunk)[:, 1]
+        else:
+            with stage("dataframe"):
+                frame = pd.DataFrame(chunk)
+            probabilities = pipeline_predict_proba(model.pipeline, frame)[:, 1]
+        if candidate is not None:
+            scored = (probabilities, time.perf_counter() - begin)
+            shadow.submit(candidate, model, chunk, scored)
+        positive = probabilities > model.threshold
+        if drift_monitor is not None:
+            drift_monitor.observe_batch(model, chunk, positive)
+        yield classes[positive.astype(np.intp)], probabilities
+
+
+def predict_coalesced(records: list) -> list:
+    """
+    Score single-passenger requests coalesced into one batch: a lone
+    record takes the ``predict`` path (and its cache), more records are
+    scored with one vectorized call
+    """
+    if len(records) == 1:
+        BATCH_ROWS.observe(1)
+        return [predict(records[0])]
+    return predict_batch(records)
+
+
+def primary_model():
+    """
+    The model /predict routes to: the primary version of the store's
+    routing, else the artifact at MODEL_PATH
+    """
+    version = store.routing.primary
+    return registry.get() if version is None else store.get(version)
+
+
+def primary_loaded() -> bool:
+    """
+    Whether the model /predict routes to is loaded
+    """
+    version = store.routing.primary
+    return registry.loaded if version is None else store.is_loaded(version)
+
+
+def pipeline_predict_proba(pipeline, X: pd.DataFrame):
+    """
+    ``pipeline.predict_proba(X)``, timing every ColumnTransformer branch
+    (stage ``transform:<name>``) and the model (stage ``inference``)
+    separately. Pipelines of another shape are timed as one inference.
+    """
+    # duck-typed, so that serving never imports sklearn itself
+    preprocessor = pipeline[0]
+    if len(pipeline) != 2 or not hasattr(preprocessor, "transformers_"):
+        with stage("inference"):
+            return pipeline.predict_proba(X)
+
+    # the branches' outputs side by side, as ColumnTransformer.transform does
+    parts = []
+    for name, transformer, columns in preprocessor.transformers_:
+        if isinstance(transformer, str) and transformer == "drop":
+            continue
+        with stage(f"transform:{name}"):
+            if isinstance(transformer, str):
+                part = X[columns].to_numpy()
+            else:
+                part = transformer.transform(X[columns])
+        # a sparse branch output (e.g. one-hot) is densified like the others
+        parts.append(part.toarray() if hasattr(part, "toarray") else part)
+
+    with stage("inference"):
+        return pipeline[-1].predict_proba(np.hstack(parts))
+
+
+def engine_name(model) -> str:
+    """
+    Name of the scoring path of a loaded model, for metric labels
+    """
+    if model.engine is None:
+        return "pipeline"
+    return "table" if isinstance(model.engine, TableModel) else "compiled"
+
+
+def _predict_proba_row(model, data) -> float:
+    """
+    Positive-class probability of one record: from the engine, else from
+    the prediction cache or the sklearn pipeline
+    """
+    if model.engine is not None:
+        with stage("inference"):
+            return model.engine.predict_proba_row(data)
+
+    if prediction_cache is not None:
+        key = canonical_key(data)
+        cached = prediction_cache.get(model.version, key)
+        if cached is not None:
+            return cached
+
+    with stage("dataframe"):
+        df = pd.DataFrame([data])
+    probability = float(pipeline_predict_proba(model.pipeline, df)[0, 1])
+
+    if prediction_cache is not None:
+        prediction_cache.put(model.version, key, probability)
+    return probability
+
+
+def _shadow_proba(model, inputs):
+    """
+    Positive-class probabilities of a sampled call, scored by a candidate
+    the way the primary scores it, but without metrics or the cache. The
+    inputs are a (records, positional) pair or, for a columnar chunk, the
+    columns themselves.
+    """
+    if isinstance(inputs, dict):
+        columns = inputs
+    else:
+        records, positional = inputs
+        if len(records) == 1 and not positional and model.engine is not None:
+            return [model.engine.predict_proba_row(records[0])]
+        columns = _columns(records, positional)
+
+    if model.engine is not None:
+        return model.engine.predict_proba(columns)[:, 1]
+    return model.pipeline.predict_proba(pd.DataFrame(columns))[:, 1]
+
+
+def _thresholded(model, probability: float) -> Prediction:
+    """
+    Apply the model's decision threshold to a positive-class probability
+    """
+    if model.engine is not None:
+        negative, positive = model.engine.classes
+    else:
+        negative, positive = model.pipeline.classes_
+    label = positive if probability > model.threshold else negative
+    return Prediction(int(label), float(probability), model.threshold)
+
+
+def _columns(chunk: list, positional: bool) -> dict:
+    """
+    Feature columns of a chunk of records as NumPy arrays of the final
+    size and dtype, filled straight from the records
+    """
+    columns = {}
+    for position, column in enumerate(FEATURE_COLUMNS):
+        key = position if positional else column
+        columns[column] = np.fromiter(
+            (record[key] for record in chunk),
+            dtype=PREDICTION_DTYPES[column],
+            count=len(chunk),
+        )
+    return columns
+
 
-    return int(prediction[0])
+# a sample of the calls also scored by the candidate version, off the
+# request path; created last, since it scores with _shadow_proba
+shadow = ShadowScorer(store, _shadow_proba, max_pending_rows=SHADOW_MAX_PENDING_ROWS)
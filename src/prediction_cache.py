@@ -0,0 +1,280 @@
+"""
+Cache of prediction results keyed on the canonicalised input
+
+The input domain of SurvivorInput is small and real traffic repeats a lot,
+so results are cached per model version: entries of an older version are
+never returned, and the in-process cache drops them as soon as a new
+version is seen.
+
+Two backends share one interface:
+
+- PredictionCache: an in-process LRU with a TTL.
+- SharedPredictionCache: a fixed-size, direct-mapped table in named shared
+  memory, so every uvicorn worker on the host reads and fills the same
+  cache. Slots are written without locks; each one carries a checksum so a
+  torn read is treated as a miss.
+"""
+
+import hashlib
+import struct
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from src.config.features import FEATURE_COLUMNS
+
+# columns compared as floats so that e.g. Age 30 and 30.0 share an entry
+FLOAT_COLUMNS = ("Age", "Fare")
+
+MASK64 = (1 << 64) - 1
+
+SLOT_DTYPE = np.dtype(
+    [
+        ("key", "<u8"),
+        ("version", "<u8"),
+        ("value", "<f8"),
+        ("expires", "<f8"),
+        ("check", "<u8"),
+    ]
+)
+
+
+def canonical_key(record) -> tuple:
+    """
+    Hashable, normalised form of one input record
+    """
+    return tuple(
+        float(record[column]) if column in FLOAT_COLUMNS else record[column]
+        for column in FEATURE_COLUMNS
+    )
+
+
+def hash64(value) -> int:
+    """
+    Stable (not per-process salted) non-zero 64-bit hash of a value's repr
+    """
+    digest = hashlib.blake2b(repr(value).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+class PredictionCache:
+    """
+    Thread-safe in-process LRU cache of prediction results with a TTL.
+
+    Parameters
+    ----------
+    max_entries : int
+        Number of results kept; the least recently used is evicted beyond it.
+    ttl_seconds : float
+        Lifetime of an entry, 0 for no expiry.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float = 0.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version: str, key: tuple):
+        """
+        Cached value for ``key`` under model ``version``, or None
+        """
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires = entry
+            if expires and expires < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, version: str, key: tuple, value):
+        """
+        Store ``value`` for ``key`` under model ``version``
+        """
+        expires = time.monotonic() + self.ttl_seconds if self.ttl_seconds else 0.0
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Drop every entry
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Hit/miss/eviction counters and current size
+        """
+        return {
+            "backend": "local",
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+
+class SharedPredictionCache:
+    """
+    Direct-mapped prediction cache in named shared memory.
+
+    Each key maps to exactly one slot; storing a different key in an
+    occupied slot evicts it. The first process creates the segment, later
+    ones attach to it by name. Values must be numbers. The counters are
+    per process.
+
+    Parameters
+    ----------
+    name : str
+        Shared memory segment name, identical in every worker.
+    max_entries : int
+        Number of slots.
+    ttl_seconds : float
+        Lifetime of an entry, 0 for no expiry. Uses wall-clock time since
+        the monotonic clock is not comparable across processes.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float = 0.0):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        size = SLOT_DTYPE.itemsize * max_entries
+        try:
+            self._shm = SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            self._shm = SharedMemory(name=name)
+            if self._shm.size < size:
+                raise ValueError(
+                    f"Shared cache '{name}' holds fewer than {max_entries} slots"
+                ) from None
+
+        # the segment outlives any single worker: stop the resource tracker
+        # from unlinking it when this process exits
+        # pylint: disable-next=protected-access
+        resource_tracker.unregister(self._shm._name, "shared_memory")
+
+        self._slots = np.ndarray(
+            (max_entries,), dtype=SLOT_DTYPE, buffer=self._shm.buf
+        )
+
+    def get(self, version: str, key: tuple):
+        """
+        Cached value for ``key`` under model ``version``, or None
+        """
+        key_hash, version_hash = hash64(key), hash64(version)
+        slot = self._slots[key_hash % self.max_entries]
+        stored_key, stored_version, value, expires, check = slot.item()
+
+        if (
+            stored_key != key_hash
+            or stored_version != version_hash
+            or check != _checksum(stored_key, stored_version, value, expires)
+            or (expires and expires < time.time())
+        ):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return value
+
+    def put(self, version: str, key: tuple, value):
+        """
+        Store ``value`` for ``key`` under model ``version``
+        """
+        key_hash, version_hash = hash64(key), hash64(version)
+        index = key_hash % self.max_entries
+        expires = time.time() + self.ttl_seconds if self.ttl_seconds else 0.0
+        value = float(value)
+
+        previous = self._slots[index]["key"]
+        if previous and previous != key_hash:
+            self.evictions += 1
+
+        self._slots[index] = (
+            key_hash,
+            version_hash,
+            value,
+            expires,
+            _checksum(key_hash, version_hash, value, expires),
+        )
+
+    def clear(self):
+        """
+        Drop every entry, for all processes
+        """
+        self._slots[:] = np.zeros(1, dtype=SLOT_DTYPE)
+
+    def stats(self) -> dict:
+        """
+        Per-process hit/miss/eviction counters and current (shared) size
+        """
+        return {
+            "backend": "shared",
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": int(np.count_nonzero(self._slots["key"])),
+            "max_entries": self.max_entries,
+        }
+
+    def close(self, unlink: bool = False):
+        """
+        Detach from the segment, and remove it for everyone if ``unlink``
+        """
+        self._slots = None
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+
+
+def _checksum(key_hash: int, version_hash: int, value: float, expires: float) -> int:
+    """
+    Slot checksum, so a slot read half-way through a concurrent write
+    never validates
+    """
+    (value_bits,) = struct.unpack("<Q", struct.pack("<d", value))
+    (expires_bits,) = struct.unpack("<Q", struct.pack("<d", expires))
+    return ((key_hash ^ version_hash ^ value_bits ^ ~expires_bits) & MASK64) | 1
+
+
+def make_prediction_cache(max_entries: int, ttl_seconds: float, shared_name: str):
+    """
+    Build the configured cache backend, or None when caching is disabled
+    """
+    if max_entries <= 0:
+        return None
+    if shared_name:
+        return SharedPredictionCache(shared_name, max_entries, ttl_seconds)
+    return PredictionCache(max_entries, ttl_seconds)
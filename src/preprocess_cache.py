@@ -0,0 +1,216 @@
+"""
+On-disk cache of fitted preprocessors and their transformed matrices
+
+Fitting the ColumnTransformer only depends on the input rows and the
+preprocessor's configuration, so its result is stored content-addressed:
+the key hashes the rows (values, index, columns and dtypes) together with
+the unfitted preprocessor and the sklearn version. An entry holds the
+fitted preprocessor (joblib) and the transformed matrix (.npy, read back
+memory-mapped), so repeated training, search and evaluation runs over the
+same data skip preprocessing entirely.
+
+The cache directory is kept under a size limit by evicting the least
+recently used entries (by file modification time, refreshed on every hit).
+Sparse outputs are never cached.
+"""
+
+import hashlib
+import logging
+import os
+import warnings
+from pathlib import Path
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from src.artifact import atomic_write
+from src.config.settings import PREPROCESS_CACHE_DIR, PREPROCESS_CACHE_MAX_MB
+
+logger = logging.getLogger(__name__)
+
+# bump when the cached layout changes so old entries are not reused
+CACHE_FORMAT_VERSION = 1
+
+
+def frame_hash(X: pd.DataFrame) -> str:
+    """
+    SHA-256 of a frame's values, index, column names and dtypes
+    """
+    digest = hashlib.sha256()
+    digest.update(repr([(str(c), str(t)) for c, t in X.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(X, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class PreprocessorCache:
+    """
+    Content-addressed store of fitted preprocessors and transformed matrices.
+
+    Parameters
+    ----------
+    cache_dir : Path or str
+        Directory of the cache files, created on first write. An empty
+        value disables caching: every call computes its result.
+    max_bytes : int
+        Size limit of the directory; the least recently used entries are
+        evicted after each write to stay under it.
+    """
+
+    def __init__(self, cache_dir, max_bytes: int):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def fit_transform(self, preprocessor, X: pd.DataFrame):
+        """
+        Fit an unfitted ``preprocessor`` on ``X`` and transform it, or load
+        both results from the cache. Returns (fitted preprocessor, matrix).
+        """
+        if self.cache_dir is None:
+            return preprocessor, preprocessor.fit_transform(X)
+
+        key = self._key("fit", joblib.hash(preprocessor), frame_hash(X))
+        matrix_path, model_path = self._paths(key, ".npy", ".joblib")
+
+        if matrix_path.exists() and model_path.exists():
+            try:
+                fitted = joblib.load(model_path)
+                matrix = np.load(matrix_path, mmap_mode="r")
+                self._touch(matrix_path, model_path)
+                self.hits += 1
+                return fitted, matrix
+            except Exception:  # pylint: disable=broad-except
+                logger.warning("Rebuilding unreadable preprocessor cache %s", key)
+
+        self.misses += 1
+        matrix = preprocessor.fit_transform(X)
+        # the matrix first: the preprocessor file marks the entry complete
+        if self._store(matrix_path, matrix):
+            self._write(model_path, lambda tmp: joblib.dump(preprocessor, tmp))
+        self._evict()
+        return preprocessor, matrix
+
+    def transform(self, fitted, X: pd.DataFrame):
+        """
+        ``fitted.transform(X)``, or the cached result of the same call
+        """
+        if self.cache_dir is None:
+            return fitted.transform(X)
+
+        key = self._key("transform", joblib.hash(fitted), frame_hash(X))
+        (matrix_path,) = self._paths(key, ".npy")
+
+        if matrix_path.exists():
+            try:
+                matrix = np.load(matrix_path, mmap_mode="r")
+                self._touch(matrix_path)
+                self.hits += 1
+                return matrix
+            except Exception:  # pylint: disable=broad-except
+                logger.warning("Rebuilding unreadable preprocessor cache %s", key)
+
+        self.misses += 1
+        with warnings.catch_warnings():
+            # categories unseen during fit are encoded as zeros, as usual
+            warnings.simplefilter("ignore", UserWarning)
+            matrix = fitted.transform(X)
+        self._store(matrix_path, matrix)
+        self._evict()
+        return matrix
+
+    def size_bytes(self) -> int:
+        """
+        Total size of the cache files
+        """
+        return sum(size for _, size, _ in self._files())
+
+    def _key(self, kind: str, preprocessor_hash: str, data_hash: str) -> str:
+        """
+        Entry key of one operation on one preprocessor and one frame
+        """
+        parts = (CACHE_FORMAT_VERSION, sklearn.__version__, kind)
+        parts += (preprocessor_hash, data_hash)
+        return hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+
+    def _paths(self, key: str, *suffixes) -> list:
+        """
+        Cache file locations of an entry
+        """
+        return [self.cache_dir / f"{key}{suffix}" for suffix in suffixes]
+
+    def _store(self, path: Path, matrix) -> bool:
+        """
+        Write a dense matrix; returns False when it cannot be cached
+        """
+        if not isinstance(matrix, np.ndarray):
+            return False
+
+        def save(tmp_path):
+            # through a file object: np.save would append ".npy" to the name
+            with open(tmp_path, "wb") as f:
+                np.save(f, matrix)
+
+        return self._write(path, save)
+
+    def _write(self, path: Path, write) -> bool:
+        """
+        Atomically write one cache file, logging (not raising) on failure
+        """
+        try:
+            atomic_write(path, write)
+            return True
+        except OSError as e:
+            # a read-only or full cache dir must not break training
+            logger.warning("Could not write preprocessor cache %s: %s", path, e)
+            return False
+
+    def _touch(self, *paths):
+        """
+        Mark entry files as recently used
+        """
+        for path in paths:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+    def _files(self) -> list:
+        """
+        (path, size, mtime) of every cache file
+        """
+        if not self.cache_dir.is_dir():
+            return []
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and not entry.name.startswith("."):
+                stat = entry.stat()
+                files.append((Path(entry.path), stat.st_size, stat.st_mtime))
+        return files
+
+    def _evict(self):
+        """
+        Remove least recently used entries until the cache fits its limit
+        """
+        entries = {}
+        for path, size, mtime in self._files():
+            key = path.name.split(".")[0]
+            paths, total, last_used = entries.get(key, ([], 0, 0.0))
+            entries[key] = (paths + [path], total + size, max(last_used, mtime))
+
+        total = sum(size for _, size, _ in entries.values())
+        for paths, size, _ in sorted(entries.values(), key=lambda entry: entry[2]):
+            if total <= self.max_bytes:
+                break
+            for path in paths:
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+            total -= size
+
+
+# the process-wide cache configured by the settings
+preprocess_cache = PreprocessorCache(
+    PREPROCESS_CACHE_DIR, int(PREPROCESS_CACHE_MAX_MB * 2**20)
+)
@@ -0,0 +1,383 @@
+"""
+Model registry: lazy loading and hot reload of the trained pipeline
+
+Nothing is read from disk at import time. The artifact is loaded on first
+use (or by the API's startup hook), and ``refresh()`` swaps in a new
+pipeline when the file on disk changes. The swap is a single reference
+assignment, so requests already holding the previous model finish with it
+undisturbed.
+
+Every load is verified (``src/verify.py``) before the model is served, and
+with an API schema also warmed up, so a reload that fails verification
+leaves the previous model serving.
+
+With the "compact" artifact format the registry serves the compiled
+export of the model (``src/compact.py``) instead of unpickling the
+pipeline, so sklearn is never imported.
+"""
+
+import logging
+import os
+import threading
+import time
+import warnings
+from typing import NamedTuple, Optional, Union
+import joblib
+import pandas as pd
+from src.artifact import file_sha256, load_metadata, stream_sha256, verify_sha256
+from src.compact import compact_path, read_compact, write_compact
+from src.config.features import ENUMERATED_DOMAINS
+from src.engine import (
+    CompiledModel,
+    TableModel,
+    compile_pipeline,
+    domain_columns,
+    parity_error,
+    probe_columns,
+)
+from src.threshold import DEFAULT_THRESHOLD
+from src.verify import check_schema, unfitted_steps, warm_up
+
+logger = logging.getLogger(__name__)
+
+# largest probability difference tolerated between the compiled engine and sklearn
+PARITY_TOLERANCE = 1e-9
+
+
+class LoadedModel(NamedTuple):
+    """
+    One loaded artifact together with everything derived from it
+    """
+
+    # None when served from the compact export
+    pipeline: object
+    engine: Optional[Union[CompiledModel, TableModel]]
+    metadata: dict
+    threshold: float
+    version: str
+    sha256: str
+    mtime: float
+    size: int
+    # reading and building, verification, warm-up
+    load_seconds: float
+    verify_seconds: float
+    warmup_seconds: float
+
+
+def load_engine(fitted_pipeline, kind: str = "compiled"):
+    """
+    Build the fast-path engine of the given ``kind`` ("compiled" or
+    "table") from the fitted pipeline and check it against the pipeline.
+
+    Both engines are checked on synthetic probe rows, which include
+    unknown categories. The table engine is also checked exhaustively on
+    every combination of its tabulated inputs.
+
+    Returns None (scoring then falls back to the sklearn pipeline) if the
+    pipeline cannot be compiled or the engine disagrees with it.
+    """
+    try:
+        compiled = compile_pipeline(fitted_pipeline)
+    except ValueError as e:
+        logger.warning("Falling back to the sklearn pipeline: %s", e)
+        return None
+
+    engine = compiled
+    checks = [probe_columns(compiled)]
+    if kind == "table":
+        engine = TableModel(
+            compiled, ENUMERATED_DOMAINS, fallback=pipeline_fallback(fitted_pipeline)
+        )
+        checks.append(domain_columns(engine))
+
+    with warnings.catch_warnings():
+        # the probe deliberately contains categories the encoder has not seen
+        warnings.simplefilter("ignore", UserWarning)
+        error = max(
+            parity_error(
+                fitted_pipeline, engine, pd.DataFrame(check)[engine.input_columns]
+            )
+            for check in checks
+        )
+    if error > PARITY_TOLERANCE:
+        logger.warning(
+            "Falling back to the sklearn pipeline: %s engine differs by %s",
+            kind,
+            error,
+        )
+        return None
+
+    return engine
+
+
+def export_compact(fitted_pipeline, path, metadata=None) -> bool:
+    """
+    Write the compact export of the pipeline saved at ``path``, with its
+    ``metadata`` and the SHA-256 of the pickle.
+
+    Only a pipeline that compiles and passes the parity check is
+    exported. Otherwise a stale export is removed, so a compact-format
+    registry falls back to the pickle. Returns whether an export was written.
+    """
+    target = compact_path(path)
+    compiled = load_engine(fitted_pipeline, "compiled")
+    if compiled is None:
+        target.unlink(missing_ok=True)
+        return False
+
+    write_compact(
+        target, compiled, {**(metadata or {}), "source_sha256": file_sha256(path)}
+    )
+    return True
+
+
+def pipeline_fallback(fitted_pipeline):
+    """
+    Positive-class probability function of the pipeline over a dict of
+    columns, used by the table engine for rows outside its tables
+    """
+
+    def positive_proba(columns):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            return fitted_pipeline.predict_proba(pd.DataFrame(columns))[:, 1]
+
+    return positive_proba
+
+
+class ModelRegistry:
+    """
+    Holds the currently served model and reloads it when the artifact changes.
+
+    Parameters
+    ----------
+    path : Path
+        Location of the joblib artifact written by ``src.train``.
+    engine : {"compiled", "table", "pipeline"}, default="compiled"
+        Fast-path engine built next to the pipeline, "pipeline" for none.
+    artifact_format : {"pickle", "compact"}, default="pickle"
+        "compact" serves the compact export next to ``path`` without
+        loading the pipeline, as long as the export exists (and the engine
+        is not "pipeline"); the pickle is loaded otherwise.
+    schema : dict, optional
+        Fields of the API input model (see ``src/verify.py``). When set,
+        every loaded model is checked against it and warmed up before it
+        is served.
+    warmup_rows : int, default=0
+        Rows of the synthetic warm-up batch, 0 for no warm-up.
+    """
+
+    def __init__(
+        self,
+        path,
+        engine: str = "compiled",
+        artifact_format="pickle",
+        schema=None,
+        warmup_rows: int = 0,
+    ):
+        self.path = path
+        self.engine = engine
+        self.artifact_format = artifact_format
+        self.schema = schema
+        self.warmup_rows = warmup_rows
+        self._current: Optional[LoadedModel] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """
+        Whether a model has been loaded yet
+        """
+        return self._current is not None
+
+    def get(self) -> LoadedModel:
+        """
+        Return the current model, loading it first if nothing is loaded yet.
+
+        Callers should fetch the model once per request and use that
+        reference throughout, so a concurrent reload never mixes versions.
+        """
+        current = self._current
+        if current is not None:
+            return current
+
+        with self._lock:
+            if self._current is None:
+                self._current = self._load()
+            return self._current
+
+    def refresh(self) -> bool:
+        """
+        Reload the artifact if it changed on disk since it was loaded.
+
+        The file is only hashed when its mtime or size changed, and only
+        reloaded when the hash differs. Returns True if a new model was
+        swapped in. If loading fails, the previous model keeps serving.
+        """
+        with self._lock:
+            current = self._current
+            if current is None:
+                self._current = self._load()
+                return True
+
+            source = self._compact_source() or self.path
+            stat = os.stat(source)
+            if stat.st_mtime == current.mtime and stat.st_size == current.size:
+                return False
+
+            if file_sha256(source) == current.sha256:
+                # touched but identical: remember the new stat to skip rehashing
+                self._current = current._replace(mtime=stat.st_mtime, size=stat.st_size)
+                return False
+
+            self._current = self._load()
+            logger.info(
+                "Reloaded model %s -> %s", current.version, self._current.version
+            )
+            return True
+
+    def _load(self) -> LoadedModel:
+        """
+        Read, hash, verify and (optionally) compile the artifact, read its
+        metadata sidecar and warm the model up
+        """
+        compact = self._compact_source()
+        if compact is not None:
+            return self._load_compact(compact)
+
+        start = time.perf_counter()
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            # hashed and unpickled from one open file, so the version names
+            # the loaded bytes even if the artifact is replaced meanwhile
+            sha256 = stream_sha256(f)
+            f.seek(0)
+            pipeline = joblib.load(f)
+
+        verify_start = time.perf_counter()
+        verify_sha256(self.path, sha256)
+        unfitted = unfitted_steps(pipeline)
+        if unfitted:
+            raise ValueError(f"{self.path} holds unfitted steps: {unfitted}")
+        verify_seconds = time.perf_counter() - verify_start
+
+        engine = None
+        if self.engine != "pipeline":
+            engine = load_engine(pipeline, self.engine)
+
+        # decision threshold tuned at training time, if the trainer saved one
+        metadata = load_metadata(self.path, sha256)
+        tuning = metadata.get("threshold") or {}
+        threshold = float(tuning.get("threshold", DEFAULT_THRESHOLD))
+
+        model = LoadedModel(
+            pipeline=pipeline,
+            engine=engine,
+            metadata=metadata,
+            threshold=threshold,
+            version=sha256[:12],
+            sha256=sha256,
+            mtime=stat.st_mtime,
+            size=stat.st_size,
+            load_seconds=time.perf_counter() - start - verify_seconds,
+            verify_seconds=verify_seconds,
+            warmup_seconds=0.0,
+        )
+        return self._ready(model)
+
+    def _load_compact(self, source) -> LoadedModel:
+        """
+        Memory-map the compact export and build the engine from it; the
+        table engine scores rows outside its tables with the compiled model
+        """
+        start = time.perf_counter()
+        stat = os.stat(source)
+        sha256 = file_sha256(source)
+        compiled, metadata = read_compact(source)
+
+        # the export must come from the pickle the sidecar describes
+        verify_start = time.perf_counter()
+        if "source_sha256" in metadata:
+            verify_sha256(self.path, metadata["source_sha256"])
+        verify_seconds = time.perf_counter() - verify_start
+
+        engine = compiled
+        if self.engine == "table":
+            table = TableModel(
+                compiled,
+                ENUMERATED_DOMAINS,
+                fallback=lambda columns: compiled.predict_proba(columns)[:, 1],
+            )
+            checks = (probe_columns(compiled), domain_columns(table))
+            if max(parity_error(compiled, table, X) for X in checks) > PARITY_TOLERANCE:
+                logger.warning("Serving the compiled engine: table engine differs")
+            else:
+                engine = table
+
+        tuning = metadata.get("threshold") or {}
+        model = LoadedModel(
+            pipeline=None,
+            engine=engine,
+            metadata=metadata,
+            threshold=float(tuning.get("threshold", DEFAULT_THRESHOLD)),
+            # the pickle's version, so results cached by either format agree
+            version=metadata.get("source_sha256", sha256)[:12],
+            sha256=sha256,
+            mtime=stat.st_mtime,
+            size=stat.st_size,
+            load_seconds=time.perf_counter() - start - verify_seconds,
+            verify_seconds=verify_seconds,
+            warmup_seconds=0.0,
+        )
+        return self._ready(model)
+
+    def _ready(self, model: LoadedModel) -> LoadedModel:
+        """
+        Check a freshly loaded model against the API schema and warm it up,
+        when a schema is set, adding the time taken to its timings
+        """
+        if self.schema is None:
+            return model
+
+        start = time.perf_counter()
+        if model.engine is not None:
+            columns = model.engine.input_columns
+            categories = _categories(model.engine)
+        else:
+            # only pipelines fitted on a DataFrame know their input columns
+            columns = getattr(model.pipeline, "feature_names_in_", None)
+            categories = {}
+        if columns is not None:
+            for warning in check_schema(list(columns), categories, self.schema):
+                logger.warning("Model %s: %s", model.version, warning)
+
+        warmup_start = time.perf_counter()
+        if self.warmup_rows > 0:
+            warm_up(model, self.schema, self.warmup_rows)
+
+        return model._replace(
+            verify_seconds=model.verify_seconds + warmup_start - start,
+            warmup_seconds=time.perf_counter() - warmup_start,
+        )
+
+    def _compact_source(self):
+        """
+        The compact export to serve from, or None to load the pickle: when
+        that format is not configured or the export does not exist
+        """
+        if self.artifact_format == "compact" and self.engine != "pipeline":
+            compact = compact_path(self.path)
+            if compact.exists():
+                return compact
+        return None
+
+
+def _categories(engine) -> dict:
+    """
+    Categories each categorical column of an engine was trained on
+    """
+    compiled = getattr(engine, "compiled", engine)
+    return {
+        term["column"]: list(term["categories"])
+        for term in compiled.layout["categorical"]
+    }
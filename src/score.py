@@ -0,0 +1,276 @@
+"""
+Bulk offline scoring of a CSV or Parquet file
+
+The input is read in chunks and fanned out to a process pool. Every worker
+loads the model once (with the configured inference engine) and scores the
+chunks it receives. Results are written in input order: predictions and
+positive-class probabilities, optionally next to an id column copied from
+the input. At most two chunks per worker are in flight at any time, so
+memory stays bounded by the chunk size whatever the size of the input.
+
+    python -m src.score passengers.csv predictions.csv --workers 4
+    python -m src.score passengers.parquet predictions.parquet --id-column PassengerId
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from src.artifact import atomic_write
+from src.config.features import DATASET_DTYPES, FEATURE_COLUMNS
+from src.config.settings import INFERENCE_ENGINE, MODEL_FORMAT, MODEL_PATH
+from src.registry import ModelRegistry
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+# chunks queued per worker: one being scored, one waiting
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+# columns written for every row, after the optional id column
+OUTPUT_COLUMNS = ["prediction", "probability"]
+
+# the model loaded by this worker process
+_worker_model = {}
+
+
+def read_chunks(path, chunk_size: int, extra_columns=()):
+    """
+    Stream the feature columns (and ``extra_columns``) of a CSV or Parquet
+    file as DataFrames of at most ``chunk_size`` rows
+    """
+    columns = [*FEATURE_COLUMNS, *extra_columns]
+    if _is_parquet(path):
+        _require_pyarrow()
+        parquet = pq.ParquetFile(path)
+        for batch in parquet.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()[columns]
+        return
+
+    dtypes = {column: DATASET_DTYPES[column] for column in FEATURE_COLUMNS}
+    with pd.read_csv(
+        path, usecols=columns, dtype=dtypes, chunksize=chunk_size
+    ) as reader:
+        for chunk in reader:
+            yield chunk[columns]
+
+
+def score_file(
+    input_path,
+    output_path,
+    model_path=MODEL_PATH,
+    chunk_size: int = 100_000,
+    max_workers=None,
+    id_column=None,
+    engine: str = INFERENCE_ENGINE,
+) -> dict:
+    """
+    Score every row of ``input_path`` and write the results to
+    ``output_path`` (CSV or Parquet, by extension). The output appears
+    atomically once complete.
+
+    Returns the total row count, wall time and rows/sec, and per worker
+    process its chunk and row counts and its scoring throughput.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer")
+    max_workers = max_workers or os.cpu_count() or 1
+    extra_columns = [id_column] if id_column else []
+
+    start = time.perf_counter()
+    workers = {}
+
+    def write(tmp_path):
+        writer = _ChunkWriter(
+            tmp_path, _is_parquet(output_path), [*extra_columns, *OUTPUT_COLUMNS]
+        )
+        # spawn instead of fork: safe whatever threads the caller runs
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(str(model_path), engine),
+        ) as executor:
+            pending = deque()
+            for chunk in read_chunks(input_path, chunk_size, extra_columns):
+                if len(pending) >= max_workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                    _write_result(writer, pending.popleft(), workers)
+                ids = chunk[id_column].to_numpy() if id_column else None
+                pending.append((ids, executor.submit(_score_chunk, chunk)))
+            while pending:
+                _write_result(writer, pending.popleft(), workers)
+        writer.close()
+
+    atomic_write(output_path, write)
+
+    seconds = time.perf_counter() - start
+    rows = sum(worker["rows"] for worker in workers.values())
+    for worker in workers.values():
+        worker["rows_per_second"] = (
+            worker["rows"] / worker["seconds"] if worker["seconds"] else None
+        )
+
+    return {
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds else None,
+        "workers": workers,
+    }
+
+
+class _ChunkWriter:
+    """
+    Appends result frames to one CSV or Parquet file
+    """
+
+    def __init__(self, path, parquet: bool, columns: list):
+        self.path = path
+        self.parquet = parquet
+        self.columns = columns
+        self._writer = None
+        self._header = True
+
+    def write(self, frame: pd.DataFrame):
+        """
+        Append one frame
+        """
+        if self.parquet:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            mode = "w" if self._header else "a"
+            frame.to_csv(self.path, mode=mode, header=self._header, index=False)
+            self._header = False
+
+    def close(self):
+        """
+        Finish the file; an empty input still produces a file with a header
+        """
+        if self.parquet:
+            _require_pyarrow()
+            if self._writer is None:
+                empty = pd.DataFrame(columns=self.columns)
+                pq.write_table(pa.Table.from_pandas(empty), self.path)
+            else:
+                self._writer.close()
+        elif self._header:
+            pd.DataFrame(columns=self.columns).to_csv(self.path, index=False)
+
+
+def _write_result(writer: _ChunkWriter, item, workers: dict):
+    """
+    Wait for one chunk's result, append it and account for its worker
+    """
+    ids, future = item
+    pid, predictions, probabilities, seconds = future.result()
+
+    frame = pd.DataFrame({"prediction": predictions, "probability": probabilities})
+    if ids is not None:
+        frame.insert(0, writer.columns[0], ids)
+    writer.write(frame)
+
+    worker = workers.setdefault(pid, {"chunks": 0, "rows": 0, "seconds": 0.0})
+    worker["chunks"] += 1
+    worker["rows"] += len(predictions)
+    worker["seconds"] += seconds
+
+
+def _init_worker(model_path: str, engine: str):
+    """
+    Pool initializer: load the model once per worker process
+    """
+    registry = ModelRegistry(
+        Path(model_path), engine=engine, artifact_format=MODEL_FORMAT
+    )
+    _worker_model["model"] = registry.get()
+
+
+def _score_chunk(chunk: pd.DataFrame):
+    """
+    Score one chunk in a worker: (pid, labels, positive-class
+    probabilities, seconds spent)
+    """
+    start = time.perf_counter()
+    model = _worker_model["model"]
+    if model.engine is not None:
+        scorer, classes = model.engine, model.engine.classes
+    else:
+        scorer, classes = model.pipeline, model.pipeline.classes_
+
+    positive = scorer.predict_proba(chunk[FEATURE_COLUMNS])[:, 1]
+    # the model's tuned decision threshold, not the argmax
+    labels = np.asarray(classes)[(positive > model.threshold).astype(np.intp)]
+
+    return os.getpid(), labels, positive, time.perf_counter() - start
+
+
+def _is_parquet(path) -> bool:
+    """
+    Whether a path names a Parquet file
+    """
+    return Path(path).suffix.lower() in (".parquet", ".pq")
+
+
+def _require_pyarrow():
+    """
+    Parquet needs pyarrow, an optional dependency
+    """
+    if pq is None:
+        raise RuntimeError("Reading or writing Parquet requires pyarrow")
+
+
+def main():
+    """
+    Command line entry point: score a file and print the throughput report
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("input", help="CSV or Parquet file with the feature columns")
+    parser.add_argument("output", help="CSV or Parquet file to write")
+    parser.add_argument("--model", default=MODEL_PATH, help="model artifact")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, help="processes (default: all cores)")
+    parser.add_argument("--id-column", help="input column copied to the output")
+    parser.add_argument(
+        "--engine",
+        default=INFERENCE_ENGINE,
+        choices=("compiled", "table", "pipeline"),
+    )
+    args = parser.parse_args()
+
+    report = score_file(
+        args.input,
+        args.output,
+        model_path=args.model,
+        chunk_size=args.chunk_size,
+        max_workers=args.workers,
+        id_column=args.id_column,
+        engine=args.engine,
+    )
+
+    print(f"{'worker':>8} {'chunks':>7} {'rows':>11} {'rows/sec':>11}")
+    for pid, worker in sorted(report["workers"].items()):
+        print(
+            f"{pid:>8} {worker['chunks']:>7} {worker['rows']:>11} "
+            f"{worker['rows_per_second'] or 0:>11.0f}"
+        )
+    print(
+        f"{'total':>8} {'':>7} {report['rows']:>11} "
+        f"{report['rows_per_second'] or 0:>11.0f}  ({report['seconds']:.1f}s wall)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Shadow scoring of a candidate model version
+
+A sampled share of the scoring calls (a /predict micro-batch, a
+/predict/batch chunk or a /predict/columnar chunk) is scored a second
+time by the candidate version of the routing (``src/model_store.py``).
+This happens on a background thread, after the primary's result has
+been returned. The request only appends the rows to a queue, which the
+thread drains every ``DRAIN_INTERVAL`` seconds. Waking the thread for
+every sample would cost the request more than scoring a row with the
+compiled engine.
+
+Per version, the scorer records the rows scored and the seconds spent on
+them, which compares primary and candidate latency on the same rows
+(only the shadowed ones). For the candidate it also records how often
+its label agrees with the primary's (each at its own decision threshold)
+and how far apart the probabilities are. The same numbers feed the
+``titanic_model_*`` and ``titanic_shadow_*`` metrics.
+
+When the candidate falls behind, samples beyond ``max_pending_rows`` are
+dropped and counted instead of queued, so shadow scoring never grows an
+unbounded backlog.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+import numpy as np
+from src.metrics import MODEL_SCORING_SECONDS, SHADOW_ROWS
+
+logger = logging.getLogger(__name__)
+
+# seconds between two drains of the queue of samples by the shadow thread
+DRAIN_INTERVAL = 0.05
+
+
+class ShadowScorer:
+    """
+    Scores samples of the served traffic with the candidate version.
+
+    Parameters
+    ----------
+    store : ModelStore
+        Holds the routing (candidate and shadow fraction) and loads the
+        candidate version.
+    score : callable
+        ``score(model, inputs)`` returns the positive-class probabilities
+        of the inputs of a sampled call, computed the way the primary
+        computes them.
+    max_pending_rows : int, default=10000
+        Rows handed over but not yet shadow scored, at most.
+    """
+
+    def __init__(self, store, score, max_pending_rows: int = 10_000):
+        self.store = store
+        self.score = score
+        self.max_pending_rows = max_pending_rows
+        self._pending_rows = 0
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._queue = deque()
+        self._stop = None
+
+    def sample(self):
+        """
+        The candidate version when this call is sampled for shadow
+        scoring, else None
+        """
+        routing = self.store.routing
+        if routing.candidate is None or routing.shadow_fraction <= 0:
+            return None
+        if random.random() >= routing.shadow_fraction:
+            return None
+        return routing.candidate
+
+    def submit(self, candidate: str, primary, inputs, scored):
+        """
+        Hand a sampled call over: ``inputs`` (as passed to ``score``) were
+        scored by the ``primary`` LoadedModel to ``scored``, a
+        (probabilities, seconds) pair. Returns without waiting for the
+        candidate.
+        """
+        rows = len(scored[0])
+        with self._lock:
+            if self._pending_rows + rows > self.max_pending_rows:
+                self._version_stats(candidate)["dropped_rows"] += rows
+                return
+            self._pending_rows += rows
+            self._queue.append((candidate, primary, inputs, scored))
+            if self._stop is None:
+                self._stop = threading.Event()
+                threading.Thread(
+                    target=self._run, args=(self._stop,), name="shadow", daemon=True
+                ).start()
+
+    def stats(self) -> dict:
+        """
+        Rows, latency and (for candidates) agreement with the primary per
+        version, plus the rows waiting to be shadow scored
+        """
+        with self._lock:
+            versions = {}
+            for version, stats in self._stats.items():
+                rows = stats["rows"]
+                summary = {
+                    "roles": sorted(stats["roles"]),
+                    "rows": rows,
+                    "seconds": stats["seconds"],
+                    "seconds_per_row": stats["seconds"] / rows if rows else None,
+                }
+                if stats["compared_rows"]:
+                    compared = stats["compared_rows"]
+                    summary["agreement"] = stats["agreed_rows"] / compared
+                    summary["mean_abs_difference"] = stats["abs_difference"] / compared
+                    summary["max_abs_difference"] = stats["max_abs_difference"]
+                summary["dropped_rows"] = stats["dropped_rows"]
+                summary["errors"] = stats["errors"]
+                versions[version] = summary
+            return {"pending_rows": self._pending_rows, "versions": versions}
+
+    def close(self):
+        """
+        Stop the shadow thread, discarding the samples still waiting
+        """
+        with self._lock:
+            if self._stop is not None:
+                self._stop.set()
+                self._stop = None
+            self._queue.clear()
+            self._pending_rows = 0
+
+    def _run(self, stop: threading.Event):
+        """
+        Shadow thread: every DRAIN_INTERVAL seconds, score the queued
+        samples until stopped
+        """
+        while not stop.wait(DRAIN_INTERVAL):
+            samples = []
+            while self._queue:
+                try:
+                    samples.append(self._queue.popleft())
+                except IndexError:
+                    break
+            if samples and not stop.is_set():
+                self._drain(samples)
+
+    def _drain(self, samples: list):
+        """
+        Shadow score drained samples, comparing them in one go per pair of
+        candidate and primary version
+        """
+        groups = {}
+        for sample in samples:
+            candidate, primary = sample[0], sample[1]
+            groups.setdefault((candidate, primary.version), []).append(sample)
+
+        for (candidate, _), group in groups.items():
+            try:
+                self._compare(candidate, group)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception(
+                    "Shadow scoring with model version %s failed", candidate
+                )
+                with self._lock:
+                    self._version_stats(candidate)["errors"] += 1
+            finally:
+                with self._lock:
+                    self._pending_rows -= sum(len(sample[3][0]) for sample in group)
+
+    def _compare(self, candidate: str, group: list):
+        """
+        Score each sample of one primary version with the candidate, timing
+        every call like the primary's, then record the agreement and the
+        latency of both
+        """
+        model = self.store.get(candidate)
+        primary = group[0][1]
+        expected, shadowed = [], []
+        primary_seconds, shadow_seconds = [], []
+        for _, _, inputs, (probabilities, seconds) in group:
+            start = time.perf_counter()
+            result = self.score(model, inputs)
+            shadow_seconds.append(time.perf_counter() - start)
+            shadowed.append(np.asarray(result, dtype=np.float64))
+            expected.append(np.asarray(probabilities, dtype=np.float64))
+            primary_seconds.append(seconds)
+
+        expected = np.concatenate(expected)
+        shadowed = np.concatenate(shadowed)
+        agreed = int(
+            np.count_nonzero(
+                (shadowed > model.threshold) == (expected > primary.threshold)
+            )
+        )
+        difference = np.abs(shadowed - expected)
+        rows = len(expected)
+
+        for version, role, timings in (
+            (primary.version, "primary", primary_seconds),
+            (candidate, "shadow", shadow_seconds),
+        ):
+            for seconds in timings:
+                MODEL_SCORING_SECONDS.observe(seconds, version=version, role=role)
+            with self._lock:
+                stats = self._version_stats(version)
+                stats["roles"].add(role)
+                stats["rows"] += rows
+                stats["seconds"] += sum(timings)
+
+        with self._lock:
+            stats = self._version_stats(candidate)
+            stats["compared_rows"] += rows
+            stats["agreed_rows"] += agreed
+            stats["abs_difference"] += float(difference.sum())
+            stats["max_abs_difference"] = max(
+                stats["max_abs_difference"], float(difference.max(initial=0.0))
+            )
+        SHADOW_ROWS.inc(agreed, version=candidate, agreement="yes")
+        SHADOW_ROWS.inc(rows - agreed, version=candidate, agreement="no")
+
+    def _version_stats(self, version: str) -> dict:
+        """
+        The stats of a version, created empty on first use; the caller
+        holds the lock
+        """
+        stats = self._stats.get(version)
+        if stats is None:
+            stats = self._stats[version] = {
+                "roles": set(),
+                "rows": 0,
+                "seconds": 0.0,
+                "compared_rows": 0,
+                "agreed_rows": 0,
+                "abs_difference": 0.0,
+                "max_abs_difference": 0.0,
+                "dropped_rows": 0,
+                "errors": 0,
+            }
+        return stats
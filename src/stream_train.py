@@ -0,0 +1,347 @@
+"""
+Module for streaming, out-of-core training on datasets larger than memory.
+
+The dataset is read in chunks twice (or more, one pass per epoch):
+
+1. A statistics pass feeds mergeable estimators: exact value counts for the
+   median-imputed columns, incremental StandardScaler updates for the other
+   scaled columns, and the set of observed categories.
+2. Training passes transform each chunk with the resulting preprocessor and
+   update an averaged SGDClassifier (logistic loss) with ``partial_fit``.
+
+The result is the same Pipeline shape ``src.train`` produces, so it serves
+through the existing predict path and the compiled engine. Peak memory is
+bounded by the chunk size.
+"""
+
+import time
+from collections import Counter
+import numpy as np
+import pandas as pd
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from src.artifact import save_pipeline
+from src.config.features import TARGET_COLUMN
+from src.config.settings import DATASET_PATH, MODEL_PATH, TRAIN_CHUNK_SIZE
+from src.drift import DriftProfile
+from src.load import iter_dataset_chunks
+from src.registry import export_compact
+from src.train import build_preprocessor
+
+
+class StreamingStats:
+    """
+    Mergeable statistics of the preprocessor's inputs, fed one chunk at a time
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.age_counts = Counter()
+        self.age_missing = 0
+        self.fare_scaler = StandardScaler()
+        self.pclass_scaler = StandardScaler()
+        self.categories = {"Embarked": set(), "Sex": set()}
+        self.classes = set()
+
+    def update(self, chunk: pd.DataFrame):
+        """
+        Fold one chunk into the statistics
+        """
+        self.rows += len(chunk)
+
+        age = chunk["Age"]
+        self.age_missing += int(age.isna().sum())
+        self.age_counts.update(age.dropna().value_counts().to_dict())
+
+        self.fare_scaler.partial_fit(chunk[["Fare"]])
+        self.pclass_scaler.partial_fit(chunk[["Pclass"]])
+
+        for column, seen in self.categories.items():
+            seen.update(chunk[column].dropna().unique().tolist())
+            if chunk[column].isna().any():
+                seen.add(None)
+
+        self.classes.update(chunk[TARGET_COLUMN].unique().tolist())
+
+    def merge(self, other: "StreamingStats"):
+        """
+        Fold the statistics of another (e.g. parallel) pass into this one
+        """
+        self.rows += other.rows
+        self.age_counts.update(other.age_counts)
+        self.age_missing += other.age_missing
+        for mine, theirs in (
+            (self.fare_scaler, other.fare_scaler),
+            (self.pclass_scaler, other.pclass_scaler),
+        ):
+            if hasattr(theirs, "n_samples_seen_"):
+                _merge_scaler(mine, theirs)
+        for column, seen in other.categories.items():
+            self.categories[column].update(seen)
+        self.classes.update(other.classes)
+
+    def to_dict(self) -> dict:
+        """
+        JSON-serialisable form of the statistics, stored in the metadata of
+        the artifact so that incremental updates can continue from them
+        """
+        scalers = {}
+        for column, scaler in self._scalers().items():
+            if hasattr(scaler, "n_samples_seen_"):
+                scalers[column] = {
+                    "n_samples_seen": int(np.ravel(scaler.n_samples_seen_)[0]),
+                    "mean": float(scaler.mean_[0]),
+                    "var": float(scaler.var_[0]),
+                }
+        return {
+            "rows": self.rows,
+            "age_counts": [[float(v), c] for v, c in sorted(self.age_counts.items())],
+            "age_missing": self.age_missing,
+            "scalers": scalers,
+            "categories": {
+                column: sorted(seen, key=lambda value: (value is None, value))
+                for column, seen in self.categories.items()
+            },
+            "classes": sorted(int(value) for value in self.classes),
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "StreamingStats":
+        """
+        Statistics restored from the output of ``to_dict``
+        """
+        stats = cls()
+        stats.rows = state["rows"]
+        stats.age_counts = Counter(dict(state["age_counts"]))
+        stats.age_missing = state["age_missing"]
+        for column, scaler in stats._scalers().items():
+            fitted = state["scalers"].get(column)
+            if fitted is None:
+                continue
+            scaler.n_samples_seen_ = np.int64(fitted["n_samples_seen"])
+            scaler.mean_ = np.array([fitted["mean"]])
+            scaler.var_ = np.array([fitted["var"]])
+            scaler.scale_ = np.where(scaler.var_ > 0, np.sqrt(scaler.var_), 1.0)
+            # later partial_fit calls pass single-column frames
+            scaler.n_features_in_ = 1
+            scaler.feature_names_in_ = np.array([column], dtype=object)
+        stats.categories = {
+            column: set(values) for column, values in state["categories"].items()
+        }
+        stats.classes = set(state["classes"])
+        return stats
+
+    def age_median(self) -> float:
+        """
+        Exact median of the non-missing ages, from the value counts
+        """
+        if not self.age_counts:
+            raise ValueError("Age column has no values to impute from")
+        values = np.array(sorted(self.age_counts))
+        counts = np.array([self.age_counts[v] for v in values])
+        cumulative = np.cumsum(counts)
+        total = cumulative[-1]
+        # same definition as numpy's median: mean of the two middle values
+        low = values[np.searchsorted(cumulative, (total - 1) // 2 + 1)]
+        high = values[np.searchsorted(cumulative, total // 2 + 1)]
+        return float((low + high) / 2)
+
+    def fit_preprocessor(self, sample: pd.DataFrame):
+        """
+        Build the fitted preprocessor from the statistics.
+
+        ``sample`` (e.g. the first chunk) only fixes the input columns; every
+        learned attribute comes from the whole stream.
+        """
+        median = self.age_median()
+
+        age_imputer = SimpleImputer(strategy="median").fit(
+            pd.DataFrame({"Age": [median]})
+        )
+
+        # imputed ages: the observed values plus the median for every missing one
+        age_counts = Counter(self.age_counts)
+        age_counts[median] += self.age_missing
+        age_scaler = StandardScaler().fit(
+            pd.DataFrame({"Age": list(age_counts)}),
+            sample_weight=np.array(list(age_counts.values()), dtype=np.float64),
+        )
+
+        # a frame of real rows cycling through every category seen, so the
+        # encoder (and the ColumnTransformer's output layout) covers them all
+        categories = {
+            column: _sorted_categories(seen)
+            for column, seen in self.categories.items()
+        }
+        n_rows = max(len(sample), *(len(values) for values in categories.values()))
+        prototype = sample.iloc[np.arange(n_rows) % len(sample)]
+        prototype = prototype.reset_index(drop=True)
+        for column, values in categories.items():
+            prototype[column] = pd.Series(
+                [values[i % len(values)] for i in range(n_rows)], dtype=object
+            )
+
+        preprocessor = build_preprocessor().fit(prototype)
+        branches = preprocessor.named_transformers_
+        _copy_fitted(age_imputer, branches["age"].named_steps["imputer"])
+        _copy_fitted(age_scaler, branches["age"].named_steps["scaler"])
+        _copy_fitted(self.fare_scaler, branches["num"].named_steps["scaler"])
+        _copy_fitted(self.pclass_scaler, branches["pclass"].named_steps["scaler"])
+
+        return preprocessor
+
+    def _scalers(self) -> dict:
+        """
+        The incrementally fitted scalers by column
+        """
+        return {"Fare": self.fare_scaler, "Pclass": self.pclass_scaler}
+
+
+def train_streaming(
+    dataset_path=DATASET_PATH,
+    model_path=MODEL_PATH,
+    chunk_size: int = TRAIN_CHUNK_SIZE,
+    epochs: int = 5,
+) -> dict:
+    """
+    Train the Titanic model out of core and return a status dictionary
+    shaped like ``src.train.train``'s.
+
+    Accuracy is measured progressively on the last epoch: each chunk is
+    scored before the classifier is updated with it, so no separate
+    held-out pass over the data is needed.
+    """
+    start = time.perf_counter()
+    try:
+        # 1. Statistics pass
+        stats = StreamingStats()
+        sample = reference = None
+        for chunk in iter_dataset_chunks(dataset_path, chunk_size):
+            if sample is None:
+                sample = chunk
+                # drift reference binned on the first chunk's deciles, without
+                # predicted labels, which would take another pass
+                reference = DriftProfile.fit(chunk)
+            else:
+                reference.update(chunk)
+            stats.update(chunk)
+
+        if sample is None:
+            raise ValueError("Training data is empty or not loaded correctly.")
+
+        preprocessor = stats.fit_preprocessor(sample)
+        classes = np.array(sorted(stats.classes))
+        stats_seconds = time.perf_counter() - start
+
+        # 2. Training passes
+        # averaged SGD: stable coefficients without tuning the learning rate
+        model = SGDClassifier(loss="log_loss", average=True, random_state=42)
+        correct = 0
+        scored = 0
+        for epoch in range(epochs):
+            for chunk in iter_dataset_chunks(dataset_path, chunk_size):
+                X = preprocessor.transform(chunk)
+                y = chunk[TARGET_COLUMN].to_numpy()
+                if epoch == epochs - 1 and hasattr(model, "coef_"):
+                    correct += int((model.predict(X) == y).sum())
+                    scored += len(y)
+                model.partial_fit(X, y, classes=classes)
+
+        pipeline = Pipeline(steps=[("preprocessing", preprocessor), ("model", model)])
+        fit_seconds = time.perf_counter() - start
+
+        metrics = {
+            "progressive_accuracy": correct / scored if scored else None,
+            "train_rows": stats.rows,
+            "epochs": epochs,
+            "chunk_size": chunk_size,
+            "stats_seconds": stats_seconds,
+            "fit_seconds": fit_seconds,
+            "rows_per_second": stats.rows * (epochs + 1) / fit_seconds,
+        }
+
+        save_pipeline(
+            pipeline,
+            model_path,
+            metadata={
+                "stats": stats.to_dict(),
+                "reference": reference.to_dict(),
+                "lineage": {
+                    "mode": "streaming",
+                    "updates_since_refit": 0,
+                    "refit_seconds": time.perf_counter() - start,
+                },
+            },
+        )
+        export_compact(
+            pipeline, model_path, metadata={"reference": reference.to_dict()}
+        )
+
+        return {
+            "success": True,
+            "pipeline": pipeline,
+            "metrics": metrics,
+            "error": None,
+        }
+
+    except Exception as e:  # pylint: disable=broad-except
+        return {
+            "success": False,
+            "pipeline": None,
+            "metrics": None,
+            "error": str(e),
+        }
+
+
+def _merge_scaler(target: StandardScaler, source: StandardScaler):
+    """
+    Merge the running mean/variance of ``source`` into ``target`` (Chan et al.)
+    """
+    if not hasattr(target, "n_samples_seen_"):
+        _copy_fitted(source, target)
+        return
+
+    n_a, n_b = target.n_samples_seen_, source.n_samples_seen_
+    n = n_a + n_b
+    delta = source.mean_ - target.mean_
+    m2 = target.var_ * n_a + source.var_ * n_b + delta**2 * n_a * n_b / n
+
+    target.mean_ = target.mean_ + delta * n_b / n
+    target.var_ = m2 / n
+    target.scale_ = np.where(target.var_ > 0, np.sqrt(target.var_), 1.0)
+    target.n_samples_seen_ = n
+
+
+def _copy_fitted(source, target):
+    """
+    Copy the learned (trailing underscore) attributes of a fitted estimator
+    onto another estimator of the same class. The input validation
+    attributes (n_features_in_, feature_names_in_) of the target are kept,
+    since they describe what the target sees inside its own pipeline.
+    """
+    if type(source) is not type(target):
+        raise TypeError(
+            f"Cannot copy {type(source).__name__} onto {type(target).__name__}"
+        )
+    for name, value in vars(source).items():
+        if name in ("n_features_in_", "feature_names_in_"):
+            continue
+        if name.endswith("_") and not name.startswith("_"):
+            setattr(target, name, value)
+
+
+def _sorted_categories(seen: set) -> list:
+    """
+    Categories in the order OneHotEncoder learns them: sorted, missing last
+    """
+    values = sorted(value for value in seen if value is not None)
+    if None in seen:
+        values.append(np.nan)
+    return values
+
+
+if __name__ == "__main__":
+    result = train_streaming()
+    print(result["metrics"] if result["success"] else result["error"])
@@ -0,0 +1,104 @@
+"""
+Decision threshold tuning
+
+A classifier's ``predict`` cuts the positive-class probability at 0.5.
+``choose_threshold`` instead picks the cut that maximises a metric on a
+validation split, scoring every candidate cut at once from cumulative
+counts over the sorted probabilities.
+"""
+
+import numpy as np
+
+# cut-off used when a model has no tuned threshold
+DEFAULT_THRESHOLD = 0.5
+
+THRESHOLD_METRICS = ("accuracy", "balanced_accuracy", "f1")
+
+
+def choose_threshold(y_true, positive_proba, metric: str = "accuracy") -> dict:
+    """
+    Threshold on the positive-class probability that maximises ``metric``
+    (``y_true`` holding 1 for the positive class).
+
+    A row is predicted positive when its probability is above the
+    threshold. Candidates are the midpoints between consecutive distinct
+    probabilities, plus one below and one at or above them all. Ties are broken
+    towards the threshold closest to 0.5. Returns the threshold and the
+    metric at it and at 0.5, for comparison.
+    """
+    if metric not in THRESHOLD_METRICS:
+        raise ValueError(
+            f"Unknown threshold metric '{metric}', "
+            f"expected one of {THRESHOLD_METRICS}"
+        )
+
+    y_true = np.asarray(y_true).astype(bool)
+    proba = np.asarray(positive_proba, dtype=np.float64)
+    if len(proba) == 0:
+        raise ValueError("Cannot choose a threshold on an empty split")
+
+    order = np.argsort(-proba, kind="stable")
+    proba, y_true = proba[order], y_true[order]
+
+    # predicting the top k as positive, for k at every distinct probability
+    distinct = np.flatnonzero(np.diff(proba)) + 1
+    k = np.concatenate([[0], distinct, [len(proba)]])
+    true_positives = np.concatenate([[0], np.cumsum(y_true)])[k]
+    scores = _metric(metric, true_positives, k, int(y_true.sum()), len(proba))
+
+    # the cut between the k-th and (k+1)-th highest probability
+    # (everything negative above 1.0, everything positive just below the minimum)
+    upper = np.concatenate([[1.0], proba])[k]
+    lower = np.concatenate([proba, [np.nextafter(proba[-1], -np.inf)]])[k]
+    thresholds = (upper + lower) / 2
+    thresholds[k == 0] = 1.0
+    thresholds[k == len(proba)] = lower[-1]
+
+    best = np.flatnonzero(scores == scores.max())
+    index = best[np.argmin(np.abs(thresholds[best] - DEFAULT_THRESHOLD))]
+
+    at_default = int(np.count_nonzero(proba > DEFAULT_THRESHOLD))
+    default_score = _metric(
+        metric,
+        np.array([np.count_nonzero(y_true[:at_default])]),
+        np.array([at_default]),
+        int(y_true.sum()),
+        len(proba),
+    )[0]
+
+    return {
+        "threshold": float(thresholds[index]),
+        "metric": metric,
+        "score": float(scores[index]),
+        "default_score": float(default_score),
+        "validation_rows": int(len(proba)),
+    }
+
+
+def _metric(metric: str, true_positives, predicted_positives, positives, n):
+    """
+    Vectorized metric from confusion counts, one value per cut
+    """
+    true_positives = true_positives.astype(np.float64)
+    false_positives = predicted_positives - true_positives
+    negatives = n - positives
+    true_negatives = negatives - false_positives
+
+    if metric == "accuracy":
+        return (true_positives + true_negatives) / n
+
+    if metric == "balanced_accuracy":
+        # with a single class present, only its own rate is defined
+        if not positives:
+            return true_negatives / negatives
+        if not negatives:
+            return true_positives / positives
+        return (true_positives / positives + true_negatives / negatives) / 2
+
+    denominator = predicted_positives + positives
+    return np.divide(
+        2 * true_positives,
+        denominator,
+        out=np.zeros_like(true_positives),
+        where=denominator > 0,
+    )
@@ -48,12 +48,12 @@ class FamilyFeatures(BaseEstimator, TransformerMixin):
     >>> transformer = FamilyFeatures()
     >>> transformer.fit(X)
     FamilyFeatures()
-    >>> X_transformed = transformer.transform(X)
-    >>> X_transformed
-       family_size  isAlone
-    0            1        1
-    1            3        0
-    2            3        0
+    >>> transformer.transform(X)
+    array([[1, 1],
+           [3, 0],
+           [3, 0]])
+    >>> transformer.get_feature_names_out()
+    array(['family_size', 'isAlone'], dtype=object)
     """
 
     def __init__(self, sibsp_col="SibSp", parch_col="Parch"):
@@ -69,8 +69,6 @@ class FamilyFeatures(BaseEstimator, TransformerMixin):
         """
         self.sibsp_col = sibsp_col
         self.parch_col = parch_col
-        self.n_features_in_ = None
-        self.feature_names_in_ = None
 
     def fit(self, X, y=None):
         """
@@ -81,9 +79,10 @@ class FamilyFeatures(BaseEstimator, TransformerMixin):
 
         Parameters
         ----------
-        X : pd.DataFrame
-            Training input features. Must contain columns specified by
-            sibsp_col and parch_col parameters.
+        X : pd.DataFrame or array-like of shape (n_samples, 2)
+            Training input features. A DataFrame must contain the columns
+            specified by sibsp_col and parch_col; an array must hold exactly
+            the SibSp and Parch columns, in that order.
         y : None
             Ignored, present for API consistency with scikit-learn.
 
@@ -94,32 +93,31 @@ class FamilyFeatures(BaseEstimator, TransformerMixin):
 
         Raises
         ------
-        TypeError
-            If input is not a pandas DataFrame.
         ValueError
             If required columns are not found in the input.
         """
-        # Input validation: Check if X is a DataFrame
-        if not isinstance(X, pd.DataFrame):
-            print(f"This is X: {X} and this is its shape {X.shape}")
-            raise TypeError("This transformer requires a pandas DataFrame. xaha")
-
-        # Validate that required columns exist
-        if self.sibsp_col not in X.columns:
-            raise ValueError(
-                f"Column '{self.sibsp_col}' not found in input. "
-                f"Available columns: {list(X.columns)}"
-            )
-        if self.parch_col not in X.columns:
-            raise ValueError(
-                f"Column '{self.parch_col}' not found in input. "
-                f"Available columns: {list(X.columns)}"
-            )
+        if isinstance(X, pd.DataFrame):
+            # Validate that required columns exist
+            for column in (self.sibsp_col, self.parch_col):
+                if column not in X.columns:
+                    raise ValueError(
+                        f"Column '{column}' not found in input. "
+                        f"Available columns: {list(X.columns)}"
+                    )
+            feature_names = np.array(X.columns, dtype=object)
+        else:
+            X = np.asarray(X)
+            if X.ndim != 2 or X.shape[1] != 2:
+                raise ValueError(
+                    "Array input must have exactly two columns (SibSp, Parch), "
+                    f"got shape {X.shape}"
+                )
+            feature_names = None
 
         # IMPORTANT: Store fitted attributes (ending with underscore)
         # This tells sklearn that the transformer is fitted
         self.n_features_in_ = X.shape[1]
-        self.feature_names_in_ = np.array(X.columns)
+        self.feature_names_in_ = feature_names
 
         return self
 
@@ -127,52 +125,83 @@ class FamilyFeatures(BaseEstimator, TransformerMixin):
         """
         Transform the input data by creating family-related features.
 
-        This method uses the learned information from fit() to transform
-        new data. It will raise an error if fit() hasn't been called.
+        Only the SibSp and Parch columns are read, as NumPy arrays; the
+        input is never copied as a whole.
 
         Parameters
         ----------
-        X : pd.DataFrame
+        X : pd.DataFrame or array-like of shape (n_samples, n_features_in_)
             Input features containing SibSp and Parch columns.
             Must have the same columns as the data used in fit().
 
         Returns
         -------
-        pd.DataFrame
-            DataFrame with two columns:
-            - family_size: Total number of family members
-            - isAlone: Binary indicator (1 if traveling alone, 0 otherwise)
+        ndarray of shape (n_samples, 2)
+            Columns family_size (total number of family members) and
+            isAlone (1 if traveling alone, 0 otherwise). int64 for integer
+            input, as the compiled engine computes it, float64 otherwise
+            so a missing family size stays NaN.
 
         Raises
         ------
-        TypeError
-            If input is not a pandas DataFrame.
         NotFittedError
             If fit() has not been called before transform().
+        ValueError
+            If the input does not have the columns seen in fit().
+        """
+        check_is_fitted(self)
+
+        sibsp, parch = self._family_columns(X)
+
+        dtype = np.result_type(sibsp, parch)
+        dtype = np.int64 if dtype.kind in "iub" else np.float64
+        result = np.empty((len(sibsp), 2), dtype=dtype)
+
+        # family_size = SibSp + Parch + 1, isAlone = family_size == 1
+        np.add(sibsp, parch, out=result[:, 0], casting="unsafe")
+        result[:, 0] += 1
+        np.equal(result[:, 0], 1, out=result[:, 1], casting="unsafe")
+
+        return result
+
+    def __sklearn_is_fitted__(self):
+        """
+        Whether fit() has been called. Artifacts pickled by earlier versions
+        hold the fitted attributes as None until fitted.
+        """
+        return getattr(self, "n_features_in_", None) is not None
+
+    def get_feature_names_out(self, input_features=None):
         """
-        # Check if transformer has been fitted
-        # This looks for attributes ending with underscore
-        check_is_fitted(self, ["n_features_in_", "feature_names_in_"])
-
-        # Input validation: Check if X is a DataFrame
-        if not isinstance(X, pd.DataFrame):
-            raise TypeError("This transformer requires a pandas DataFrame. haha")
-
-        # Make a copy to avoid modifying the original data
-        X_copy = X.copy()
-
-        # Calculate features
-        family_size = X_copy[self.sibsp_col] + X_copy[self.parch_col] + 1
-        is_alone = (family_size == 1).astype(int)
-
-        # Return only the new features as a DataFrame
-        # IMPORTANT: When used in ColumnTransformer, only return your columns
-        result = pd.DataFrame(
-            {
-                "family_size": family_size,
-                "isAlone": is_alone,
-            },
-            index=X_copy.index,
-        )
-
-        return result
\ No newline at end of file
+        Get output feature names for transformation.
+
+        Parameters
+        ----------
+        input_features : array-like of str or None, default=None
+            Ignored, the output names do not depend on the input names.
+
+        Returns
+        -------
+        ndarray of str objects
+            The names family_size and isAlone.
+        """
+        return np.array(["family_size", "isAlone"], dtype=object)
+
+    def _family_columns(self, X):
+        """
+        The SibSp and Parch columns of ``X`` as NumPy arrays (views where
+        the input's memory layout allows it)
+        """
+        if isinstance(X, pd.DataFrame):
+            return X[self.sibsp_col].to_numpy(), X[self.parch_col].to_numpy()
+
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has shape {X.shape}, expected {self.n_features_in_} columns"
+            )
+        if self.feature_names_in_ is None:
+            return X[:, 0], X[:, 1]
+
+        names = list(self.feature_names_in_)
+        return X[:, names.index(self.sibsp_col)], X[:, names.index(self.parch_col)]
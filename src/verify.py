@@ -0,0 +1,137 @@
+"""
+Module for verifying a model artifact as it is loaded
+
+The registry runs these checks on every load and reload, before the model
+is served or swapped in, so a broken artifact never replaces a working
+one:
+
+1. every step of the pipeline is fitted, down to the transformers of a
+   ColumnTransformer and their own steps (``unfitted_steps``);
+2. the artifact is the one its metadata sidecar describes
+   (``src.artifact.verify_sha256``);
+3. the model reads only fields the API accepts and knows the values of
+   its closed-domain fields (``check_schema``);
+4. a synthetic warm-up batch, scored the way requests are, gives finite
+   probabilities (``warm_up``). This also pays for the lazy initialization
+   of sklearn, pandas and NumPy before the first request does.
+
+A schema maps every field of the API's input model to the tuple of its
+allowed values (Literal fields) or to its type (int or float); see
+``app.schema.titanic_data.input_schema``.
+"""
+
+import numpy as np
+import pandas as pd
+from src.config.features import PREDICTION_DTYPES
+
+
+def unfitted_steps(estimator, name: str = "pipeline") -> list:
+    """
+    Paths of the steps of ``estimator`` that are not fitted, e.g.
+    ``["pipeline/preprocessing/num/imputer"]``; empty when everything is.
+
+    Walks the steps of a Pipeline and the fitted transformers of a
+    ColumnTransformer recursively. "passthrough" and "drop" are skipped.
+    """
+    # pylint: disable=import-outside-toplevel
+    from sklearn.exceptions import NotFittedError
+    from sklearn.utils.validation import check_is_fitted
+
+    if estimator is None or isinstance(estimator, str):
+        return []
+
+    # a Pipeline is fitted when its steps are, so those are reported instead
+    if hasattr(estimator, "steps"):
+        children = estimator.steps
+    else:
+        try:
+            check_is_fitted(estimator)
+        except NotFittedError:
+            return [name]
+        children = [
+            (child, transformer)
+            for child, transformer, _ in getattr(estimator, "transformers_", ())
+        ]
+
+    unfitted = []
+    for child, step in children:
+        unfitted += unfitted_steps(step, f"{name}/{child}")
+    return unfitted
+
+
+def check_schema(input_columns, categories: dict, schema: dict) -> list:
+    """
+    Check the columns a model reads against the API ``schema``.
+
+    Raises ValueError when the model reads a column the API does not
+    accept, since no request could score. Returns warnings for API fields
+    the model ignores, and for allowed values of a Literal field missing
+    from ``categories`` (column -> categories the model was trained on).
+    Such values are scored as unknown categories.
+    """
+    missing = [column for column in input_columns if column not in schema]
+    if missing:
+        raise ValueError(f"The model reads columns the API does not accept: {missing}")
+
+    warnings = []
+    ignored = [field for field in schema if field not in input_columns]
+    if ignored:
+        warnings.append(f"The model ignores the API fields {ignored}")
+
+    for column, known in categories.items():
+        allowed = schema[column]
+        if isinstance(allowed, tuple):
+            unseen = [value for value in allowed if value not in known]
+            if unseen:
+                warnings.append(
+                    f"{column} values {unseen} were not seen in training and "
+                    "score as unknown categories"
+                )
+    return warnings
+
+
+def warmup_columns(schema: dict, n_rows: int, seed: int = 0) -> dict:
+    """
+    ``n_rows`` deterministic rows that pass the API ``schema``, as NumPy
+    columns in the dtypes prediction batches use: Literal fields cycle
+    through their allowed values, numeric fields take plausible values
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for field, allowed in schema.items():
+        if isinstance(allowed, tuple):
+            values = [allowed[i % len(allowed)] for i in range(n_rows)]
+        elif allowed is int:
+            values = rng.integers(0, 6, n_rows)
+        else:
+            values = rng.uniform(0.0, 80.0, n_rows).round(2)
+        columns[field] = np.asarray(
+            values, dtype=PREDICTION_DTYPES.get(field, "object")
+        )
+    return columns
+
+
+def warm_up(model, schema: dict, n_rows: int):
+    """
+    Score a single row and a batch of ``n_rows`` synthetic rows with
+    ``model`` (a LoadedModel) along the path requests take: the engine
+    when there is one, the sklearn pipeline otherwise. Raises ValueError
+    unless every probability is finite and within [0, 1].
+    """
+    columns = warmup_columns(schema, n_rows)
+    row = {field: values[:1].tolist()[0] for field, values in columns.items()}
+
+    if model.engine is not None:
+        single = [model.engine.predict_proba_row(row)]
+        batch = model.engine.predict_proba(columns)[:, 1]
+    else:
+        single = model.pipeline.predict_proba(pd.DataFrame([row]))[:, 1]
+        batch = model.pipeline.predict_proba(pd.DataFrame(columns))[:, 1]
+
+    probabilities = np.concatenate([np.asarray(single, dtype=np.float64), batch])
+    valid = np.isfinite(probabilities) & (probabilities >= 0) & (probabilities <= 1)
+    if not valid.all():
+        raise ValueError(
+            f"Warm-up scored {int((~valid).sum())} of {len(probabilities)} rows "
+            "to invalid probabilities"
+        )
@@ -0,0 +1,64 @@
+"""
+Shared fixtures: a small deterministic passenger frame and the titanic
+pipeline fitted on it with each linear model family
+"""
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+# settings refuse to import without these; the tests read neither path
+os.environ.setdefault("PY_ENV", "development")
+os.environ.setdefault("LOCAL_DATASET_PATH", "data/raw/titanic.csv")
+os.environ.setdefault("HF_DATASET_PATH", "hf://datasets/titanic.csv")
+os.environ.setdefault("MODEL_PATH", "models/titanic_pipeline.pkl")
+
+# pylint: disable=wrong-import-position
+from src.search import MODEL_FAMILIES
+from src.train import build_pipeline
+
+N_PASSENGERS = 400
+
+
+@pytest.fixture(scope="session")
+def passengers():
+    """
+    Features and labels of N_PASSENGERS synthetic passengers, with missing
+    Age and Embarked values like the real dataset
+    """
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        {
+            "Age": rng.normal(30.0, 14.0, N_PASSENGERS).clip(0.4, 80.0).round(),
+            "Fare": rng.exponential(30.0, N_PASSENGERS).round(2),
+            "Sex": rng.choice(["male", "female"], N_PASSENGERS),
+            "Pclass": rng.choice([1, 2, 3], N_PASSENGERS, p=[0.25, 0.2, 0.55]),
+            "Embarked": rng.choice(["S", "C", "Q"], N_PASSENGERS, p=[0.7, 0.2, 0.1]),
+            "SibSp": rng.choice(5, N_PASSENGERS, p=[0.6, 0.25, 0.1, 0.03, 0.02]),
+            "Parch": rng.choice(4, N_PASSENGERS, p=[0.7, 0.15, 0.1, 0.05]),
+        }
+    )
+    X.loc[rng.random(N_PASSENGERS) < 0.2, "Age"] = np.nan
+    X["Embarked"] = X["Embarked"].astype(object)
+    X.loc[[3, 17], "Embarked"] = np.nan
+
+    logit = (
+        1.5 * (X["Sex"] == "female")
+        - 0.8 * (X["Pclass"] - 2)
+        - 0.02 * (X["Age"].fillna(30.0) - 30.0)
+        + 0.01 * X["Fare"]
+        - 0.3 * (X["SibSp"] + X["Parch"])
+    )
+    y = (rng.random(N_PASSENGERS) < 1.0 / (1.0 + np.exp(-logit))).astype(int)
+    return X, y
+
+
+@pytest.fixture(scope="session", params=["logistic_regression", "sgd"])
+def fitted_pipeline(request, passengers):
+    """
+    The titanic pipeline fitted on ``passengers``, once per linear model
+    family the compiled engine supports
+    """
+    X, y = passengers
+    return build_pipeline(MODEL_FAMILIES[request.param]()).fit(X, y)
@@ -0,0 +1,158 @@
+"""
+Parity of the fast-path engines with the sklearn pipeline they are built
+from, for every linear model family (see the ``fitted_pipeline`` fixture)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.config.features import ENUMERATED_DOMAINS
+from src.engine import (
+    CompiledModel,
+    TableModel,
+    compile_pipeline,
+    domain_columns,
+    probe_columns,
+)
+from src.registry import PARITY_TOLERANCE, load_engine, pipeline_fallback
+
+# the probes deliberately hold categories the encoder has not seen
+pytestmark = pytest.mark.filterwarnings("ignore:Found unknown categories")
+
+PASSENGER = {
+    "Age": 30.0,
+    "Fare": 10.0,
+    "Sex": "male",
+    "Pclass": 3,
+    "Embarked": "S",
+    "SibSp": 0,
+    "Parch": 0,
+}
+
+# one known passenger and variations on it the engines must handle
+EDGE_ROWS = [
+    PASSENGER,
+    {**PASSENGER, "Sex": "female", "Pclass": 1, "Embarked": "C"},
+    {**PASSENGER, "Age": np.nan},
+    {**PASSENGER, "Age": None},
+    {**PASSENGER, "Embarked": np.nan},
+    {**PASSENGER, "Embarked": None},
+    {**PASSENGER, "Embarked": "X"},
+    {**PASSENGER, "Sex": "unknown"},
+    {**PASSENGER, "SibSp": 1, "Parch": 2},
+    {**PASSENGER, "SibSp": 8, "Parch": 6, "Fare": 512.33, "Age": 0.42},
+]
+
+# rows outside the table engine's tables, scored by its fallback
+OUTSIDE_ROWS = [
+    {**PASSENGER, "Embarked": "X"},
+    {**PASSENGER, "Pclass": 4},
+    {**PASSENGER, "SibSp": 15, "Parch": 10},
+]
+
+
+def assert_parity(pipeline, engine, X):
+    """
+    The engine's positive-class probabilities and labels on X match the
+    pipeline's
+    """
+    np.testing.assert_allclose(
+        engine.predict_proba(X)[:, 1],
+        pipeline.predict_proba(X)[:, 1],
+        rtol=0,
+        atol=PARITY_TOLERANCE,
+    )
+    np.testing.assert_array_equal(engine.predict(X), pipeline.predict(X))
+
+
+def table_engine(pipeline, fallback=None) -> TableModel:
+    """
+    The table engine of a fitted pipeline, built as the registry builds it
+    unless another ``fallback`` is given
+    """
+    return TableModel(
+        compile_pipeline(pipeline),
+        ENUMERATED_DOMAINS,
+        fallback=fallback or pipeline_fallback(pipeline),
+    )
+
+
+def no_fallback(columns):
+    """
+    Table engine fallback failing the test: the rows should have been
+    scored from the tables
+    """
+    pytest.fail(f"{len(next(iter(columns.values())))} rows fell back")
+
+
+def test_compiled_matches_pipeline_on_training_rows(fitted_pipeline, passengers):
+    X, _ = passengers
+    assert_parity(fitted_pipeline, compile_pipeline(fitted_pipeline), X)
+
+
+def test_compiled_matches_pipeline_on_probe_rows(fitted_pipeline):
+    compiled = compile_pipeline(fitted_pipeline)
+    X = pd.DataFrame(probe_columns(compiled))[compiled.input_columns]
+    assert X["Age"].isna().any()
+    assert_parity(fitted_pipeline, compiled, X)
+
+
+def test_compiled_matches_pipeline_on_edge_rows(fitted_pipeline):
+    compiled = compile_pipeline(fitted_pipeline)
+    assert_parity(fitted_pipeline, compiled, pd.DataFrame(EDGE_ROWS))
+
+
+def test_compiled_row_path_matches_pipeline(fitted_pipeline):
+    compiled = compile_pipeline(fitted_pipeline)
+    X = pd.DataFrame(EDGE_ROWS)
+    np.testing.assert_allclose(
+        [compiled.predict_proba_row(row) for row in EDGE_ROWS],
+        fitted_pipeline.predict_proba(X)[:, 1],
+        rtol=0,
+        atol=PARITY_TOLERANCE,
+    )
+    assert [compiled.predict_row(row) for row in EDGE_ROWS] == list(
+        fitted_pipeline.predict(X)
+    )
+
+
+def test_load_engine_serves_compiled_engine(fitted_pipeline):
+    assert isinstance(load_engine(fitted_pipeline, "compiled"), CompiledModel)
+
+
+def test_table_matches_pipeline_over_domain(fitted_pipeline):
+    table = table_engine(fitted_pipeline, fallback=no_fallback)
+    X = pd.DataFrame(domain_columns(table))[table.input_columns]
+    assert_parity(fitted_pipeline, table, X)
+
+
+def test_table_row_path_matches_pipeline_over_domain(fitted_pipeline):
+    table = table_engine(fitted_pipeline, fallback=no_fallback)
+    X = pd.DataFrame(domain_columns(table))[table.input_columns]
+    rows = X.to_dict("records")
+    np.testing.assert_allclose(
+        [table.predict_proba_row(row) for row in rows],
+        fitted_pipeline.predict_proba(X)[:, 1],
+        rtol=0,
+        atol=PARITY_TOLERANCE,
+    )
+    assert [table.predict_row(row) for row in rows] == list(fitted_pipeline.predict(X))
+
+
+def test_table_matches_pipeline_on_edge_and_outside_rows(fitted_pipeline):
+    table = table_engine(fitted_pipeline)
+    rows = EDGE_ROWS + OUTSIDE_ROWS
+    X = pd.DataFrame(rows)
+    _, outside = table.decision_function(X)
+    assert outside[-len(OUTSIDE_ROWS) :].all()
+    assert_parity(fitted_pipeline, table, X)
+    np.testing.assert_allclose(
+        [table.predict_proba_row(row) for row in rows],
+        fitted_pipeline.predict_proba(X)[:, 1],
+        rtol=0,
+        atol=PARITY_TOLERANCE,
+    )
+
+
+def test_load_engine_serves_table_engine(fitted_pipeline):
+    assert isinstance(load_engine(fitted_pipeline, "table"), TableModel)